@@ -0,0 +1,32 @@
+"""
+Rebuild the history_daily_rollup table from the raw history table.
+
+Run once after upgrading an existing database, or after importing history
+rows outside the app (the seeder calls this automatically):
+
+    python3 database_setup/backfill_rollup.py
+    python3 database_setup/backfill_rollup.py --since 2025-09-01
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from database import DatabaseManager  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill history_daily_rollup from history.")
+    parser.add_argument('--since', help="Only rebuild days on or after YYYY-MM-DD (default: all)")
+    args = parser.parse_args()
+
+    since = datetime.strptime(args.since, '%Y-%m-%d').date() if args.since else None
+    written = DatabaseManager().rebuild_daily_rollup(since=since)
+    print(f"Wrote {written} rollup rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Database benchmark: times every public ``DatabaseManager`` /
+``PersonalDatabaseManager`` method against synthetic datasets of several
+sizes and records p50 / p95 / p99 latencies.
+
+For each size a scratch database is dropped, recreated from
+``mysql_database_construction.txt`` plus ``migrations/`` and filled by
+``workload.py`` with a fixed seed, so two runs see identical data and
+their JSON results can be compared directly (``--compare``).  Any MySQL-compatible server on
+localhost works: a local MySQL, or a MariaDB / Docker stand-in.
+
+    python3 database_setup/db_benchmark.py --sizes 10000,100000,1000000
+    python3 database_setup/db_benchmark.py --sizes 10000000 --repeats 20 --out big.json
+    python3 database_setup/db_benchmark.py --compare before.json --out after.json
+
+The no-op stubs ``give_inventory_data`` / ``give_history_data`` are not timed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import sys
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from database import DatabaseManager, PersonalDatabaseManager, clear_identity_caches, get_pool  # noqa: E402
+import migrate  # noqa: E402
+import workload  # noqa: E402
+
+
+SCHEMA_PATH = os.path.join(workload.SETUP_DIR, 'mysql_database_construction.txt')
+RESULTS_DIR = os.path.join(workload.SETUP_DIR, '..', 'assets', 'cache', 'db_benchmark')
+BENCH_DATABASE = 'inventory_bench'
+PERCENTILES = (50, 95, 99)
+
+
+def _percentiles(samples_ms):
+    if not samples_ms:
+        return {f"p{p}_ms": None for p in PERCENTILES}
+    values = np.percentile(samples_ms, PERCENTILES)
+    return {f"p{p}_ms": float(v) for p, v in zip(PERCENTILES, values)}
+
+
+# ---------------------------------------------------------------------- #
+#  Scratch database                                                        #
+# ---------------------------------------------------------------------- #
+
+def recreate_database(user, password, database):
+    """Drop and recreate *database* with the base schema plus every migration."""
+    conn = mysql.connector.connect(host='localhost', user=user, password=password)
+    c = conn.cursor()
+    c.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    c.execute(f"CREATE DATABASE `{database}`")
+    c.execute(f"USE `{database}`")
+    with open(SCHEMA_PATH) as f:
+        for statement in migrate.split_statements(f.read()):
+            c.execute(statement)
+    conn.commit()
+    migrate.migrate(conn)
+    conn.close()
+    clear_identity_caches()     # ids cached from the previous size's data
+
+
+def _managers(user, password, database):
+    """The app's manager classes, pointed at the scratch database."""
+
+    class BenchDatabaseManager(DatabaseManager):
+        def _get_connection(self):
+            return get_pool("localhost", user, password, database).acquire()
+
+    class BenchPersonalDatabaseManager(PersonalDatabaseManager):
+        def _get_connection(self):
+            return get_pool("localhost", user, password, database).acquire()
+
+    return BenchDatabaseManager(), BenchPersonalDatabaseManager
+
+
+# ---------------------------------------------------------------------- #
+#  Cases                                                                   #
+# ---------------------------------------------------------------------- #
+
+def build_cases(db, personal_cls, tables, repeats, seed=0):
+    """``[(name, call, n), ...]`` in run order; *call(i)* performs iteration *i*.
+
+    Write cases consume their own fresh barcodes so they can run any
+    number of times: drugs added by ``add_to_drugs_database`` are stocked
+    by ``add_to_inventory`` and then removed by ``delete_entry``.
+    """
+    rng = np.random.default_rng(seed)
+    names = [m[1] for m in tables['medications']]
+    barcodes = [m[0] for m in tables['medications']]
+    people = [p[1] for p in tables['people'] if p[1] != 'admin']
+    today = date.today()
+    month = f"{today - timedelta(days=31)} to {today}"
+    new_barcodes = [f"{900000000000 + i:012d}" for i in range(repeats)]
+
+    def pick(seq):
+        return seq[int(rng.integers(len(seq)))]
+
+    personal = personal_cls(people[0])
+    cursor = max(0, db.pull_inventory_snapshot()[0] - 100)
+    rollup_runs = min(repeats, 5)   # rebuilds are heavy; a few samples suffice
+
+    return [
+        ('DatabaseManager.user_names', lambda i: db.user_names(), repeats),
+        ('DatabaseManager.pull_types', lambda i: db.pull_types(), repeats),
+        ('DatabaseManager.check_if_barcode_exists', lambda i: db.check_if_barcode_exists(pick(barcodes)), repeats),
+        ('DatabaseManager.pull_data[drugs_in_inventory]', lambda i: db.pull_data('drugs_in_inventory'), repeats),
+        ('DatabaseManager.pull_data[drug_changes]', lambda i: db.pull_data('drug_changes'), repeats),
+        ('DatabaseManager.pull_inventory_snapshot', lambda i: db.pull_inventory_snapshot(), repeats),
+        ('DatabaseManager.pull_inventory_changes', lambda i: db.pull_inventory_changes(cursor), repeats),
+        ('DatabaseManager.pattern_line_graph[whole]', lambda i: db.pattern_line_graph(month, 'whole'), repeats),
+        ('DatabaseManager.pattern_line_graph[user]', lambda i: db.pattern_line_graph(month, pick(people)), repeats),
+        ('DatabaseManager.pattern_recognition', lambda i: db.pattern_recognition(), repeats),
+        ('DatabaseManager.log_access_to_inventory',
+         lambda i: db.log_access_to_inventory(pick(names), -1, pick(people)), repeats),
+        ('DatabaseManager.add_to_drugs_database',
+         lambda i: db.add_to_drugs_database(new_barcodes[i], f"Bench Drug {i}", 100, 'Benchmark',
+                                            'Tablet', '10 mg', today + timedelta(days=365)), repeats),
+        ('DatabaseManager.add_to_inventory',
+         lambda i: db.add_to_inventory(new_barcodes[i], pick(people), 'bench'), repeats),
+        ('DatabaseManager.delete_entry', lambda i: db.delete_entry(new_barcodes[i], 'benchmark'), repeats),
+        ('DatabaseManager.rebuild_daily_rollup[7d]',
+         lambda i: db.rebuild_daily_rollup(since=today - timedelta(days=7)), rollup_runs),
+        ('PersonalDatabaseManager.__init__', lambda i: personal_cls(pick(people)), repeats),
+        ('PersonalDatabaseManager.get_personal_data',
+         lambda i: personal.get_personal_data(today - timedelta(days=int(rng.integers(1, 30)))), repeats),
+        ('PersonalDatabaseManager.pull_data[prescriptions]', lambda i: personal.pull_data('prescriptions'), repeats),
+        ('PersonalDatabaseManager.add_prescription_med',
+         lambda i: personal.add_prescription_med(pick(barcodes), 1, frequency=1, leeway=30,
+                                                 time='08:00:00', as_needed=False), repeats),
+    ]
+
+
+def time_cases(cases, warmup=2):
+    """Run every case; returns ``{name: {n, mean_ms, p50_ms, p95_ms, p99_ms, error}}``."""
+    results = {}
+    for name, call, n in cases:
+        samples, error = [], None
+        try:
+            if not name.split('.')[1].startswith(('add_', 'delete_', 'log_')):
+                for _ in range(warmup):
+                    call(0)
+            for i in range(n):
+                start = time.perf_counter()
+                call(i)
+                samples.append(1000 * (time.perf_counter() - start))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results[name] = {
+            'n': len(samples),
+            'mean_ms': float(np.mean(samples)) if samples else None,
+            **_percentiles(samples),
+            'error': error,
+        }
+        p = results[name]
+        if error:
+            print(f"  {name:52s} failed after {p['n']} runs: {error}")
+        else:
+            print(f"  {name:52s} p50 {p['p50_ms']:8.2f}  p95 {p['p95_ms']:8.2f}  p99 {p['p99_ms']:8.2f} ms")
+    return results
+
+
+# ---------------------------------------------------------------------- #
+#  Runs                                                                    #
+# ---------------------------------------------------------------------- #
+
+def run_size(rows, args):
+    """Rebuild the scratch database with ~*rows* history rows and time every case."""
+    config = workload.WorkloadConfig.for_rows(rows, users=args.users, skus=args.skus,
+                                              days=args.days, seed=args.seed)
+    print(f"\n== {rows:,} history rows ({config.users} people, {config.skus} SKUs, {config.days} days)")
+    recreate_database(args.user, args.password, args.database)
+
+    conn = mysql.connector.connect(host='localhost', user=args.user, password=args.password,
+                                   database=args.database)
+    start = time.perf_counter()
+    inserted = workload.load(config, conn)
+    conn.close()
+    db, personal_cls = _managers(args.user, args.password, args.database)
+    db.rebuild_daily_rollup()
+    load_s = time.perf_counter() - start
+    print(f"  loaded {inserted:,} rows in {load_s:.1f}s")
+
+    cases = build_cases(db, personal_cls, workload.reference_tables(config), args.repeats, args.seed)
+    return {
+        'rows': inserted,
+        'load_s': load_s,
+        'workload': config.to_dict(),
+        'methods': time_cases(cases),
+    }
+
+
+def compare(baseline, current):
+    """Print the p95 change of every method present in both result files."""
+    print("\n== p95 vs baseline")
+    for size, result in current['sizes'].items():
+        base = baseline.get('sizes', {}).get(size)
+        if not base:
+            continue
+        print(f"  {int(size):,} rows")
+        for name, stats in result['methods'].items():
+            old = base['methods'].get(name, {}).get('p95_ms')
+            new = stats.get('p95_ms')
+            if old and new:
+                print(f"    {name:52s} {old:8.2f} -> {new:8.2f} ms ({new / old:5.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the database access layer at several data sizes.")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help="comma-separated history row counts (default: 10000,100000,1000000)")
+    parser.add_argument('--repeats', type=int, default=50, help="timed calls per method and size")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--skus', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', default=BENCH_DATABASE,
+                        help=f"scratch database, dropped and recreated (default: {BENCH_DATABASE})")
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='1234')
+    parser.add_argument('--out', help="results JSON (default: assets/cache/db_benchmark/<host>_<time>.json)")
+    parser.add_argument('--compare', help="earlier results JSON to compare p95 latencies against")
+    args = parser.parse_args()
+
+    if args.database == DatabaseManager().database:
+        parser.error(f"refusing to drop the application database '{args.database}'")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    conn = mysql.connector.connect(host='localhost', user=args.user, password=args.password)
+    server = conn.get_server_info()
+    conn.close()
+
+    results = {
+        'meta': {
+            'host': socket.gethostname(),
+            'platform': platform.platform(),
+            'server': server,
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'repeats': args.repeats,
+            'seed': args.seed,
+        },
+        'sizes': {str(rows): run_size(rows, args) for rows in sizes},
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{socket.gethostname()}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
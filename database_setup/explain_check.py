@@ -0,0 +1,214 @@
+"""
+EXPLAIN every query in src/database.py and flag full table scans.
+
+Rather than keeping its own copy of the SQL, the check runs the real
+``DatabaseManager`` / ``PersonalDatabaseManager`` / ``IdentityCache`` code
+paths on one connection, records each statement they execute and EXPLAINs
+it with the parameters it was given.  Write paths run too, inside a single
+transaction that is rolled back at the end (their commits are suppressed),
+so point it at a scratch database when kiosks are live.  The ``log_usage``
+stored procedure is covered through its statement-by-statement fallback,
+which issues the same queries.
+
+Run against a database with realistic data (e.g. the scratch database left
+by db_benchmark.py) after migrating it; on near-empty tables MySQL may
+prefer a scan even when an index exists, so scans estimated at fewer than
+``--min-rows`` rows are not counted.  Code paths that read a whole table by
+design list the tables they may scan.
+
+    python3 database_setup/explain_check.py
+    python3 database_setup/explain_check.py --database inventory_bench
+
+Exits non-zero when a query scans a table it should reach through an index.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from database import DatabaseManager, PersonalDatabaseManager, clear_identity_caches  # noqa: E402
+
+
+UNUSED_BARCODE = '000000000000'
+"""str: Barcode the write paths add, stock and delete inside the rolled-back transaction."""
+
+# ---------------------------------------------------------------------- #
+#  Recording connection                                                    #
+# ---------------------------------------------------------------------- #
+
+class RecordingCursor:
+    """Cursor proxy that appends every ``(sql, params)`` it executes to *log*."""
+
+    def __init__(self, raw, log):
+        self._raw = raw
+        self._log = log
+
+    def execute(self, sql, params=()):
+        self._log.append((sql, tuple(params or ())))
+        return self._raw.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class RecordingConnection:
+    """One shared connection handed to every manager; commits and closes are no-ops."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.log = []
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self.raw.cursor(*args, **kwargs), self.log)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def _explainable(sql):
+    text = sql.lstrip().upper()
+    if text.startswith('INSERT'):
+        return ' SELECT ' in ' '.join(text.split())     # INSERT ... SELECT has a read plan
+    return text.startswith(('SELECT', 'UPDATE', 'DELETE'))
+
+
+# ---------------------------------------------------------------------- #
+#  Code paths                                                              #
+# ---------------------------------------------------------------------- #
+
+def sample_values(c):
+    """Real keys to call the code paths with."""
+    c.execute("SELECT id, name FROM people ORDER BY id LIMIT 1")
+    person_id, person = c.fetchone()
+    c.execute("""SELECT in_inventory.barcode, medications.name FROM in_inventory
+                 JOIN medications ON medications.barcode = in_inventory.barcode LIMIT 1""")
+    barcode, medication = c.fetchone()
+    c.execute("SELECT COALESCE(MAX(id), 0) FROM history")
+    head = c.fetchone()[0]
+    return {'person_id': person_id, 'person': person, 'barcode': barcode,
+            'medication': medication, 'head': head, 'today': date.today()}
+
+
+def code_paths(db, personal_cls, s):
+    """``[(label, call, tables it may scan), ...]``; *call(cursor)* runs one real code path."""
+    month = f"{s['today'] - timedelta(days=30)} to {s['today']}"
+    personal = personal_cls(s['person'])
+    ids = db.identities
+    return [
+        ("IdentityCache.person_id", lambda c: ids.person_id(c, s['person']), ()),
+        ("IdentityCache.person_ids", lambda c: ids.person_ids(c, [s['person'], 'nobody']), ()),
+        ("IdentityCache.medication_barcode", lambda c: ids.medication_barcode(c, s['medication']), ()),
+        ("IdentityCache.medication_name", lambda c: ids.medication_name(c, s['barcode']), ()),
+        ("user_names", lambda c: db.user_names(), ('people',)),
+        ("pull_types", lambda c: db.pull_types(), ('medications',)),
+        ("check_if_barcode_exists", lambda c: db.check_if_barcode_exists(s['barcode']), ()),
+        ("pull_data[drugs_in_inventory]", lambda c: db.pull_data('drugs_in_inventory'), ('in_inventory',)),
+        ("pull_data[drug_changes]", lambda c: db.pull_data('drug_changes'), ()),
+        ("pull_inventory_snapshot", lambda c: db.pull_inventory_snapshot(), ('in_inventory',)),
+        ("pull_inventory_changes", lambda c: db.pull_inventory_changes(max(0, s['head'] - 100)), ()),
+        ("pattern_line_graph[whole]", lambda c: db.pattern_line_graph(month, 'whole'), ()),
+        ("pattern_line_graph[user]", lambda c: db.pattern_line_graph(month, s['person']), ()),
+        ("pattern_recognition", lambda c: db.pattern_recognition(), ()),
+        ("rebuild_daily_rollup[since]", lambda c: db.rebuild_daily_rollup(since=s['today']), ()),
+        ("log_usage (inline fallback)",
+         lambda c: DatabaseManager._log_usage_inline(c, s['barcode'], s['person_id'], -1, datetime.now()), ()),
+        ("add_to_drugs_database",
+         lambda c: db.add_to_drugs_database(UNUSED_BARCODE, 'Explain Check', 1, 'Check', 'Tablet', '1 mg',
+                                            s['today']), ()),
+        ("add_to_inventory", lambda c: db.add_to_inventory(UNUSED_BARCODE, s['person'], 'check'), ()),
+        ("delete_entry", lambda c: db.delete_entry(UNUSED_BARCODE, 'explain check'), ()),
+        ("PersonalDatabaseManager.__init__", lambda c: personal_cls(s['person']), ()),
+        ("get_personal_data", lambda c: personal.get_personal_data(s['today']), ()),
+        ("history_entry", lambda c: personal.history_entry(s['head']), ()),
+        ("personal pull_data[prescriptions]", lambda c: personal.pull_data('prescriptions'), ()),
+    ]
+
+
+def _managers(conn):
+    """Manager classes whose connections are all *conn*."""
+
+    class CheckDatabaseManager(DatabaseManager):
+        def _get_connection(self):
+            return conn
+
+    class CheckPersonalDatabaseManager(PersonalDatabaseManager):
+        def _get_connection(self):
+            return conn
+
+    return CheckDatabaseManager(), CheckPersonalDatabaseManager
+
+
+# ---------------------------------------------------------------------- #
+#  Check                                                                   #
+# ---------------------------------------------------------------------- #
+
+def check(raw, min_rows=1000):
+    """Run and EXPLAIN every code path; returns ``[(label, table, rows), ...]`` for unexpected scans."""
+    conn = RecordingConnection(raw)
+    explain = raw.cursor(dictionary=True)
+    samples = sample_values(raw.cursor())
+    db, personal_cls = _managers(conn)
+    problems = []
+    try:
+        for label, call, scan_ok in code_paths(db, personal_cls, samples):
+            clear_identity_caches()     # make every lookup reach the database
+            del conn.log[:]
+            try:
+                call(conn.cursor())
+            except Exception as e:
+                print(f"{label:34s} failed: {type(e).__name__}: {e}")
+            seen = set()
+            for sql, params in conn.log:
+                if sql in seen or not _explainable(sql):
+                    continue
+                seen.add(sql)
+                explain.execute("EXPLAIN " + sql, params)
+                for step in explain.fetchall():
+                    table, access, key = step['table'], step['type'], step['key']
+                    rows = int(step['rows'] or 0)
+                    scan = access in ('ALL', 'index')     # 'index' walks the whole index
+                    flag = ''
+                    if scan and table not in scan_ok and rows >= min_rows:
+                        problems.append((label, table, rows))
+                        flag = '  <-- full scan'
+                    print(f"{label:34s} {str(table):22s} {str(access):7s} {str(key):30s} rows~{rows}{flag}")
+    finally:
+        raw.rollback()      # undo the write paths
+        clear_identity_caches()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the database.py queries and flag full scans.")
+    parser.add_argument('--database', default='inventory_system')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='1234')
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help="ignore scans the optimizer estimates below this many rows")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host='localhost', user=args.user, password=args.password,
+                                   database=args.database)
+    problems = check(conn, args.min_rows)
+    conn.close()
+    if problems:
+        print(f"\n{len(problems)} unindexed access path(s):")
+        for label, table, rows in problems:
+            print(f"  {label}: full scan of {table} (~{rows} rows)")
+        sys.exit(1)
+    print("\nEvery query reaches its tables through an index.")
+
+
+if __name__ == '__main__':
+    main()
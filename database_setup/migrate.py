@@ -0,0 +1,173 @@
+"""
+Apply versioned schema migrations to the inventory database.
+
+Migrations are ``migrations/NNNN_description.sql`` files applied in version
+order; each applied version is recorded in ``schema_migrations`` (with a
+checksum, so edits to an already-applied file are reported).  Files may
+use the mysql client's ``DELIMITER`` command for stored routines.
+
+Run after creating the tables from mysql_database_construction.txt, and
+again after every upgrade:
+
+    python3 database_setup/migrate.py             # apply pending migrations
+    python3 database_setup/migrate.py --status    # list applied / pending versions
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+import mysql.connector
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+def split_statements(sql):
+    """Split a migration script into statements.
+
+    Understands ``DELIMITER`` lines (so procedure bodies with ``;`` stay
+    whole), quoted strings and identifiers, and ``--`` / ``#`` / ``/* */``
+    comments (which are dropped).
+    """
+    statements, current = [], []
+    delimiter = ';'
+    i, n = 0, len(sql)
+    at_line_start = True
+    while i < n:
+        if at_line_start:
+            line_end = sql.find('\n', i)
+            line_end = n if line_end == -1 else line_end
+            match = re.match(r'\s*DELIMITER\s+(\S+)\s*$', sql[i:line_end], re.IGNORECASE)
+            if match:
+                if ''.join(current).strip():
+                    statements.append(''.join(current).strip())
+                current = []
+                delimiter = match.group(1)
+                i = line_end + 1
+                continue
+        at_line_start = False
+
+        ch = sql[i]
+        if ch in "'\"`":
+            j = i + 1
+            while j < n and sql[j] != ch:
+                j += 2 if sql[j] == '\\' and ch != '`' else 1
+            current.append(sql[i:j + 1])
+            i = j + 1
+        elif sql.startswith('--', i) and (i + 2 >= n or sql[i + 2] in ' \t\r\n') or ch == '#':
+            end = sql.find('\n', i)
+            i = n if end == -1 else end
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif sql.startswith(delimiter, i):
+            if ''.join(current).strip():
+                statements.append(''.join(current).strip())
+            current = []
+            i += len(delimiter)
+        else:
+            current.append(ch)
+            at_line_start = ch == '\n'
+            i += 1
+    if ''.join(current).strip():
+        statements.append(''.join(current).strip())
+    return statements
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """``[(version, name, path), ...]`` sorted by version."""
+    found = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return found
+
+
+def _checksum(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def applied_versions(c):
+    """``{version: checksum}`` of applied migrations (creates the tracking table on first use)."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS `schema_migrations` (
+          `version` INT NOT NULL,
+          `name` VARCHAR(255) NOT NULL,
+          `checksum` CHAR(40) NOT NULL,
+          `applied_at` DATETIME NOT NULL,
+          PRIMARY KEY (`version`)
+        )
+    """)
+    c.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(c.fetchall())
+
+
+def migrate(conn, directory=MIGRATIONS_DIR, target=None):
+    """Apply every pending migration up to *target* (default: all). Returns the versions applied.
+
+    MySQL commits DDL implicitly, so a migration that fails part-way is not
+    rolled back; fix the cause and re-run (the failed version stays pending).
+    """
+    c = conn.cursor()
+    done = applied_versions(c)
+    applied = []
+    for version, name, path in discover(directory):
+        if target is not None and version > target:
+            break
+        checksum = _checksum(path)
+        if version in done:
+            if done[version] != checksum:
+                print(f"Warning: migration {version:04d}_{name} changed after it was applied")
+            continue
+        print(f"Applying {version:04d}_{name}")
+        with open(path) as f:
+            for statement in split_statements(f.read()):
+                c.execute(statement)
+                if c.with_rows:
+                    c.fetchall()
+        c.execute("INSERT INTO schema_migrations (version, name, checksum, applied_at) VALUES (%s, %s, %s, NOW())",
+                  (version, name, checksum))
+        conn.commit()
+        applied.append(version)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    parser.add_argument('--status', action='store_true', help="list migrations without applying them")
+    parser.add_argument('--target', type=int, help="stop after this version")
+    parser.add_argument('--database', default='inventory_system')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='1234')
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host='localhost', user=args.user, password=args.password,
+                                   database=args.database)
+    if args.status:
+        done = applied_versions(conn.cursor())
+        conn.commit()
+        for version, name, _ in discover():
+            print(f"{version:04d}_{name}: {'applied' if version in done else 'pending'}")
+    else:
+        try:
+            applied = migrate(conn, target=args.target)
+        except mysql.connector.Error as e:
+            print(f"Migration failed: {e}")
+            sys.exit(1)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
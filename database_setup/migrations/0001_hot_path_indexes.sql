@@ -0,0 +1,24 @@
+-- 0001: indexes for the hot query paths in src/database.py
+--
+-- history is only ever filtered by time, or by person / barcode over a time
+-- range; these composite keys also take over from the implicit foreign-key
+-- indexes on history.person_id and history.barcode.
+ALTER TABLE `history`
+  ADD INDEX `history_time` (`time_of_use`),
+  ADD INDEX `history_person_time` (`person_id`, `time_of_use`),
+  ADD INDEX `history_barcode_time` (`barcode`, `time_of_use`);
+
+-- Nearly every method starts with SELECT id FROM people WHERE name = %s.
+-- TEXT can only carry a prefix index, so names become a bounded VARCHAR.
+ALTER TABLE `people`
+  MODIFY `name` VARCHAR(100) NOT NULL,
+  ADD INDEX `people_name` (`name`);
+
+-- WHERE barcode = %s lookups read (id, estimated_amount_remaining); InnoDB
+-- secondary keys carry the primary key, so this index covers them.
+ALTER TABLE `in_inventory`
+  ADD INDEX `in_inventory_barcode_amount` (`barcode`, `estimated_amount_remaining`);
+
+-- SELECT barcode FROM medications WHERE name = %s (log_access_to_inventory)
+ALTER TABLE `medications`
+  ADD INDEX `medications_name` (`name`(64));
@@ -0,0 +1,22 @@
+-- 0002: history_daily_rollup for databases created before the table existed
+--
+-- Graphs and pattern recognition read this rollup, and log_usage (0003)
+-- writes it, so an upgraded database needs the table and its backfill.
+-- Databases built from the current mysql_database_construction.txt already
+-- have it; INSERT IGNORE leaves the rows the app has been keeping current
+-- untouched and only fills in missing (day, person, barcode) groups.
+CREATE TABLE IF NOT EXISTS `history_daily_rollup` (
+  `day` DATE NOT NULL,
+  `person_id` INT NOT NULL,
+  `barcode` VARCHAR(12) NOT NULL,
+  `sum_change` INT NOT NULL DEFAULT 0,
+  `count` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`day`, `person_id`, `barcode`),
+  KEY `rollup_person_day` (`person_id`, `day`),
+  KEY `rollup_barcode_day` (`barcode`, `day`)
+);
+
+INSERT IGNORE INTO history_daily_rollup (day, person_id, barcode, sum_change, `count`)
+SELECT DATE(time_of_use), person_id, barcode, SUM(COALESCE(amnt_change, 0)), COUNT(*)
+FROM history
+GROUP BY DATE(time_of_use), person_id, barcode;
@@ -0,0 +1,52 @@
+-- 0003: log_usage stored procedure for DatabaseManager.log_access_to_inventory
+--
+-- One CALL applies a usage (or restock) atomically: the inventory row is
+-- locked, the amount is changed in SQL rather than read-modify-written by
+-- the client, and the history and daily-rollup rows are written in the same
+-- transaction.  Returns a single row: the amount remaining afterwards and
+-- the new history id.
+DROP PROCEDURE IF EXISTS `log_usage`;
+
+DELIMITER //
+CREATE PROCEDURE `log_usage`(
+    IN p_barcode VARCHAR(12),
+    IN p_person_id INT,
+    IN p_change INT,
+    IN p_when DATETIME
+)
+BEGIN
+    DECLARE v_inventory_id INT DEFAULT NULL;
+    DECLARE v_amount INT;
+    DECLARE v_history_id INT;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    SELECT id INTO v_inventory_id FROM in_inventory
+    WHERE barcode = p_barcode ORDER BY id LIMIT 1 FOR UPDATE;
+    IF v_inventory_id IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Barcode is not in inventory';
+    END IF;
+
+    UPDATE in_inventory
+    SET estimated_amount_remaining = estimated_amount_remaining + p_change
+    WHERE barcode = p_barcode;
+    SELECT estimated_amount_remaining INTO v_amount FROM in_inventory WHERE id = v_inventory_id;
+
+    INSERT INTO history (barcode, inventory_id, person_id, type_of_use, time_of_use, amnt_change)
+    VALUES (p_barcode, v_inventory_id, p_person_id, 'Access', p_when, p_change);
+    SET v_history_id = LAST_INSERT_ID();
+
+    INSERT INTO history_daily_rollup (day, person_id, barcode, sum_change, `count`)
+    VALUES (DATE(p_when), p_person_id, p_barcode, p_change, 1)
+    ON DUPLICATE KEY UPDATE sum_change = sum_change + VALUES(sum_change),
+                            `count` = `count` + 1;
+
+    COMMIT;
+    SELECT v_amount AS amount_remaining, v_history_id AS history_id;
+END //
+DELIMITER ;
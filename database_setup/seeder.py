@@ -1,99 +1,362 @@
-import mysql.connector
+"""
+Seed the inventory database from CSV files.
+
+Loads the bundled sample CSVs, or a directory given on the command line
+(e.g. one written by database_setup/workload.py), then rebuilds the daily
+usage rollup:
+
+    python3 database_setup/seeder.py
+    python3 database_setup/seeder.py /tmp/workload_csvs --bulk
+    python3 database_setup/seeder.py /tmp/workload_csvs --load-data
+
+The default mode inserts one row at a time and stops a table at its first
+bad row.  The bulk modes are for large exports: ``--bulk`` streams each CSV
+in ``executemany`` batches (a failing batch is retried row by row), and
+``--load-data`` hands whole files to ``LOAD DATA LOCAL INFILE``.  Both turn
+off unique / foreign-key checks for the session, drop a large table's
+secondary indexes before loading it and rebuild them afterwards, report
+rows/sec, and write rejected rows to ``--rejects`` instead of aborting.
+"""
+
+import argparse
 import csv
+import os
+import re
+import sys
+import time
 
+import mysql.connector
 
-conn = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="1234",
-    database="inventory_system"
-)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
 
-c = conn.cursor()
+from database import DatabaseManager  # noqa: E402
 
 
-with open('database_setup/seeder_csvs/medications.csv','r') as file:
-    csvreader = csv.reader(file)
-    next(csvreader)
+SETUP_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_DIR = os.path.join(SETUP_DIR, 'seeder_csvs')
+REJECTS_DIR = os.path.join(SETUP_DIR, 'seeder_rejects')
 
-    for row in csvreader:
-        try:
-            c.execute("INSERT INTO medications (barcode, name, amount_in_unit,type,dosage,expiration_date) VALUES (%s,%s,%s,%s,%s,%s)",row)
-        except Exception as e:
-            print(f"Error in table medications with row {row}")
-            print(e)
-            break
-    conn.commit()
+BATCH_SIZE = 5000
+"""int: Rows per ``executemany`` call in ``--bulk`` mode."""
 
-with open('database_setup/seeder_csvs/in_inventory.csv','r') as file:
-    csvreader = csv.reader(file)
+INDEX_REBUILD_MIN_BYTES = 8 * 1024 * 1024
+"""int: CSVs at least this large have their table's secondary indexes dropped during the load."""
 
-    next(csvreader)
 
-    for row in csvreader:
-        try:
-            c.execute("INSERT INTO in_inventory (id, barcode,estimated_amount_remaining,location) VALUES (%s,%s,%s,%s)",(row[0],row[1],int(row[2]),row[4],))
-        except Exception as e:
-            print(f"Error in table in_inventory with row {row}")
-            print(e)
-            break
-    conn.commit()
+def _none(value):
+    return value if value else None
+
+
+# Load order (parents before children), the columns each CSV row fills and
+# how a CSV row becomes INSERT parameters.  ``load_data`` is the column /
+# SET clause for LOAD DATA; @vars are read and discarded or transformed.
+TABLES = [
+    {
+        'table': 'medications',
+        'columns': ['barcode', 'name', 'amount_in_unit', 'type', 'dosage', 'expiration_date'],
+        'convert': lambda row: row[:6],
+        'load_data': "(barcode, name, amount_in_unit, type, dosage, expiration_date)",
+    },
+    {
+        'table': 'in_inventory',
+        'columns': ['id', 'barcode', 'estimated_amount_remaining', 'location'],
+        'convert': lambda row: (row[0], row[1], int(row[2]), row[4]),
+        'load_data': "(id, barcode, estimated_amount_remaining, @expiration_date, location)",
+    },
+    {
+        'table': 'prescriptions',
+        'columns': ['barcode', 'dose', 'time', 'leeway', 'as_needed', 'frequency'],
+        'convert': lambda row: (row[1], int(row[2]), _none(row[3]), _none(row[4]),
+                                int(row[5] or 0), _none(row[6])),
+        'load_data': "(@id, barcode, dose, @time, @leeway, as_needed, @frequency) "
+                     "SET time = NULLIF(@time, ''), leeway = NULLIF(@leeway, ''), "
+                     "frequency = NULLIF(@frequency, '')",
+    },
+    {
+        'table': 'people',
+        'columns': ['name'],
+        'convert': lambda row: row[1:2],
+        'load_data': "(@id, name)",
+    },
+    {
+        'table': 'assigned_prescriptions',
+        'columns': ['person_id', 'prescription_id'],
+        'convert': lambda row: row[:2],
+        'load_data': "(person_id, prescription_id)",
+    },
+    {
+        'table': 'history',
+        'columns': ['barcode', 'inventory_id', 'person_id', 'type_of_use', 'time_of_use',
+                    'amnt_change', 'reason'],
+        'convert': lambda row: (row[1], int(row[2]), int(row[3]), row[4], row[5], int(row[6]),
+                                _none(row[7])),
+        'load_data': "(@id, barcode, inventory_id, person_id, type_of_use, time_of_use, amnt_change, @reason) "
+                     "SET reason = NULLIF(@reason, '')",
+    },
+]
+
+
+def _insert_sql(spec):
+    columns = ", ".join(spec['columns'])
+    placeholders = ",".join(["%s"] * len(spec['columns']))
+    return f"INSERT INTO {spec['table']} ({columns}) VALUES ({placeholders})"
+
+
+def _read_rows(path):
+    """Stream a CSV's data rows (header skipped) without reading the whole file."""
+    with open(path, newline='') as file:
+        csvreader = csv.reader(file)
+        next(csvreader, None)
+        yield from csvreader
+
+
+# ---------------------------------------------------------------------- #
+#  Row-by-row mode (default)                                               #
+# ---------------------------------------------------------------------- #
+
+def seed_rows(conn, csv_dir):
+    """One INSERT per CSV row; a table stops at its first bad row."""
+    c = conn.cursor()
+    for spec in TABLES:
+        sql = _insert_sql(spec)
+        for row in _read_rows(os.path.join(csv_dir, f"{spec['table']}.csv")):
+            try:
+                c.execute(sql, spec['convert'](row))
+            except Exception as e:
+                print(f"Error in table {spec['table']} with row {row}")
+                print(e)
+                break
+        conn.commit()
+
+
+# ---------------------------------------------------------------------- #
+#  Bulk modes                                                              #
+# ---------------------------------------------------------------------- #
+
+class RejectLog:
+    """Appends rejected rows, with the error, to ``<dir>/<table>.rejects.csv``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.counts = {}
+        self._files = {}
 
-with open('database_setup/seeder_csvs/prescriptions.csv','r') as file:
-    csvreader = csv.reader(file)
+    def add(self, table, row, error):
+        if table not in self._files:
+            os.makedirs(self.directory, exist_ok=True)
+            f = open(os.path.join(self.directory, f"{table}.rejects.csv"), 'w', newline='')
+            self._files[table] = (f, csv.writer(f, lineterminator='\n'))
+        self._files[table][1].writerow(list(row) + [str(error)])
+        self.counts[table] = self.counts.get(table, 0) + 1
 
-    next(csvreader)
+    def close(self):
+        for f, _ in self._files.values():
+            f.close()
+        self._files = {}
 
-    for row in csvreader:
+
+def secondary_indexes(c, table):
+    """Non-unique secondary indexes of *table* as ``{name: [column_sql, ...]}``."""
+    c.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME, SUB_PART
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+          AND INDEX_NAME <> 'PRIMARY' AND NON_UNIQUE = 1
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX;
+    """, (table,))
+    indexes = {}
+    for name, column, sub_part in c.fetchall():
+        indexes.setdefault(name, []).append(f"`{column}`({sub_part})" if sub_part else f"`{column}`")
+    return indexes
+
+
+def drop_secondary_indexes(c, table):
+    """Drop what can be dropped; indexes a foreign key relies on stay. Returns the dropped ones."""
+    dropped = {}
+    for name, columns in secondary_indexes(c, table).items():
         try:
-            c.execute("INSERT INTO prescriptions (barcode, dose, time,leeway,as_needed,frequency) VALUES (%s,%s,%s,%s,%s,%s)",(row[1],int(row[2]),row[3] if row[3] else None, bool(row[4]),row[5] if row[5] else None,row[6] if row[6] else None,))
-        except Exception as e:
-            print(row[1],int(row[2]),row[3] if row[3] else None, bool(row[4]),row[5] if row[5] else None)
-            print(e)
-            break
-    conn.commit()
+            c.execute(f"ALTER TABLE `{table}` DROP INDEX `{name}`")
+            dropped[name] = columns
+        except mysql.connector.Error:
+            pass    # needed by a foreign key constraint
+    return dropped
+
 
-with open('database_setup/seeder_csvs/people.csv','r') as file:
-    csvreader = csv.reader(file)
+def _rebuild_sql(table, indexes):
+    return f"ALTER TABLE `{table}` " + ", ".join(
+        f"ADD INDEX `{name}` ({', '.join(columns)})" for name, columns in indexes.items())
 
-    next(csvreader)
 
-    for row in csvreader:
+def rebuild_indexes(c, table, indexes):
+    """Re-create *indexes* (from ``drop_secondary_indexes``) in one ALTER TABLE."""
+    if indexes:
+        c.execute(_rebuild_sql(table, indexes))
+
+
+def _insert_batch(c, conn, spec, sql, batch, rejects):
+    """executemany one batch; on failure retry its rows one by one. Returns rows inserted."""
+    params, raw = [], []
+    for row in batch:
         try:
-            c.execute("INSERT INTO people (name) VALUES (%s)",row[1::])
+            params.append(spec['convert'](row))
+            raw.append(row)
         except Exception as e:
-            print(f"Error in table people with row {row}")
-            print(e)
-            break
+            rejects.add(spec['table'], row, e)
+    if not params:
+        return 0
+    try:
+        c.executemany(sql, params)
+        conn.commit()
+        return len(params)
+    except mysql.connector.Error:
+        conn.rollback()
+    inserted = 0
+    for row, values in zip(raw, params):
+        try:
+            c.execute(sql, values)
+            inserted += 1
+        except mysql.connector.Error as e:
+            rejects.add(spec['table'], row, e)
     conn.commit()
+    return inserted
 
-with open('database_setup/seeder_csvs/assigned_prescriptions.csv','r') as file:
-    csvreader = csv.reader(file)
 
-    next(csvreader)
+def _load_batches(c, conn, spec, path, rejects, batch_size):
+    sql = _insert_sql(spec)
+    inserted, batch = 0, []
+    for row in _read_rows(path):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            inserted += _insert_batch(c, conn, spec, sql, batch, rejects)
+            batch = []
+    if batch:
+        inserted += _insert_batch(c, conn, spec, sql, batch, rejects)
+    return inserted
 
-    for row in csvreader:
-        try:
-            c.execute("INSERT INTO assigned_prescriptions (person_id,prescription_id) VALUES (%s,%s)",row)
-        except Exception as e:
-            print(f"Error in table assigned_prescriptions with row {row}")
-            print(e)
-            break
+
+_WARNING_ROW = re.compile(r'\brow (\d+)', re.IGNORECASE)
+
+
+def _log_load_warnings(spec, path, warnings, rejects):
+    """Log the CSV rows LOAD DATA warned about (warnings name a data row, 1 = first after the header)."""
+    by_row = {}
+    for level, code, message in warnings:
+        match = _WARNING_ROW.search(message)
+        if match:
+            by_row.setdefault(int(match.group(1)), []).append(f"{level} {code}: {message}")
+        else:
+            rejects.add(spec['table'], [], f"{level} {code}: {message}")
+    if by_row:
+        for number, row in enumerate(_read_rows(path), 1):
+            if number in by_row:
+                rejects.add(spec['table'], row, f"line {number + 1}: " + "; ".join(by_row.pop(number)))
+                if not by_row:
+                    break
+
+
+def _load_data_infile(c, conn, spec, path, rejects):
+    """LOAD DATA LOCAL INFILE one CSV; rows the server warns about are logged from SHOW WARNINGS.
+
+    The server keeps at most ``max_error_count`` warnings; when there were
+    more, the shortfall is reported so the file can be re-run with ``--bulk``,
+    which logs every rejected row.
+    """
+    with open(path, 'rb') as f:
+        terminator = '\\r\\n' if f.readline().endswith(b'\r\n') else '\\n'
+    c.execute(f"""
+        LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE `{spec['table']}`
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '{terminator}'
+        IGNORE 1 LINES
+        {spec['load_data']}
+    """, (os.path.abspath(path),))
+    inserted = c.rowcount
+    c.execute("SHOW COUNT(*) WARNINGS")     # unlike SELECT @@warning_count, keeps the list
+    total = c.fetchone()[0]
+    c.execute("SHOW WARNINGS")
+    warnings = c.fetchall()
     conn.commit()
+    _log_load_warnings(spec, path, warnings, rejects)
+    if total > len(warnings):
+        print(f"  {spec['table']}: {total:,} warnings but only {len(warnings):,} kept by the server "
+              f"(max_error_count); re-run this file with --bulk to log every rejected row")
+    return inserted
+
 
+def seed_bulk(conn, csv_dir, rejects, load_data=False, batch_size=BATCH_SIZE):
+    """Load every table with checks relaxed and large tables' secondary indexes dropped."""
+    c = conn.cursor()
+    c.execute("SET SESSION unique_checks = 0")
+    c.execute("SET SESSION foreign_key_checks = 0")
+    try:
+        for spec in TABLES:
+            table = spec['table']
+            path = os.path.join(csv_dir, f"{table}.csv")
+            large = os.path.getsize(path) >= INDEX_REBUILD_MIN_BYTES
+            dropped = drop_secondary_indexes(c, table) if large else {}
 
-with open('database_setup/seeder_csvs/history.csv','r') as file:
-    csvreader = csv.reader(file)
+            start = time.perf_counter()
+            try:
+                if load_data:
+                    inserted = _load_data_infile(c, conn, spec, path, rejects)
+                else:
+                    inserted = _load_batches(c, conn, spec, path, rejects, batch_size)
+            finally:
+                # A failed load must not leave the table without its indexes
+                elapsed = time.perf_counter() - start
+                if dropped:
+                    index_start = time.perf_counter()
+                    try:
+                        rebuild_indexes(c, table, dropped)
+                    except mysql.connector.Error:
+                        print(f"Could not rebuild the indexes on {table}; re-create them with:\n"
+                              f"  {_rebuild_sql(table, dropped)};")
+                        raise
+                    print(f"  rebuilt {len(dropped)} index(es) on {table} in {time.perf_counter() - index_start:.1f}s")
+            rate = inserted / elapsed if elapsed > 0 else float('inf')
+            print(f"{table}: {inserted:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s), "
+                  f"{rejects.counts.get(table, 0)} rejected")
+    finally:
+        c.execute("SET SESSION foreign_key_checks = 1")
+        c.execute("SET SESSION unique_checks = 1")
 
-    next(csvreader)
 
-    for row in csvreader:
+def main():
+    parser = argparse.ArgumentParser(description="Seed the inventory database from CSV files.")
+    parser.add_argument('csv_dir', nargs='?', default=CSV_DIR,
+                        help="directory with the six table CSVs (default: seeder_csvs/)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--bulk', action='store_true', help="executemany batches with index rebuilds")
+    mode.add_argument('--load-data', action='store_true', help="LOAD DATA LOCAL INFILE with index rebuilds")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--rejects', default=REJECTS_DIR, help="directory for rejected rows (bulk modes)")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host="localhost",
+        user="root",
+        password="1234",
+        database="inventory_system",
+        allow_local_infile=args.load_data,
+    )
+
+    start = time.perf_counter()
+    if args.bulk or args.load_data:
+        rejects = RejectLog(args.rejects)
         try:
-            c.execute("INSERT INTO history (barcode,inventory_id,person_id,type_of_use,time_of_use,amnt_change,reason) VALUES (%s,%s,%s,%s,%s,%s,%s)",(row[1],int(row[2]),int(row[3]),row[4],row[5],int(row[6]),row[7] if row[7] else None,))
-        except Exception as e:
-            print(f"Error in table history with row {row}")
-            print(e)
-            break
-    
-conn.commit()
-conn.close()
\ No newline at end of file
+            seed_bulk(conn, args.csv_dir, rejects, load_data=args.load_data, batch_size=args.batch_size)
+        finally:
+            rejects.close()
+        if rejects.counts:
+            print(f"Rejected rows written to {args.rejects}")
+    else:
+        seed_rows(conn, args.csv_dir)
+    conn.close()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    # Seeded history bypasses DatabaseManager, so rebuild the daily rollup from it
+    DatabaseManager().rebuild_daily_rollup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Synthetic workload generator for scale-testing the inventory database.
+
+Produces the same tables (and CSV layout) as ``seeder_csvs/`` at any size:
+configurable people, SKUs and days of history, Poisson per-person daily
+usage, Zipf-skewed SKU popularity and a diurnal time-of-day profile.
+History is generated one day at a time, so 10M+ rows stream to disk (or
+into MySQL) without being held in memory.  A fixed ``--seed`` always
+produces identical data, which keeps benchmark runs comparable.
+
+    python3 database_setup/workload.py --users 200 --skus 2000 --days 730 --rate 70
+    python3 database_setup/workload.py --rows 10000000 --out /tmp/workload_csvs
+    python3 database_setup/seeder.py /tmp/workload_csvs --bulk
+"""
+
+import argparse
+import csv
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+
+SETUP_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_CSV_DIR = os.path.join(SETUP_DIR, 'seeder_csvs')
+DEFAULT_OUT_DIR = os.path.join(SETUP_DIR, 'workload_csvs')
+
+# Relative kiosk traffic per hour of day: morning and evening medication peaks
+DIURNAL_PROFILE = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.6, 2.0, 3.0, 2.5, 1.5, 1.2, 1.2,
+    1.5, 1.2, 1.0, 1.0, 1.1, 1.5, 2.5, 2.8, 2.0, 1.4, 0.8, 0.4,
+])
+
+# Column headers of the seeder CSVs (the seeder skips the header row)
+CSV_HEADERS = {
+    'medications': ['barcode', 'name', 'amount_in_unit', 'type', 'dosage', 'expiration_date'],
+    'in_inventory': ['id', 'barcode', 'estimated_amount_remaining', 'expiration_date', 'location'],
+    'people': ['id', 'name'],
+    'prescriptions': ['id', 'barcode', 'dose', 'time', 'leeway', 'as_needed', 'frequency'],
+    'assigned_prescriptions': ['person_id', 'prescription_id'],
+    'history': ['id', 'barcode', 'inventory_id', 'person_id', 'type_of_use', 'time_of_use', 'change', 'reason'],
+}
+
+# Names the app and its defaults refer to (admin for deletions; pattern_recognition users)
+FIXED_PEOPLE = ['dylan', 'lucca', 'brody', 'admin']
+
+
+class WorkloadConfig:
+    """Shape of one synthetic dataset.
+
+    Parameters
+    ----------
+    users : int
+        People, including ``FIXED_PEOPLE``.
+    skus : int
+        Medications, each with one inventory row.
+    days : int
+        Days of history, ending yesterday (relative to *end*).
+    rate : float
+        Mean uses per person per day (Poisson).
+    sku_skew : float
+        Zipf exponent of SKU popularity; 0 picks SKUs uniformly.
+    diurnal : bool
+        Draw times of day from ``DIURNAL_PROFILE`` instead of uniformly.
+    restock_fraction : float
+        Share of history rows that are restocks (positive changes).
+    prescriptions_per_user : int
+        Prescriptions assigned to each person.
+    seed : int
+        Random seed; the same config always yields the same rows.
+    end : date or None
+        Day after the last day of history (default: today).
+    """
+
+    def __init__(self, users=20, skus=200, days=365, rate=4.0, sku_skew=1.1, diurnal=True,
+                 restock_fraction=0.02, prescriptions_per_user=3, seed=0, end=None):
+        self.users = max(int(users), len(FIXED_PEOPLE))
+        self.skus = int(skus)
+        self.days = int(days)
+        self.rate = float(rate)
+        self.sku_skew = float(sku_skew)
+        self.diurnal = bool(diurnal)
+        self.restock_fraction = float(restock_fraction)
+        self.prescriptions_per_user = int(prescriptions_per_user)
+        self.seed = int(seed)
+        self.end = end or date.today()
+
+    @classmethod
+    def for_rows(cls, rows, **kwargs):
+        """A config whose expected history size is *rows*, by scaling ``rate``."""
+        config = cls(**kwargs)
+        config.rate = rows / (config.users * config.days)
+        return config
+
+    @property
+    def expected_rows(self):
+        return int(self.users * self.days * self.rate)
+
+    def to_dict(self):
+        return {
+            'users': self.users, 'skus': self.skus, 'days': self.days, 'rate': self.rate,
+            'sku_skew': self.sku_skew, 'diurnal': self.diurnal,
+            'restock_fraction': self.restock_fraction,
+            'prescriptions_per_user': self.prescriptions_per_user,
+            'seed': self.seed, 'end': self.end.isoformat(),
+        }
+
+
+# ---------------------------------------------------------------------- #
+#  Reference tables                                                        #
+# ---------------------------------------------------------------------- #
+
+def _sample_medications():
+    """(name, type, dosage) triples from the bundled sample medications."""
+    with open(os.path.join(SAMPLE_CSV_DIR, 'medications.csv'), newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [(row[1], row[3], row[4]) for row in reader]
+
+
+def reference_tables(config):
+    """Every table except history, as ``{table: [row, ...]}`` in seeder CSV layout."""
+    rng = np.random.default_rng(config.seed)
+    pool = _sample_medications()
+
+    medications, inventory = [], []
+    for i in range(config.skus):
+        name, kind, dosage = pool[i % len(pool)]
+        if i >= len(pool):
+            name = f"{name} {i // len(pool) + 1}"       # names stay unique
+        barcode = f"{800000000000 + i:012d}"
+        amount = int(rng.integers(30, 200))
+        expires = (config.end + timedelta(days=int(rng.integers(-30, 720)))).isoformat()
+        medications.append([barcode, name, amount, kind, dosage, expires])
+        inventory.append([i + 1, barcode, amount, expires, f"{i // 20 + 1}{'abcdefghij'[i % 10]}"])
+
+    people = [[i + 1, name] for i, name in enumerate(FIXED_PEOPLE)]
+    people += [[i + 1, f"user{i + 1:05d}"] for i in range(len(FIXED_PEOPLE), config.users)]
+
+    prescriptions, assigned = [], []
+    for person_id, _ in people:
+        for sku in rng.choice(config.skus, size=min(config.prescriptions_per_user, config.skus),
+                              replace=False):
+            as_needed = bool(rng.random() < 0.3)
+            prescription_id = len(prescriptions) + 1
+            prescriptions.append([
+                prescription_id, medications[sku][0], int(rng.integers(1, 3)),
+                '' if as_needed else f"{int(rng.integers(6, 22))}:00:00",
+                '' if as_needed else int(rng.choice([15, 30, 60, 120])),
+                1 if as_needed else 0,
+                '' if as_needed else int(rng.choice([1, 1, 1, 2, 7])),
+            ])
+            assigned.append([person_id, prescription_id])
+
+    return {
+        'medications': medications,
+        'in_inventory': inventory,
+        'people': people,
+        'prescriptions': prescriptions,
+        'assigned_prescriptions': assigned,
+    }
+
+
+# ---------------------------------------------------------------------- #
+#  History                                                                 #
+# ---------------------------------------------------------------------- #
+
+def _sku_weights(config):
+    ranks = np.arange(1, config.skus + 1, dtype=np.float64)
+    weights = ranks ** -config.sku_skew if config.sku_skew > 0 else np.ones(config.skus)
+    return weights / weights.sum()
+
+
+def iter_history(config, tables=None):
+    """Yield history one day at a time as lists of seeder-layout rows.
+
+    Row ids are consecutive from 1 across chunks.  *tables* (from
+    ``reference_tables``) supplies barcodes; it is built when omitted.
+    """
+    tables = tables or reference_tables(config)
+    barcodes = np.array([m[0] for m in tables['medications']])
+    units = np.array([m[2] for m in tables['medications']])
+    rng = np.random.default_rng(config.seed + 1)
+    sku_p = _sku_weights(config)
+    # Popularity follows a random SKU order, not barcode order
+    sku_order = rng.permutation(config.skus)
+    hour_p = DIURNAL_PROFILE / DIURNAL_PROFILE.sum() if config.diurnal else None
+
+    next_id = 1
+    first_day = config.end - timedelta(days=config.days)
+    for d in range(config.days):
+        per_person = rng.poisson(config.rate, size=config.users)
+        n = int(per_person.sum())
+        if not n:
+            continue
+        person = np.repeat(np.arange(1, config.users + 1), per_person)
+        sku = sku_order[rng.choice(config.skus, size=n, p=sku_p)]
+        hours = rng.choice(24, size=n, p=hour_p)
+        seconds = hours * 3600 + rng.integers(0, 3600, size=n)
+        order = np.argsort(seconds, kind='stable')      # history ids follow time
+        person, sku, seconds = person[order], sku[order], seconds[order]
+        day = np.datetime64(first_day + timedelta(days=d))
+        stamps = np.datetime_as_string(day + seconds.astype('timedelta64[s]'), unit='s')
+
+        restock = rng.random(n) < config.restock_fraction
+        change = np.where(restock, units[sku], -rng.integers(1, 3, size=n))
+        ids = range(next_id, next_id + n)
+        next_id += n
+        yield [
+            [i, barcodes[s], int(s) + 1, int(p), 'Access', t.replace('T', ' '), int(c), '']
+            for i, s, p, t, c in zip(ids, sku, person, stamps, change)
+        ]
+
+
+# ---------------------------------------------------------------------- #
+#  Output                                                                  #
+# ---------------------------------------------------------------------- #
+
+def write_csvs(config, out_dir=DEFAULT_OUT_DIR, progress=True):
+    """Write all six tables as seeder CSVs into *out_dir*; returns the history row count."""
+    os.makedirs(out_dir, exist_ok=True)
+    tables = reference_tables(config)
+    for table, rows in tables.items():
+        with open(os.path.join(out_dir, f'{table}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(CSV_HEADERS[table])
+            writer.writerows(rows)
+
+    written = 0
+    start = time.perf_counter()
+    with open(os.path.join(out_dir, 'history.csv'), 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(CSV_HEADERS['history'])
+        for chunk in iter_history(config, tables):
+            writer.writerows(chunk)
+            written += len(chunk)
+            if progress and written // 1_000_000 != (written - len(chunk)) // 1_000_000:
+                print(f"  {written:,} history rows ({written / (time.perf_counter() - start):,.0f} rows/s)")
+    return written
+
+
+_INSERTS = {
+    'medications': "INSERT INTO medications (barcode, name, amount_in_unit, type, dosage, expiration_date) "
+                   "VALUES (%s,%s,%s,%s,%s,%s)",
+    'in_inventory': "INSERT INTO in_inventory (id, barcode, estimated_amount_remaining, location) "
+                    "VALUES (%s,%s,%s,%s)",
+    'people': "INSERT INTO people (id, name) VALUES (%s,%s)",
+    'prescriptions': "INSERT INTO prescriptions (id, barcode, dose, time, leeway, as_needed, frequency) "
+                     "VALUES (%s,%s,%s,%s,%s,%s,%s)",
+    'assigned_prescriptions': "INSERT INTO assigned_prescriptions (person_id, prescription_id) VALUES (%s,%s)",
+    'history': "INSERT INTO history (id, barcode, inventory_id, person_id, type_of_use, time_of_use, "
+               "amnt_change, reason) VALUES (%s,%s,%s,%s,%s,%s,%s,%s)",
+}
+
+
+def _db_row(table, row):
+    """Seeder-CSV row -> INSERT parameters ('' becomes NULL)."""
+    if table == 'in_inventory':
+        row = [row[0], row[1], row[2], row[4]]
+    return [None if v == '' else v for v in row]
+
+
+def load(config, conn, batch_size=5000):
+    """Insert the workload straight into the (empty) schema behind *conn*.
+
+    Rows go in with ``executemany`` batches, committing per batch.
+    Returns the number of history rows inserted.
+    """
+    c = conn.cursor()
+    tables = reference_tables(config)
+    for table, rows in tables.items():
+        for i in range(0, len(rows), batch_size):
+            c.executemany(_INSERTS[table], [_db_row(table, r) for r in rows[i:i + batch_size]])
+        conn.commit()
+
+    inserted = 0
+    pending = []
+    for chunk in iter_history(config, tables):
+        pending.extend(_db_row('history', r) for r in chunk)
+        while len(pending) >= batch_size:
+            c.executemany(_INSERTS['history'], pending[:batch_size])
+            conn.commit()
+            inserted += batch_size
+            del pending[:batch_size]
+    if pending:
+        c.executemany(_INSERTS['history'], pending)
+        conn.commit()
+        inserted += len(pending)
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic inventory workload as seeder CSVs.")
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--skus', type=int, default=200)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--rate', type=float, default=4.0, help="mean uses per person per day")
+    parser.add_argument('--rows', type=int, help="target history rows (overrides --rate)")
+    parser.add_argument('--sku-skew', type=float, default=1.1, help="Zipf exponent; 0 = uniform")
+    parser.add_argument('--uniform-hours', action='store_true', help="no diurnal time-of-day profile")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=DEFAULT_OUT_DIR, help="output directory for the CSVs")
+    args = parser.parse_args()
+
+    kwargs = dict(users=args.users, skus=args.skus, days=args.days, rate=args.rate,
+                  sku_skew=args.sku_skew, diurnal=not args.uniform_hours, seed=args.seed)
+    config = WorkloadConfig.for_rows(args.rows, **kwargs) if args.rows else WorkloadConfig(**kwargs)
+
+    print(f"Generating ~{config.expected_rows:,} history rows into {args.out}")
+    start = time.perf_counter()
+    written = write_csvs(config, args.out)
+    print(f"Wrote {written:,} history rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,404 @@ Provides DatabaseManager (inventory-wide) and PersonalDatabaseManager
 (per-user prescriptions / history).  All MySQL access flows through here.
 """
 
+import queue
+import threading
+import time
+
 import mysql.connector
+from mysql.connector import errorcode
 from datetime import datetime, timedelta
 import numpy as np
 
 
 time_format = "%Y-%m-%d %H:%M:%S"
 
+POOL_SIZE = 4
+"""int: Maximum number of connections checked out of one pool at a time."""
+
+POOL_TIMEOUT = 10
+"""int: Seconds to wait for a free pooled connection before giving up."""
+
+POOL_PING_AFTER = 30
+"""int: Seconds a connection may sit idle before it is health-checked on checkout."""
+
+IDENTITY_TTL = 300
+"""int: Seconds a cached person id or medication name/barcode pair stays valid."""
+
+CHANGE_OVERLAP = 64
+"""int: History ids below the cursor that ``pull_inventory_changes`` re-reads on every poll."""
+
+
+# ---------------------------------------------------------------------- #
+#  Connection pool – shared by DatabaseManager / PersonalDatabaseManager   #
+# ---------------------------------------------------------------------- #
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections.
+
+    Connections are handed out wrapped in a ``PooledConnection`` whose
+    ``close()`` returns them to the pool instead of tearing down the TCP
+    session, so existing ``conn.close()`` call sites keep working.
+    Idle connections older than ``ping_after`` seconds are pinged before
+    reuse and transparently replaced if the server has dropped them.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 ping_after=POOL_PING_AFTER, **connect_kwargs):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._connect_kwargs = connect_kwargs
+        self._idle = queue.LifoQueue()    # (raw connection, last-used monotonic time)
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "reconnects": 0,
+            "in_use": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def _connect(self):
+        """Open a brand-new raw connection and count it."""
+        raw = mysql.connector.connect(**self._connect_kwargs)
+        with self._lock:
+            self._stats["created"] += 1
+        return raw
+
+    def _revive(self, raw):
+        """Health-check an idle connection; reconnect if it has gone stale."""
+        try:
+            raw.ping(reconnect=False)
+            return raw
+        except mysql.connector.Error:
+            with self._lock:
+                self._stats["reconnects"] += 1
+            try:
+                raw.close()
+            except Exception:
+                pass
+            return self._connect()
+
+    def acquire(self):
+        """Check a connection out of the pool, blocking up to ``timeout`` seconds.
+
+        Raises:
+            mysql.connector.errors.PoolError: If no connection frees up in time.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise mysql.connector.errors.PoolError(
+                f"No free database connection after {self.timeout}s"
+            )
+        waited = time.perf_counter() - start
+
+        try:
+            try:
+                raw, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                raw = self._connect()
+            else:
+                if time.monotonic() - last_used > self.ping_after:
+                    raw = self._revive(raw)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return *raw* to the pool, discarding it if it is no longer usable."""
+        try:
+            if raw.is_connected():
+                # End any implicit transaction so the next user sees fresh data
+                if raw.in_transaction:
+                    raw.rollback()
+                self._idle.put((raw, time.monotonic()))
+            else:
+                raw.close()
+        except Exception:
+            try:
+                raw.close()
+            except Exception:
+                pass
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Return a snapshot of checkout / wait / reconnect counters."""
+        with self._lock:
+            snap = dict(self._stats)
+        snap["idle"] = self._idle.qsize()
+        snap["size"] = self.size
+        snap["wait_avg"] = snap["wait_total"] / snap["checkouts"] if snap["checkouts"] else 0.0
+        return snap
+
+
+class PooledConnection:
+    """Thin proxy around a raw connection; ``close()`` hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise mysql.connector.errors.OperationalError("Connection already returned to pool")
+        return getattr(raw, name)
+
+    def close(self):
+        """Return the connection to its pool (idempotent)."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def __del__(self):
+        # Safety net for code paths that raise before reaching conn.close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host, user, password, database):
+    """Return the process-wide pool for these credentials, creating it on first use."""
+    key = (host, user, password, database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(host=host, user=user, password=password, database=database)
+            _pools[key] = pool
+    return pool
+
+
+def pool_stats():
+    """Return ``{database: stats}`` for every pool created in this process."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {key[3]: pool.stats() for key, pool in pools}
+
+
+# ---------------------------------------------------------------------- #
+#  Identity cache – people / medication lookups shared by both managers    #
+# ---------------------------------------------------------------------- #
+
+class IdentityCache:
+    """Thread-safe identity map: person name -> id and medication name <-> barcode.
+
+    Lookups run on the caller's cursor only on a miss, so a warm write path
+    skips its ``SELECT id FROM people`` / ``SELECT barcode FROM medications``
+    round trips.  Entries expire after ``ttl`` seconds (covering rows changed
+    by other kiosks or the seeder); writes made through the managers
+    invalidate the affected entries immediately.
+    """
+
+    def __init__(self, ttl=IDENTITY_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._people = {}       # name -> (id, expires)
+        self._barcodes = {}     # medication name -> (barcode, expires)
+        self._names = {}        # barcode -> (medication name, expires)
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, table, key):
+        with self._lock:
+            entry = table.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            table.pop(key, None)
+            self.misses += 1
+            return None
+
+    def _put(self, table, key, value):
+        with self._lock:
+            table[key] = (value, time.monotonic() + self.ttl)
+
+    def person_id(self, c, name):
+        """Return the id of person *name*, querying with cursor *c* on a miss.
+
+        Raises:
+            LookupError: If no person has that name.
+        """
+        pid = self._get(self._people, name)
+        if pid is None:
+            c.execute("SELECT id FROM people WHERE name = %s", (name,))
+            row = c.fetchone()
+            if row is None:
+                raise LookupError(f"No person named {name!r}")
+            pid = row[0]
+            self._put(self._people, name, pid)
+        return pid
+
+    def person_ids(self, c, names):
+        """``{name: id}`` for the *names* that exist, with one query for all misses."""
+        found, missing = {}, []
+        for name in names:
+            pid = self._get(self._people, name)
+            if pid is None:
+                missing.append(name)
+            else:
+                found[name] = pid
+        if missing:
+            placeholders = ",".join(["%s"] * len(missing))
+            c.execute(f"SELECT id, name FROM people WHERE name IN ({placeholders})", tuple(missing))
+            by_name = {name: pid for pid, name in c.fetchall()}
+            for name in missing:
+                if name in by_name:
+                    found[name] = by_name[name]
+                    self._put(self._people, name, by_name[name])
+        return found
+
+    def medication_barcode(self, c, name):
+        """Return the barcode of the medication called *name*, querying on a miss.
+
+        Raises:
+            LookupError: If no medication has that name.
+        """
+        barcode = self._get(self._barcodes, name)
+        if barcode is None:
+            c.execute("SELECT barcode FROM medications WHERE name = %s", (name,))
+            row = c.fetchone()
+            if row is None:
+                raise LookupError(f"No medication named {name!r}")
+            barcode = row[0]
+            self._put(self._barcodes, name, barcode)
+            self._put(self._names, barcode, name)
+        return barcode
+
+    def medication_name(self, c, barcode):
+        """Return the name of the medication with *barcode* (None if unknown)."""
+        name = self._get(self._names, barcode)
+        if name is None:
+            c.execute("SELECT name FROM medications WHERE barcode = %s", (barcode,))
+            row = c.fetchone()
+            if row is None:
+                return None
+            name = row[0]
+            self._put(self._names, barcode, name)
+            self._put(self._barcodes, name, barcode)
+        return name
+
+    def invalidate_person(self, name=None):
+        """Forget person *name* (or every person)."""
+        with self._lock:
+            if name is None:
+                self._people.clear()
+            else:
+                self._people.pop(name, None)
+
+    def invalidate_medication(self, barcode=None, name=None):
+        """Forget a medication by *barcode* and/or *name* (or every medication when both are None)."""
+        with self._lock:
+            if barcode is None and name is None:
+                self._barcodes.clear()
+                self._names.clear()
+                return
+            if barcode is not None:
+                old = self._names.pop(barcode, None)
+                if old is not None:
+                    self._barcodes.pop(old[0], None)
+            if name is not None:
+                old = self._barcodes.pop(name, None)
+                if old is not None:
+                    self._names.pop(old[0], None)
+
+    def clear(self):
+        self.invalidate_person()
+        self.invalidate_medication()
+
+    def stats(self):
+        """Return hit / miss counters and current entry counts."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "people": len(self._people),
+                "medications": len(self._barcodes),
+            }
+
+
+_identity_caches = {}
+_identity_lock = threading.Lock()
+
+
+def get_identity_cache(database):
+    """Return the process-wide ``IdentityCache`` for *database*, creating it on first use."""
+    with _identity_lock:
+        cache = _identity_caches.get(database)
+        if cache is None:
+            cache = _identity_caches[database] = IdentityCache()
+    return cache
+
+
+def clear_identity_caches():
+    """Drop every cached identity (e.g. after re-seeding a database)."""
+    with _identity_lock:
+        caches = list(_identity_caches.values())
+    for cache in caches:
+        cache.clear()
+
+
+def _rolling_anomalies(values, labels, baseline_window, z_thresh, ratio_thresh):
+    """Score every bucket of every series against its trailing baseline.
+
+    *values* is a 2-D array (one row per series); bucket ``i`` is compared
+    with buckets ``i - baseline_window .. i - 1`` of the same row.
+    """
+    n_buckets = values.shape[1]
+    if baseline_window <= 0 or n_buckets <= baseline_window:
+        return []
+
+    windows = np.lib.stride_tricks.sliding_window_view(values, baseline_window, axis=1)[:, :-1]
+    current = values[:, baseline_window:]
+    mean = windows.mean(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = windows.std(axis=2, ddof=1)
+    std[std == 0] = 1                                       # prevent divide-by-zero
+    z = (current - mean) / std
+    ratio = np.divide(current, mean, out=np.zeros_like(current), where=mean > 0)
+
+    flagged = (np.abs(z) > z_thresh) | (ratio > ratio_thresh)
+    anomalies = []
+    for row, col in zip(*np.nonzero(flagged)):
+        anomalies.append({
+            "label": labels[row],
+            "index": int(col + baseline_window),
+            "value": float(current[row, col]),
+            "baseline_mean": round(float(mean[row, col]), 2),
+            "z_score": round(float(z[row, col]), 2),
+            "ratio": round(float(ratio[row, col]), 2),
+            "type": "spike" if current[row, col] > mean[row, col] else "drop",
+        })
+    return anomalies
+
+
+def format_anomalies(anomalies):
+    """Render ``pattern_recognition`` results as one readable line per anomaly."""
+    if not anomalies:
+        return "No anomalies detected."
+    return "\n".join(
+        f"{a['label']} [{a['index']}] {a['type']}: value {a['value']:g}, "
+        f"mean {a['baseline_mean']:g}, z {a['z_score']:g}, ratio {a['ratio']:g}"
+        for a in anomalies
+    )
+
 
 class DatabaseManager:
     def __init__(self):
@@ -23,13 +414,16 @@ class DatabaseManager:
     #  Helper – single place that builds a connection                      #
     # ------------------------------------------------------------------ #
     def _get_connection(self):
-        """Return a new MySQL connection using instance credentials."""
-        return mysql.connector.connect(
-            host="localhost",
-            user=self.user,
-            password=self.password,
-            database=self.database,
-        )
+        """Check out a pooled MySQL connection using instance credentials.
+
+        ``close()`` on the returned object hands it back to the shared pool.
+        """
+        return get_pool("localhost", self.user, self.password, self.database).acquire()
+
+    @property
+    def identities(self):
+        """The shared ``IdentityCache`` for this database."""
+        return get_identity_cache(self.database)
 
     """
     def create_inventory(self):
@@ -128,10 +522,11 @@ class DatabaseManager:
 
         c.execute("SELECT MAX(id) FROM in_inventory;")
         iid = c.fetchone()[0]
-        c.execute("SELECT id FROM people WHERE name = %s", (user,))
-        pid = c.fetchone()[0]
+        pid = self.identities.person_id(c, user)
+        now = datetime.now()
         c.execute("INSERT INTO history (barcode, inventory_id, person_id, type_of_use, time_of_use) VALUES (%s,%s,%s,%s,%s)",
-                  (barcode, iid, pid, 'New Entry', datetime.now().strftime(time_format),)) 
+                  (barcode, iid, pid, 'New Entry', now.strftime(time_format),)) 
+        self._roll_up(c, now, pid, barcode, 0)
 
         conn.commit()
         conn.close()
@@ -162,43 +557,78 @@ class DatabaseManager:
 
         conn.commit()
         conn.close()
+        self.identities.invalidate_medication(barcode=barcode, name=name)
 
 
     def log_access_to_inventory(self, barcode, change, user):
         """
         Log changes to drug inventory amounts.
 
+        The change is applied by the ``log_usage`` stored procedure (migration
+        0003): one round trip that adjusts the amount in SQL and writes the
+        history and rollup rows in the same transaction, so concurrent kiosks
+        cannot overwrite each other's updates.  Databases not yet migrated
+        fall back to the same statements issued one by one.
+
 
         Parameters:
-            barcode (str): The barcode of the drug whose inventory is being updated.
+            barcode (str): The name of the drug whose inventory is being updated.
             change (int): The amount to change the inventory by (positive or negative).
             user (str): The user making the change.
 
 
-        Side effects:
-            Updates the estimated amount of the drug in the inventory and logs the change in the drug_changes table.
-        """
-        conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("SELECT id FROM people WHERE name = %s", (user.lower(),))
-        uid = c.fetchone()[0]
+        Returns:
+            tuple: (amount_remaining, history_id) – the estimated amount left
+            after the change and the id of the history row that records it.
 
-        c.execute("SELECT barcode FROM medications WHERE name = %s", (barcode,))
-        barcode = c.fetchone()[0]
 
-        c.execute("SELECT id, estimated_amount_remaining FROM in_inventory WHERE barcode = %s", (barcode,))
-        drug_info = c.fetchone()
+        Raises:
+            LookupError: If the user or drug is unknown, or the drug is not in inventory.
+        """
+        conn = self._get_connection()
         try:
-            c.execute("UPDATE in_inventory SET estimated_amount_remaining = %s WHERE barcode = %s",
-                      (drug_info[1] + change, barcode))
-            c.execute("INSERT INTO history (barcode, inventory_id, person_id, type_of_use, time_of_use, amnt_change) VALUES (%s,%s,%s,%s,%s,%s)",
-                      (barcode, drug_info[0], uid, 'Access', datetime.now().strftime(time_format), change))
-        except Exception as e:
-            print("Error:", e)
-        
-        conn.commit()
-        conn.close()
-  
+            c = conn.cursor()
+            uid = self.identities.person_id(c, user.lower())
+            barcode = self.identities.medication_barcode(c, barcode)
+            now = datetime.now().replace(microsecond=0)
+            try:
+                # A plain CALL is one round trip (callproc adds SET / SELECT
+                # statements for the arguments); the procedure commits itself.
+                # Reading its results with nextset() needs mysql-connector 9.2+.
+                c.execute("CALL log_usage(%s, %s, %s, %s)", (barcode, uid, change, now))
+                amount, history_id = c.fetchall()[0]
+                while c.nextset():      # the CALL's trailing status result
+                    pass
+            except mysql.connector.Error as e:
+                if e.errno == errorcode.ER_SIGNAL_EXCEPTION:
+                    raise LookupError(f"{barcode} is not in inventory") from e
+                if e.errno != errorcode.ER_SP_DOES_NOT_EXIST:
+                    raise
+                amount, history_id = self._log_usage_inline(c, barcode, uid, change, now)
+                conn.commit()
+            return amount, history_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @classmethod
+    def _log_usage_inline(cls, c, barcode, person_id, change, when):
+        """``log_usage`` without the stored procedure; the caller commits."""
+        c.execute("SELECT id FROM in_inventory WHERE barcode = %s ORDER BY id LIMIT 1 FOR UPDATE;", (barcode,))
+        row = c.fetchone()
+        if row is None:
+            raise LookupError(f"{barcode} is not in inventory")
+        c.execute("UPDATE in_inventory SET estimated_amount_remaining = estimated_amount_remaining + %s WHERE barcode = %s;",
+                  (change, barcode))
+        c.execute("SELECT estimated_amount_remaining FROM in_inventory WHERE id = %s;", (row[0],))
+        amount = c.fetchone()[0]
+        c.execute("INSERT INTO history (barcode, inventory_id, person_id, type_of_use, time_of_use, amnt_change) VALUES (%s,%s,%s,%s,%s,%s)",
+                  (barcode, row[0], person_id, 'Access', when.strftime(time_format), change))
+        history_id = c.lastrowid
+        cls._roll_up(c, when, person_id, barcode, change)
+        return amount, history_id
 
     def check_if_barcode_exists(self, barcode):
         """
@@ -237,107 +667,171 @@ class DatabaseManager:
         c.execute("SELECT id FROM in_inventory WHERE barcode = %s", (barcode,))
         iid = c.fetchone()[0]
 
-        c.execute("SELECT id FROM people WHERE name=%s", ('admin',))
-        pid = c.fetchone()[0]
+        pid = self.identities.person_id(c, 'admin')
 
         c.execute("DELETE FROM in_inventory WHERE barcode = %s", (barcode,))
 
+        now = datetime.now()
         c.execute("INSERT INTO history (barcode, inventory_id, person_id, type_of_use, time_of_use, reason) VALUES (%s,%s,%s,%s,%s,%s)",
-                  (barcode, iid, pid, 'Delete Entry', datetime.now().strftime(time_format), reason,))
+                  (barcode, iid, pid, 'Delete Entry', now.strftime(time_format), reason,))
+        self._roll_up(c, now, pid, barcode, 0)
 
         conn.commit()
         conn.close()
     
-    def pattern_line_graph(self, date,user,barcode=None):
+    # ------------------------------------------------------------------ #
+    #  Daily rollup – pre-aggregated history used by the analytics below   #
+    # ------------------------------------------------------------------ #
+    # Same rows as the rollup, aggregated on the fly – used until migrate.py has created it
+    _ROLLUP_FROM_HISTORY = """(SELECT DATE(time_of_use) AS day, person_id, barcode,
+                                      SUM(COALESCE(amnt_change, 0)) AS sum_change, COUNT(*) AS `count`
+                               FROM history
+                               GROUP BY DATE(time_of_use), person_id, barcode) AS history_daily_rollup"""
+
+    @staticmethod
+    def _rollup_missing(e):
+        """True if *e* is MySQL reporting that ``history_daily_rollup`` does not exist yet."""
+        return isinstance(e, mysql.connector.Error) and e.errno == errorcode.ER_NO_SUCH_TABLE
+
+    @classmethod
+    def _roll_up(cls, c, when, person_id, barcode, change):
+        """Fold one history write into ``history_daily_rollup`` (same transaction).
+
+        On a database that has not been migrated yet the table is missing;
+        the history row is still written and ``migrate.py`` backfills the
+        rollup from it later.
+        """
+        try:
+            c.execute("""
+                INSERT INTO history_daily_rollup (day, person_id, barcode, sum_change, `count`)
+                VALUES (%s, %s, %s, %s, 1)
+                ON DUPLICATE KEY UPDATE sum_change = sum_change + VALUES(sum_change),
+                                        `count` = `count` + 1;
+            """, (when.date(), person_id, barcode, change or 0,))
+        except mysql.connector.Error as e:
+            if not cls._rollup_missing(e):
+                raise
+            print("history_daily_rollup does not exist; run database_setup/migrate.py")
+
+    def _execute_rollup_query(self, c, query, params):
+        """Run a read of ``history_daily_rollup``, aggregating history directly if it is missing."""
+        try:
+            c.execute(query, params)
+        except mysql.connector.Error as e:
+            if not self._rollup_missing(e):
+                raise
+            c.execute(query.replace("history_daily_rollup", self._ROLLUP_FROM_HISTORY), params)
+
+    def rebuild_daily_rollup(self, since=None):
+        """
+        Backfill ``history_daily_rollup`` from the raw history table.
+
+        Parameters:
+            since (date): Only rebuild days on or after this date; None rebuilds everything.
+
+        Returns:
+            int: Number of rollup rows written.
+        """
+        conn = self._get_connection()
+        c = conn.cursor()
+
+        try:
+            c.execute("SELECT 1 FROM history_daily_rollup LIMIT 1;")
+            c.fetchall()
+        except mysql.connector.Error as e:
+            conn.close()
+            if not self._rollup_missing(e):
+                raise
+            print("history_daily_rollup does not exist; run database_setup/migrate.py to create and fill it")
+            return 0
+
+        if since is None:
+            c.execute("DELETE FROM history_daily_rollup;")
+            c.execute("""
+                INSERT INTO history_daily_rollup (day, person_id, barcode, sum_change, `count`)
+                SELECT DATE(time_of_use), person_id, barcode, SUM(COALESCE(amnt_change, 0)), COUNT(*)
+                FROM history
+                GROUP BY DATE(time_of_use), person_id, barcode;
+            """)
+        else:
+            c.execute("DELETE FROM history_daily_rollup WHERE day >= %s;", (since,))
+            c.execute("""
+                INSERT INTO history_daily_rollup (day, person_id, barcode, sum_change, `count`)
+                SELECT DATE(time_of_use), person_id, barcode, SUM(COALESCE(amnt_change, 0)), COUNT(*)
+                FROM history
+                WHERE time_of_use >= %s
+                GROUP BY DATE(time_of_use), person_id, barcode;
+            """, (since,))
+        written = c.rowcount
+
+        conn.commit()
+        conn.close()
+        return written
+
+    def pattern_line_graph(self, date, user, barcode=None):
+        """
+        Daily usage totals over a date range, read from ``history_daily_rollup``.
+
+        Parameters:
+            date (str): The range as "YYYY-MM-DD to YYYY-MM-DD".
+            user (str): A person's name, or "whole" for the entire system.
+            barcode (str): Optional barcode to restrict the totals to.
+
+        Returns:
+            tuple: (change, periods) – absolute daily totals and the matching day
+            strings, one entry per day after the first date up to the second.
+            Days without any history are zero-filled.
+            NameError: If *user* is not found in the people table.
+            Exception: Any error raised by the query.
+        """
         conn = self._get_connection()
         c = conn.cursor()
         end_date = date.split()[0]
         start_date = date.split()[2]
         end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-        date_range = (datetime.strptime(start_date, '%Y-%m-%d') - end_date_obj).days
-        print(date_range)
-        
-        change = []
-        periods = []
-
-        if user.lower()=='whole':
-            if barcode==None:
-                for i in range(date_range):
-                    day = (end_date_obj + timedelta(days=(i+1))).strftime(time_format)
-                    try:
-                        c.execute("""
-                            SELECT SUM(amnt_change)
-                            FROM history
-                            WHERE date(time_of_use) = %s;
-                        """, (day,))
-                        result = c.fetchone()
-                        if result and result[0] is not None:
-                            change.append(abs(int(result[0])))
-                        else:
-                            change.append(0)
-                        periods.append(day)
-                    except Exception as e:
-                        return e
-            else:
-                for i in range(date_range):
-                    day = (end_date_obj + timedelta(days=(i+1))).strftime(time_format)
-                    try:
-                        c.execute("""
-                            SELECT SUM(amnt_change)
-                            FROM history
-                            WHERE date(time_of_use) = %s AND barcode=%s;
-                        """, (day,barcode,))
-                        result = c.fetchone()
-                        if result and result[0] is not None:
-                            change.append(abs(int(result[0])))
-                        else:
-                            change.append(0)
-                        periods.append(day)
-                    except Exception as e:
-                        return e
-        else:
+        date_range = max((datetime.strptime(start_date, '%Y-%m-%d') - end_date_obj).days, 0)
+
+        first_day = end_date_obj + timedelta(days=1)
+        periods = [(first_day + timedelta(days=i)).strftime(time_format) for i in range(date_range)]
+
+        # Read the pre-aggregated daily rollup rather than rescanning history
+        query = """
+            SELECT day, SUM(sum_change)
+            FROM history_daily_rollup
+            WHERE day >= %s AND day < %s"""
+        params = [first_day.date(), (first_day + timedelta(days=date_range)).date()]
+
+        if user.lower() != 'whole':
             try:
-                c.execute("SELECT id FROM people WHERE name=%s",(user.lower(),))
-                user_id=c.fetchone()[0]
-            except:
+                user_id = self.identities.person_id(c, user.lower())
+            except Exception:
+                conn.close()
                 return NameError
-            if barcode==None:
-                for i in range(date_range):
-                    day = (end_date_obj + timedelta(days=(i+1))).strftime(time_format)
-                    try:
-                        c.execute("""
-                                SELECT SUM(amnt_change)
-                                FROM history
-                                WHERE date(time_of_use) =%s
-                                AND person_id = %s
-                            """, (day, user_id,))
-                        result = c.fetchone()
-                        if result and result[0] is not None:
-                            change.append(abs(int(result[0])))
-                        else:
-                            change.append(0)
-                        periods.append(day)
-                    except Exception as e:
-                        return e
-            else:
-                for i in range(date_range):
-                    day = (end_date_obj + timedelta(days=(i+1))).strftime(time_format)
-                    try:
-                        c.execute("""
-                                SELECT SUM(amnt_change)
-                                FROM history
-                                WHERE date(time_of_use) = %s
-                                AND person_id = %s
-                                AND barcode = %s
-                            """, (day, user_id,barcode,))
-                        result = c.fetchone()
-                        if result and result[0] is not None:
-                            change.append(abs(int(result[0])))
-                        else:
-                            change.append(0)
-                        periods.append(day)
-                    except Exception as e:
-                        return e
+            query += " AND person_id = %s"
+            params.append(user_id)
+
+        if barcode is not None:
+            query += " AND barcode = %s"
+            params.append(barcode)
+
+        query += " GROUP BY day;"
+        try:
+            self._execute_rollup_query(c, query, tuple(params))
+            rows = c.fetchall()
+        except Exception as e:
+            conn.close()
+            return e
+        conn.close()
+
+        # Zero-fill: scatter the returned days into a dense per-day array
+        totals = np.zeros(date_range, dtype=np.int64)
+        if rows:
+            offsets = np.array([(day - first_day.date()).days for day, _ in rows], dtype=np.int64)
+            sums = np.array([int(total or 0) for _, total in rows], dtype=np.int64)
+            keep = (offsets >= 0) & (offsets < date_range)
+            totals[offsets[keep]] = sums[keep]
+
+        change = np.abs(totals).tolist()
         return change, periods
 
     def user_names(self):
@@ -361,90 +855,84 @@ class DatabaseManager:
         ratio_thresh=1.5,
         baseline_window=3
     ):
+        """
+        Flag usage spikes / drops for the whole system and for each user.
+
+        One bulk query pulls the per-person daily totals from
+        ``history_daily_rollup`` for the longest lookback
+        (max(periods) * periods_back days); the days are then bucketed into
+        all period sizes at once and scored with array maths, so neither the
+        query count nor the rows scanned grow with raw history length.
+        Buckets are day-aligned: bucket ``i`` of a period ``p`` covers the days
+        ``i*p .. (i+1)*p - 1`` before today.
+
+        Parameters:
+            periods (list[int]): Bucket sizes in days.
+            periods_back (int): Number of buckets per series (bucket 0 is the most recent).
+            users (list[str]): People to analyse individually.
+            whole (bool): Also analyse the system-wide totals.
+            z_thresh (float): |z-score| above which a bucket is flagged.
+            ratio_thresh (float): Value / baseline-mean ratio above which a bucket is flagged.
+            baseline_window (int): Number of preceding buckets used as the baseline.
+
+        Returns:
+            list[dict]: One dict per anomaly with keys ``label``, ``index``,
+            ``value``, ``baseline_mean``, ``z_score``, ``ratio`` and ``type``
+            (``"spike"`` or ``"drop"``).
+        """
+        periods = list(periods)
+        users = list(users or [])
+        if not periods or periods_back <= 0:
+            return []
+
+        today = datetime.today().date()
+        lookback_start = today - timedelta(days=max(periods) * periods_back)
+
         conn = self._get_connection()
         c = conn.cursor()
-        today = datetime.today()
-        np.set_printoptions(legacy='1.25')
-        results = []
-        
-        def analyze_series(values, label):
-            anomalies = []
-            values = np.array(values, dtype=float)
-
-            for i in range(baseline_window, len(values)):
-                baseline = values[i-baseline_window:i]
-                mean = baseline.mean()
-                std = baseline.std(ddof=1) or 1  # prevent divide-by-zero
-
-                z = (values[i] - mean) / std
-                ratio = values[i] / mean if mean > 0 else 0
-
-                if abs(z) > z_thresh or ratio > ratio_thresh:
-                    anomalies.append({
-                        "label": label,
-                        "index": i,
-                        "value": values[i],
-                        "baseline_mean": round(mean, 2),
-                        "z_score": round(z, 2),
-                        "ratio": round(ratio, 2),
-                        "type": (
-                            "spike" if values[i] > mean
-                            else "drop"
-                        )
-                    })
-            return anomalies
-
-        # ---- WHOLE SYSTEM ----
+
+        user_ids = self.identities.person_ids(c, users) if users else {}
+        users = [u for u in users if u in user_ids]
+
+        # Ages come back as whole days so the rows load straight into an int array
+        self._execute_rollup_query(c, """
+            SELECT person_id, DATEDIFF(%s, day), SUM(sum_change)
+            FROM history_daily_rollup
+            WHERE day > %s AND day <= %s
+            GROUP BY person_id, day;
+        """, (today, lookback_start, today,))
+        rows = c.fetchall()
+        conn.close()
+
+        data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        person_col, age_col, amount_col = data[:, 0], data[:, 1], data[:, 2].astype(float)
+
+        # ---- series layout: whole system first, then each user ----
+        series_labels = (["whole"] if whole else []) + [f"user:{u}" for u in users]
+        if not series_labels:
+            return []
+        row_series = []                                 # (series index, row mask)
         if whole:
-            for period in periods:
-                totals = []
-                for i in range(periods_back):
-                    front = (today - timedelta(days=i*period)).strftime(time_format)
-                    back = (today - timedelta(days=(i+1)*period)).strftime(time_format)
-
-                    c.execute("""
-                        SELECT SUM(amnt_change)
-                        FROM history
-                        WHERE time_of_use BETWEEN %s AND %s;
-                    """, (back, front,))
-
-                    val = c.fetchone()[0]
-                    totals.append(val if val is not None else 0)
-
-                results.extend(
-                    analyze_series(totals, f"whole_{period}d")
+            row_series.append((0, np.ones(len(data), dtype=bool)))
+        offset = 1 if whole else 0
+        for i, u in enumerate(users):
+            row_series.append((offset + i, person_col == user_ids[u]))
+
+        # totals[s, p, b] = usage of series s in bucket b of period p
+        totals = np.zeros((len(series_labels), len(periods), periods_back))
+        for p_idx, period in enumerate(periods):
+            bucket = age_col // period
+            in_range = (bucket >= 0) & (bucket < periods_back)
+            for s_idx, mask in row_series:
+                sel = mask & in_range
+                totals[s_idx, p_idx] = np.bincount(
+                    bucket[sel], weights=amount_col[sel], minlength=periods_back
                 )
 
-        # ---- PER USER ----
-        if users:
-            for user in users:
-                c.execute("SELECT id FROM people WHERE name=%s", (user,))
-                pid = c.fetchone()[0]
-                for period in periods:
-                    totals = []
-                    for i in range(periods_back):
-                        front = (today - timedelta(days=i*period)).strftime(time_format)
-                        back = (today - timedelta(days=(i+1)*period)).strftime(time_format)
-
-                        c.execute("""
-                            SELECT SUM(amnt_change)
-                            FROM history
-                            WHERE time_of_use BETWEEN %s
-                            AND %s
-                            AND person_id = %s
-                        """, (back, front, pid,))
-
-                        val = c.fetchone()[0]
-                        totals.append(val if val is not None else 0)
-
-                    results.extend(
-                        analyze_series(totals, f"user:{user}_{period}d")
-                    )
-
-        conn.close()
-        return str(results).replace(', ','\n')
+        values = totals.reshape(-1, periods_back)
+        labels = [f"{name}_{period}d" for name in series_labels for period in periods]
+        return _rolling_anomalies(values, labels, baseline_window, z_thresh, ratio_thresh)
 
-    
     def give_inventory_data(self): #for later, just transitioning to not change frontend right now
         pass
         # conn = mysql.connector.connect(
@@ -461,12 +949,7 @@ class DatabaseManager:
         pass
 
     def pull_types(self):
-        conn = mysql.connector.connect(
-            host="localhost",
-            user='root',
-            password='1234',
-            database='inventory_system'
-        )
+        conn = self._get_connection()
         c = conn.cursor()
 
         c.execute("SELECT type FROM medications GROUP BY type;")
@@ -478,6 +961,86 @@ class DatabaseManager:
         return types
     
 
+    # ------------------------------------------------------------------ #
+    #  Inventory change cursor – lets the UI pull deltas, not full tables  #
+    # ------------------------------------------------------------------ #
+    _INVENTORY_SELECT = """SELECT medications.name, in_inventory.barcode,
+                                in_inventory.estimated_amount_remaining,
+                                medications.expiration_date, medications.type,
+                                medications.dosage, in_inventory.location
+                         FROM in_inventory
+                         JOIN medications ON medications.barcode=in_inventory.barcode"""
+
+    def pull_inventory_snapshot(self):
+        """
+        Full inventory plus the change cursor it is consistent with.
+
+        Returns:
+            tuple: (cursor, rows) – the current max ``history.id`` and every
+            row in ``pull_data("drugs_in_inventory")`` shape. Pass the cursor
+            to ``pull_inventory_changes`` to fetch later changes only.
+        """
+        conn = self._get_connection()
+        c = conn.cursor()
+
+        # Read the cursor first: anything written in between is simply re-sent later
+        c.execute("SELECT COALESCE(MAX(id), 0) FROM history;")
+        cursor = c.fetchone()[0]
+        c.execute(self._INVENTORY_SELECT + ";")
+        rows = c.fetchall()
+
+        conn.close()
+        return cursor, rows
+
+    def pull_inventory_changes(self, cursor):
+        """
+        Inventory rows touched since *cursor* (a ``history.id``).
+
+        Every inventory write (restock, use, delete) logs a history row, so the
+        history ids past the cursor identify exactly which barcodes changed.
+        InnoDB hands out ids at insert time, not commit time, so a concurrent
+        kiosk's lower id can commit after the cursor has moved past it; the
+        last ``CHANGE_OVERLAP`` ids below the cursor are therefore re-read too
+        (re-sending an unchanged row is harmless).
+
+        Parameters:
+            cursor (int): Value previously returned by this method or
+                ``pull_inventory_snapshot``.
+
+        Returns:
+            tuple: (new_cursor, upserts, deleted) – ``upserts`` are current rows
+            (``pull_data("drugs_in_inventory")`` shape) for changed barcodes that
+            are still stocked, ``deleted`` is a list of ``(barcode, name)`` pairs
+            that are no longer in inventory.
+            None: If history moved backwards (e.g. re-seeded); reload in full.
+        """
+        conn = self._get_connection()
+        c = conn.cursor()
+
+        c.execute("SELECT COALESCE(MAX(id), 0) FROM history;")
+        head = c.fetchone()[0]
+        if head < cursor:
+            conn.close()
+            return None
+
+        c.execute("""SELECT DISTINCT history.barcode, medications.name
+                     FROM history
+                     JOIN medications ON medications.barcode=history.barcode
+                     WHERE history.id > %s AND history.id <= %s;""", (cursor - CHANGE_OVERLAP, head,))
+        touched = c.fetchall()
+
+        upserts = []
+        if touched:
+            placeholders = ",".join(["%s"] * len(touched))
+            c.execute(self._INVENTORY_SELECT + f" WHERE in_inventory.barcode IN ({placeholders});",
+                      tuple(barcode for barcode, _ in touched))
+            upserts = c.fetchall()
+        conn.close()
+
+        present = {row[1] for row in upserts}
+        deleted = [(barcode, name) for barcode, name in touched if barcode not in present]
+        return head, upserts, deleted
+
     def pull_data(self, table):
         """
         Retrieve all records from a specified table in the database.
@@ -492,12 +1055,7 @@ class DatabaseManager:
         c = conn.cursor()
 
         if table == "drugs_in_inventory":
-            c.execute("""SELECT medications.name, in_inventory.barcode,
-                                in_inventory.estimated_amount_remaining,
-                                medications.expiration_date, medications.type,
-                                medications.dosage, in_inventory.location
-                         FROM in_inventory
-                         JOIN medications ON medications.barcode=in_inventory.barcode;""")
+            c.execute(self._INVENTORY_SELECT + ";")
             result = c.fetchall()
         elif table == "drug_changes":
             c.execute("""SELECT history.barcode, medications.name, history.amnt_change,
@@ -526,20 +1084,15 @@ class PersonalDatabaseManager:
         self.database = 'inventory_system'
         self.access_user = access_user
         conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("SELECT id FROM people WHERE name=%s", (access_user,))
-        self.user_id = c.fetchone()[0]
-        conn.close()
+        try:
+            self.user_id = get_identity_cache(self.database).person_id(conn.cursor(), access_user)
+        finally:
+            conn.close()
         #create_personal_database()
 
     def _get_connection(self):
-        """Return a new MySQL connection using instance credentials."""
-        return mysql.connector.connect(
-            host="localhost",
-            user=self.user,
-            password=self.password,
-            database=self.database,
-        )
+        """Check out a pooled MySQL connection using instance credentials."""
+        return get_pool("localhost", self.user, self.password, self.database).acquire()
 
     """
     def create_personal_database(self):
@@ -703,12 +1256,8 @@ class PersonalDatabaseManager:
         return False, "No Time Match"
     """
 
-    def get_personal_data(self, date):
-        """Retrieve usage history and prescriptions for this user on *date*."""
-        conn = self._get_connection()
-        c = conn.cursor()
-
-        c.execute("""SELECT 
+    # Usage rows with the prescription match flag; callers append a WHERE clause.
+    _HISTORY_SELECT = """SELECT
                     h.barcode,
                     m.name,
                     h.time_of_use,
@@ -726,17 +1275,24 @@ class PersonalDatabaseManager:
                                 p.as_needed = TRUE
                                 OR
                                 TIME(h.time_of_use)
-                                    BETWEEN 
+                                    BETWEEN
                                         SUBTIME(p.time, SEC_TO_TIME(p.leeway * 60))
                                     AND ADDTIME(p.time, SEC_TO_TIME(p.leeway * 60))
                             )
                     ) AS matches_prescription
 
                 FROM history h
-                JOIN medications m 
-                    ON h.barcode = m.barcode
+                JOIN medications m
+                    ON h.barcode = m.barcode"""
+
+    def get_personal_data(self, date):
+        """Retrieve usage history and prescriptions for this user on *date*."""
+        conn = self._get_connection()
+        c = conn.cursor()
 
-                WHERE h.person_id = %s AND date(h.time_of_use) = %s;""",(self.user_id,date,))
+        c.execute(self._HISTORY_SELECT + """
+                WHERE h.person_id = %s
+                AND h.time_of_use >= %s AND h.time_of_use < %s + INTERVAL 1 DAY;""", (self.user_id, date, date,))
         hist_logs = c.fetchall()
 
         c.execute("""SELECT p.barcode, m.name, p.dose, p.time, p.leeway, p.as_needed FROM prescriptions p
@@ -771,6 +1327,24 @@ class PersonalDatabaseManager:
         conn.close()
         return hist_logs, prescript_logs
 
+    def history_entry(self, history_id):
+        """
+        One of this user's usage rows, in ``get_personal_data`` history shape.
+
+        Parameters:
+            history_id (int): ``history.id``, e.g. as returned by
+                ``DatabaseManager.log_access_to_inventory``.
+
+        Returns:
+            tuple: (barcode, name, time_of_use, amount, matches_prescription), or None.
+        """
+        conn = self._get_connection()
+        c = conn.cursor()
+        c.execute(self._HISTORY_SELECT + " WHERE h.id = %s AND h.person_id = %s;", (history_id, self.user_id,))
+        row = c.fetchone()
+        conn.close()
+        return row
+
 
 
 
@@ -0,0 +1,309 @@
+"""
+Medical Inventory System - Reference Face Index
+
+Holds every enrolled reference embedding in one contiguous, L2-normalised
+float32 matrix with a parallel label index, so all faces in a frame are
+matched with a single matrix multiply instead of a Python loop per label.
+Reference embeddings are cached on disk so start-up only re-embeds new or
+changed images.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+MATCH_THRESHOLD = 1.0
+"""float: Euclidean distance between unit embeddings below which a match is accepted."""
+
+APPROX_MIN_ROWS = 512
+"""int: Reference count at which ``ReferenceIndex`` switches to the approximate (IVF) search."""
+
+
+def normalize_rows(x):
+    """Return *x* (1-D or 2-D) as float32 with every row scaled to unit length."""
+    x = np.atleast_2d(np.asarray(x, dtype=np.float32))
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def cosine_to_distance(sim):
+    """Euclidean distance between unit vectors with cosine similarity *sim*: ``sqrt(2 - 2cos)``."""
+    return np.sqrt(np.maximum(0.0, 2.0 - 2.0 * sim))
+
+
+# ====================================================================== #
+# region           REFERENCE INDEX                                        #
+# ====================================================================== #
+
+class ReferenceIndex:
+    """All reference embeddings in one matrix, matched by cosine similarity.
+
+    For unit vectors ``|a - b| = sqrt(2 - 2 a.b)``, so the smallest
+    Euclidean distance is the largest dot product and a frame's faces are
+    scored against every reference in one ``(F, D) @ (D, N)`` product.
+
+    Once the index holds ``APPROX_MIN_ROWS`` references (hundreds of crew
+    and visitors) it also builds a small inverted-file (IVF) index: the
+    references are clustered with k-means and a query only scores the
+    references in its ``n_probe`` nearest clusters.
+
+    Parameters
+    ----------
+    approximate : bool or None
+        Force the IVF search on (True) or off (False); None picks it from
+        the index size.
+    n_probe : int
+        Number of clusters scored per query in the approximate search.
+    """
+
+    def __init__(self, approximate=None, n_probe=4):
+        self.approximate = approximate
+        self.n_probe = n_probe
+        self.matrix = np.zeros((0, 0), dtype=np.float32)   # (N, D) unit rows
+        self.label_ids = np.zeros(0, dtype=np.int32)       # row -> index into labels
+        self.labels = []
+        self._centroids = None                             # (C, D) IVF centroids
+        self._lists = None                                 # cluster -> row indices
+
+    def __len__(self):
+        return len(self.label_ids)
+
+    # -- building --
+
+    @classmethod
+    def from_groups(cls, groups, **kwargs):
+        """Build an index from ``{label: [embedding, ...]}``."""
+        index = cls(**kwargs)
+        index.build(groups)
+        return index
+
+    def build(self, groups):
+        """Replace the index contents with ``{label: [embedding, ...]}``."""
+        labels, rows, ids = [], [], []
+        for label, embeddings in groups.items():
+            embeddings = normalize_rows(embeddings)
+            if not embeddings.size:
+                continue
+            ids.extend([len(labels)] * len(embeddings))
+            labels.append(label)
+            rows.append(embeddings)
+
+        self.labels = labels
+        self.matrix = np.ascontiguousarray(np.vstack(rows)) if rows else np.zeros((0, 0), dtype=np.float32)
+        self.label_ids = np.asarray(ids, dtype=np.int32)
+        self._centroids = self._lists = None
+        if self._use_ivf():
+            self._build_ivf()
+
+    def _use_ivf(self):
+        if self.approximate is None:
+            return len(self) >= APPROX_MIN_ROWS
+        return bool(self.approximate) and len(self) > 0
+
+    def _build_ivf(self, iterations=10, seed=0):
+        """Cluster the references with a few rounds of spherical k-means."""
+        n = len(self)
+        k = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        centroids = self.matrix[rng.choice(n, size=k, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(self.matrix @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, self.matrix)
+            empty = ~np.any(sums, axis=1)
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+        assign = np.argmax(self.matrix @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assign == c) for c in range(k)]
+
+    # -- lookups --
+
+    def similarities(self, embeddings):
+        """Cosine similarity of every query row against every reference: ``(F, N)``."""
+        return normalize_rows(embeddings) @ self.matrix.T
+
+    def match(self, embeddings, threshold=MATCH_THRESHOLD):
+        """Best label and distance for each query embedding.
+
+        Parameters
+        ----------
+        embeddings : array_like
+            ``(F, D)`` (or a single ``(D,)``) face embeddings; they need not be normalised.
+        threshold : float
+            Distances at or above this are reported as ``"Unknown"``.
+
+        Returns
+        -------
+        list of tuple
+            ``(label, distance)`` per query row.
+        """
+        queries = normalize_rows(embeddings)
+        if not len(self) or not len(queries):
+            return [("Unknown", float("inf"))] * len(queries)
+
+        if self._centroids is not None:
+            best_rows, best_sims = self._search_ivf(queries)
+        else:
+            sims = queries @ self.matrix.T
+            best_rows = np.argmax(sims, axis=1)
+            best_sims = sims[np.arange(len(queries)), best_rows]
+
+        dists = cosine_to_distance(best_sims)
+        results = []
+        for row, dist in zip(best_rows, dists):
+            dist = float(dist)
+            if row >= 0 and dist < threshold:
+                results.append((self.labels[self.label_ids[row]], dist))
+            else:
+                results.append(("Unknown", dist))
+        return results
+
+    def _search_ivf(self, queries):
+        """Best reference row and similarity per query, scoring only the nearest clusters."""
+        probe = min(self.n_probe, len(self._lists))
+        nearest = np.argsort(-(queries @ self._centroids.T), axis=1)[:, :probe]
+        best_rows = np.full(len(queries), -1, dtype=np.intp)
+        best_sims = np.full(len(queries), -1.0, dtype=np.float32)
+        for i, clusters in enumerate(nearest):
+            rows = np.concatenate([self._lists[c] for c in clusters])
+            if not len(rows):
+                continue
+            sims = self.matrix[rows] @ queries[i]
+            j = int(np.argmax(sims))
+            best_rows[i], best_sims[i] = rows[j], sims[j]
+        return best_rows, best_sims
+
+    def top_k(self, embedding, k=5):
+        """The *k* closest distinct labels to one embedding as ``[(label, distance), ...]``."""
+        if not len(self):
+            return []
+        sims = self.similarities(embedding)[0]
+        per_label = np.full(len(self.labels), -np.inf, dtype=np.float32)
+        np.maximum.at(per_label, self.label_ids, sims)
+        k = min(k, len(self.labels))
+        best = np.argpartition(-per_label, k - 1)[:k]
+        best = best[np.argsort(-per_label[best])]
+        return [(self.labels[i], float(cosine_to_distance(per_label[i]))) for i in best]
+
+# endregion
+
+
+# ====================================================================== #
+# region           EMBEDDING CACHE                                        #
+# ====================================================================== #
+
+def file_digest(path, chunk_size=1 << 16):
+    """SHA-1 hex digest of a file's contents."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk ``.npz`` store of reference embeddings keyed by image file hash.
+
+    The file also records the model signature (model name and detector
+    size); a cache written under a different signature is discarded on
+    load, so changing ``buffalo_sc`` or ``det_size`` rebuilds everything.
+    Entries for images no longer present are dropped on ``save``.
+
+    Parameters
+    ----------
+    path : str
+        Location of the cache file.
+    model_name : str
+        InsightFace model pack the embeddings came from.
+    det_size : tuple of int
+        Detector input size the embeddings were computed with.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, model_name, det_size):
+        self.path = path
+        self.signature = {
+            'version': self.VERSION,
+            'model': model_name,
+            'det_size': list(det_size),
+        }
+        self._entries = {}      # digest -> float32 embedding, or None (no face found)
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Read the cache file; returns the number of usable entries (0 on a mismatch or error)."""
+        self._entries = {}
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if json.loads(str(data['signature'])) != self.signature:
+                    return 0
+                digests = data['digests']
+                embeddings = data['embeddings']
+                has_face = data['has_face']
+        except Exception as e:
+            print(f"Ignoring unreadable embedding cache {self.path}: {e}")
+            return 0
+
+        for digest, emb, ok in zip(digests, embeddings, has_face):
+            self._entries[str(digest)] = emb if ok else None
+        return len(self._entries)
+
+    def get(self, digest):
+        """Return ``(found, embedding)``; embedding is None for images with no face."""
+        self._used.add(digest)
+        if digest in self._entries:
+            self.hits += 1
+            return True, self._entries[digest]
+        self.misses += 1
+        return False, None
+
+    def put(self, digest, embedding):
+        """Record *embedding* (or None when no face was detected / the image is unreadable) for *digest*."""
+        self._used.add(digest)
+        self._entries[digest] = None if embedding is None else np.asarray(embedding, dtype=np.float32)
+
+    @property
+    def dirty(self):
+        """True when the file on disk is missing entries or holds entries for removed images."""
+        return self.misses > 0 or any(d not in self._used for d in self._entries)
+
+    def save(self):
+        """Atomically write the entries seen since ``load`` (stale images are pruned)."""
+        digests = [d for d in self._entries if d in self._used]
+        embeddings = [self._entries[d] for d in digests]
+        dim = next((len(e) for e in embeddings if e is not None), 0)
+        matrix = np.zeros((len(digests), dim), dtype=np.float32)
+        for i, emb in enumerate(embeddings):
+            if emb is not None:
+                matrix[i] = emb
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    signature=np.array(json.dumps(self.signature)),
+                    digests=np.array(digests, dtype='U40'),
+                    embeddings=matrix,
+                    has_face=np.array([e is not None for e in embeddings], dtype=bool),
+                )
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+# endregion
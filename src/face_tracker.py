@@ -0,0 +1,172 @@
+"""
+Medical Inventory System - Face Tracker
+
+Associates face detections across frames by bounding-box IoU so a person
+standing still is not re-embedded every frame.  A track keeps its last
+embedding and match, is re-embedded only periodically or while its match
+is weak, and confirms an identity by voting over its recent matches; a
+frame that reuses the last embedding votes for the same label again.
+"""
+
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+
+TRACK_MIN_IOU = 0.4
+"""float: Minimum IoU for a detection to continue an existing track."""
+
+TRACK_TTL = 0.5
+"""float: Seconds a track survives without a matching detection."""
+
+REEMBED_EVERY = 5
+"""int: Re-embed a stable track after this many detection frames."""
+
+WEAK_MATCH_DISTANCE = 0.8
+"""float: Matches at or above this distance are re-embedded on the next frame."""
+
+STRONG_MATCH_DISTANCE = 0.6
+"""float: A match below this distance confirms an identity on its own."""
+
+VOTE_WINDOW = 5
+"""int: Number of recent matches a track votes over."""
+
+VOTES_REQUIRED = 2
+"""int: Matching votes within the window needed to confirm an identity."""
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between ``(N, 4)`` and ``(M, 4)`` boxes in ``x1, y1, x2, y2`` form."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+# ====================================================================== #
+# region           TRACKS                                                 #
+# ====================================================================== #
+
+class Track:
+    """One face followed across frames."""
+
+    def __init__(self, track_id, bbox, now):
+        self.id = track_id
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.last_seen = now
+        self.frames_since_embed = 0
+        self.embedding = None
+        self.label = "Unknown"
+        self.distance = float("inf")
+        self.votes = deque(maxlen=VOTE_WINDOW)
+
+    @property
+    def needs_embedding(self):
+        """True for new or weakly matched tracks, and stable tracks due a refresh."""
+        return (self.embedding is None
+                or self.distance >= WEAK_MATCH_DISTANCE
+                or self.frames_since_embed >= REEMBED_EVERY)
+
+    @property
+    def identity(self):
+        """Confirmed label, or None until the votes (or one strong match) agree."""
+        if self.label != "Unknown" and self.distance < STRONG_MATCH_DISTANCE:
+            return self.label
+        if not self.votes:
+            return None
+        label, count = Counter(self.votes).most_common(1)[0]
+        if label != "Unknown" and count >= VOTES_REQUIRED:
+            return label
+        return None
+
+    def record(self, embedding, label, distance):
+        """Store a fresh embedding and its match, and cast a vote."""
+        self.embedding = embedding
+        self.label = label
+        self.distance = distance
+        self.frames_since_embed = 0
+        self.votes.append(label)
+
+    def reuse(self):
+        """Vote for the current match again on a frame that keeps the last embedding."""
+        self.votes.append(self.label)
+
+
+class FaceTracker:
+    """Greedy IoU association of detections to tracks.
+
+    Usage per processed frame::
+
+        tracks = tracker.associate(bboxes)
+        for track in tracks:
+            if track.needs_embedding:
+                ...embed, match...
+                track.record(embedding, label, distance)
+    """
+
+    def __init__(self):
+        self.tracks = []
+        self._next_id = 1
+        self.embeds = 0        # embeddings computed
+        self.reused = 0        # detections served from a track's previous embedding
+
+    def reset(self):
+        """Drop every track (e.g. at the start of a new scan)."""
+        self.tracks = []
+
+    def associate(self, bboxes, now=None):
+        """Match *bboxes* to tracks, start tracks for the rest, expire stale ones.
+
+        Returns
+        -------
+        list of Track
+            One track per input box, in the same order.
+        """
+        now = time.time() if now is None else now
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= TRACK_TTL]
+
+        boxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        assigned = [None] * len(boxes)
+        if self.tracks and len(boxes):
+            ious = iou_matrix(boxes, np.stack([t.bbox for t in self.tracks]))
+            # Greedy: highest IoU pairs first
+            for flat in np.argsort(-ious, axis=None):
+                i, j = divmod(int(flat), ious.shape[1])
+                if ious[i, j] < TRACK_MIN_IOU:
+                    break
+                track = self.tracks[j]
+                if assigned[i] is not None or any(a is track for a in assigned):
+                    continue
+                assigned[i] = track
+
+        for i, box in enumerate(boxes):
+            track = assigned[i]
+            if track is None:
+                track = Track(self._next_id, box, now)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[i] = track
+            else:
+                track.bbox = box
+                track.last_seen = now
+                track.frames_since_embed += 1
+                if not track.needs_embedding:
+                    track.reuse()
+        return assigned
+
+    def note_embedding(self, reused):
+        """Count one detection as embedded (False) or served from its track (True)."""
+        if reused:
+            self.reused += 1
+        else:
+            self.embeds += 1
+
+# endregion
@@ -12,10 +12,14 @@ import re
 import numpy as np
 import time
 import threading
-import queue
-import insightface
+from insightface.app.common import Face
 import gc  # Garbage collection
 
+from face_index import ReferenceIndex, EmbeddingCache, MATCH_THRESHOLD, file_digest
+from face_tracker import FaceTracker
+import metrics
+import ort_tuning
+
 logging.getLogger("insightface").setLevel(logging.ERROR)
 logging.getLogger("onnxruntime").setLevel(logging.ERROR)
 
@@ -42,6 +46,30 @@ class FaceRecognitionError(Enum):
     def __repr__(self):
         return f"FaceRecognitionError.{self.name}"
 
+DEFAULT_CAMERA_RESOLUTION = (1280, 720)  # capture size unless MIS_CAMERA_RESOLUTION=WIDTHxHEIGHT is set
+
+
+def _camera_resolution(value=None):
+    """Parse a ``WIDTHxHEIGHT`` string (default: ``$MIS_CAMERA_RESOLUTION``) into a size tuple."""
+    value = os.environ.get('MIS_CAMERA_RESOLUTION', '') if value is None else value
+    if not value:
+        return DEFAULT_CAMERA_RESOLUTION
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+        if width <= 0 or height <= 0:
+            raise ValueError(value)
+        return width, height
+    except ValueError:
+        print(f"Ignoring invalid MIS_CAMERA_RESOLUTION {value!r}; using "
+              f"{DEFAULT_CAMERA_RESOLUTION[0]}x{DEFAULT_CAMERA_RESOLUTION[1]}")
+        return DEFAULT_CAMERA_RESOLUTION
+
+
+# Frames with a longer side than DETECT_MAX_SIDE are detected on a downscaled
+# copy and embedded from a crop of the full-resolution frame
+CAMERA_RESOLUTION = _camera_resolution()
+
+
 def _initialize_camera_robust():
     """Try multiple methods to initialize camera"""
     
@@ -54,6 +82,7 @@ def _initialize_camera_robust():
     ]
     
     for backend, name in backends:
+        start = time.perf_counter()
         try:
             cap = cv2.VideoCapture(0, backend)
             if cap.isOpened():
@@ -62,16 +91,19 @@ def _initialize_camera_robust():
                 ret, frame = cap.read()
                 if ret and frame is not None:
                     # Set optimal settings
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_RESOLUTION[0])
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_RESOLUTION[1])
                     cap.set(cv2.CAP_PROP_FPS, 30)
                     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                    metrics.histogram(f"camera.init_ms.{name}").observe(1000 * (time.perf_counter() - start))
+                    metrics.gauge("camera.backend").set(name)
                     return cap
                 else:
                     cap.release()
         except Exception:
             # Silently continue to next backend
             pass
+        metrics.counter(f"camera.init_failed.{name}").inc()
     
     # Method 2: Try different camera indices (fallback)
     for camera_index in [0, 1, 2]:
@@ -84,10 +116,11 @@ def _initialize_camera_robust():
                 ret, frame = cap.read()
                 if ret and frame is not None:
                     # Set optimal settings
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_RESOLUTION[0])
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_RESOLUTION[1])
                     cap.set(cv2.CAP_PROP_FPS, 30)
                     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                    metrics.gauge("camera.backend").set(f"index {camera_index}")
                     return cap
                 else:
                     cap.release()
@@ -97,9 +130,17 @@ def _initialize_camera_robust():
     
     return None
 
+MODEL_NAME = "buffalo_sc"  # base model pack; ort_tuning may select its INT8 copy
+CAMERA_STAGE_WAIT = 10  # seconds quick_detect waits for an in-progress camera probe
+CAMERA_RECONNECT_WAIT = 3  # seconds reinitialize_camera waits for the capture thread
+CAPTURE_RETRY_MIN = 5      # capture reconnect back-off, seconds
+CAPTURE_RETRY_MAX = 120
+FRAME_TIMEOUT = 2.0        # no new frame for this long counts as a disconnect
+
 # Global model and app cache
 app = None
-reference_embeddings = None
+reference_index = None  # ReferenceIndex over every enrolled reference embedding
+ort_config = None       # ort_tuning.OrtConfig the model was loaded with
 preloading_complete = False
 camera_ready = False
 global_camera = None
@@ -122,110 +163,689 @@ def suppress_native_output():
         os.close(orig_stderr_fd)
 
 
-def preload_everything():
-    """Preload model, reference embeddings, and camera in background"""
-    global app, reference_embeddings, preloading_complete, camera_ready, global_camera
-    
+# ---------------------------------------------------------------------------
+# Capture service: one always-on thread owns the camera and keeps the newest
+# frame in a preallocated double buffer, so a scan starts from a frame that
+# is at most one frame interval old.  It also reconnects a lost camera on
+# its own with exponential back-off.
+# ---------------------------------------------------------------------------
+class CaptureService:
+    """Continuously read frames from a camera into a front/back buffer pair.
+
+    The capture thread reads into the back buffer outside the lock and
+    swaps it to the front under the lock; ``read_latest`` copies the front
+    buffer out, so readers never see a half-written frame.
+
+    Parameters
+    ----------
+    opener : callable() -> cv2.VideoCapture or None
+        Opens the camera; defaults to ``_initialize_camera_robust``.
+    """
+
+    def __init__(self, opener=None):
+        self._opener = opener or _initialize_camera_robust
+        self._cond = threading.Condition()
+        self._buffers = None        # [buf0, buf1], allocated on the first frame
+        self._front = 0
+        self._seq = 0
+        self._timestamp = 0.0
+        self._cap = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()   # cuts a reconnect back-off short
+        self.connected = False
+        self.listeners = []              # callables(connected: bool), run on the capture thread
+        self.frames_captured = 0
+        self.reconnects = 0
+
+    # -- lifecycle --
+
+    def open(self):
+        """Open the camera synchronously (without starting the thread); returns success."""
+        if self._cap is None:
+            cap = self._opener()
+            if cap is not None and cap.isOpened():
+                self._attach(cap)
+        return self.connected
+
+    def start(self):
+        """Start the capture thread if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread and release the camera."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self._detach()
+
+    def reconnect_now(self, timeout=CAMERA_RECONNECT_WAIT):
+        """Skip the back-off and wait up to *timeout* seconds for a connection."""
+        if self.connected:
+            return True
+        self.start()
+        self._wake.set()
+        with self._cond:
+            self._cond.wait_for(lambda: self.connected, timeout)
+        return self.connected
+
+    @property
+    def cap(self):
+        """The open ``cv2.VideoCapture`` (None while disconnected)."""
+        return self._cap
+
+    def _attach(self, cap):
+        self._cap = cap
+        with self._cond:
+            self.connected = True
+            self._cond.notify_all()
+        self._wake.set()    # end a back-off wait if the camera was opened from outside
+        self._notify(True)
+
+    def _detach(self):
+        cap, self._cap = self._cap, None
+        was_connected = self.connected
+        with self._cond:
+            self.connected = False
+            self._cond.notify_all()
+        if cap is not None:
+            try:
+                cap.release()
+            except Exception as e:
+                print(f"Error releasing camera: {e}")
+        if was_connected:
+            self._notify(False)
+
+    def _notify(self, connected):
+        for listener in list(self.listeners):
+            try:
+                listener(connected)
+            except Exception as e:
+                print(f"Camera listener error: {e}")
+
+    # -- capture thread --
+
+    def _run(self):
+        interval = CAPTURE_RETRY_MIN
+        while not self._stop.is_set():
+            cap = self._cap
+            if cap is None:
+                # Back off (or until reconnect_now), then probe again
+                self._wake.wait(interval)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                if self._cap is None:           # not opened meanwhile by open()
+                    if not self.open():
+                        interval = min(interval * 1.5, CAPTURE_RETRY_MAX)
+                        continue
+                    self.reconnects += 1
+                    metrics.counter("capture.reconnects").inc()
+                interval = CAPTURE_RETRY_MIN
+                cap = self._cap
+
+            bufs = self._buffers
+            back = bufs[1 - self._front] if bufs is not None else None
+            try:
+                ret, frame = cap.read(back) if back is not None else cap.read()
+            except Exception:
+                ret, frame = False, None
+            if not ret or frame is None:
+                print(f"Camera read failed, reconnecting: {FaceRecognitionError.CAMERA_DISCONNECTED}")
+                self._detach()
+                continue
+
+            with self._cond:
+                if bufs is None or bufs[0].shape != frame.shape or bufs[0].dtype != frame.dtype:
+                    self._buffers = [frame, np.empty_like(frame)]
+                    self._front = 0
+                else:
+                    if frame is not back:   # some backends ignore the output buffer
+                        np.copyto(back, frame)
+                    self._front = 1 - self._front
+                self._seq += 1
+                self._timestamp = time.time()
+                self.frames_captured += 1
+                self._cond.notify_all()
+            metrics.counter("capture.frames").inc()
+
+        self._detach()
+
+    # -- readers --
+
+    def read_latest(self, after=0, timeout=None, out=None):
+        """Copy out the newest frame once one newer than sequence *after* exists.
+
+        Parameters
+        ----------
+        after : int
+            Sequence number already seen (0 returns the current frame at once).
+        timeout : float or None
+            Seconds to wait for a newer frame.
+        out : numpy.ndarray or None
+            Destination buffer to reuse when its shape matches.
+
+        Returns
+        -------
+        tuple
+            ``(seq, timestamp, frame)``; *frame* is None on timeout / disconnect.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq > after or self._stop.is_set(), timeout
+            )
+            if self._seq <= after or self._buffers is None:
+                return after, 0.0, None
+            front = self._buffers[self._front]
+            if out is not None and out.shape == front.shape and out.dtype == front.dtype:
+                np.copyto(out, front)
+            else:
+                out = front.copy()
+            return self._seq, self._timestamp, out
+
+
+def _publish_camera_state(connected):
+    """Mirror the shared capture service into the legacy module flags."""
+    global camera_ready, global_camera
+    camera_ready = connected
+    global_camera = capture_service.cap if connected else None
+
+
+capture_service = CaptureService()
+capture_service.listeners.append(_publish_camera_state)
+
+
+# ---------------------------------------------------------------------------
+# Frame sources: anything with the cv2.VideoCapture read / isOpened /
+# release surface can feed the capture service, so recorded video or a
+# directory of stills replays through exactly the quick_detect pipeline.
+# ---------------------------------------------------------------------------
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class VideoFileSource:
+    """Replay a video file, paced to its own frame rate when *realtime* is set."""
+
+    def __init__(self, path, realtime=True):
+        self._cap = cv2.VideoCapture(path)
+        fps = self._cap.get(cv2.CAP_PROP_FPS) if self._cap.isOpened() else 0
+        self.fps = fps if fps and fps > 0 else 30.0
+        self._interval = 1.0 / self.fps if realtime else 0.0
+        self._next = None
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self, image=None):
+        if self._interval:
+            now = time.perf_counter()
+            if self._next is not None and now < self._next:
+                time.sleep(self._next - now)   # emulate the camera's frame clock
+            self._next = max(now, self._next or now) + self._interval
+        return self._cap.read(image) if image is not None else self._cap.read()
+
+    def release(self):
+        self._cap.release()
+
+
+class ImageDirectorySource:
+    """Serve the images of a directory (sorted by name) as consecutive frames."""
+
+    def __init__(self, path, fps=10.0, realtime=True):
+        self._paths = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._i = 0
+        self.fps = fps
+        self._interval = 1.0 / fps if realtime and fps else 0.0
+        self._next = None
+
+    def isOpened(self):
+        return bool(self._paths)
+
+    def read(self, image=None):
+        if self._i >= len(self._paths):
+            return False, None
+        if self._interval:
+            now = time.perf_counter()
+            if self._next is not None and now < self._next:
+                time.sleep(self._next - now)
+            self._next = max(now, self._next or now) + self._interval
+        frame = cv2.imread(self._paths[self._i])
+        self._i += 1
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def release(self):
+        self._i = len(self._paths)
+
+
+def open_frame_source(spec="camera", realtime=True):
+    """Open a frame source: ``"camera"``, a video file, or a directory of images.
+
+    Returns an object with the ``cv2.VideoCapture`` read surface, or None
+    when it cannot be opened.
+    """
+    if spec in (None, "camera"):
+        return _initialize_camera_robust()
+    if os.path.isdir(spec):
+        source = ImageDirectorySource(spec, realtime=realtime)
+    else:
+        source = VideoFileSource(spec, realtime=realtime)
+    return source if source.isOpened() else None
+
+
+def replay_opener(spec, realtime=True):
+    """Opener for ``CaptureService`` that opens *spec* once and never "reconnects" it."""
+    opened = []
+
+    def opener():
+        if opened:
+            return None
+        opened.append(True)
+        return open_frame_source(spec, realtime=realtime)
+    return opener
+
+
+# ---------------------------------------------------------------------------
+# Enrollment: new or changed reference images are embedded on a background
+# thread and the match index is swapped in with a single assignment, so an
+# in-progress scan keeps matching against the index it started the frame
+# with and the model is never reloaded.
+# ---------------------------------------------------------------------------
+WATCH_INTERVAL = 2.0  # seconds between reference-directory polls
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_references():
+    """Re-scan ``assets/references`` and atomically swap in the updated index.
+
+    Only images missing from the embedding cache are embedded.  Requires
+    the model to be loaded; returns SUCCESS or the error.
+    """
+    global reference_index
+    if not stage_ok["model"]:
+        return FaceRecognitionError.MODEL_LOAD_FAILED
+    with _refresh_lock:
+        try:
+            index, error = _build_reference_index()
+        except FileNotFoundError:
+            return FaceRecognitionError.REFERENCE_FOLDER_ERROR
+        except Exception as e:
+            print(f"Reference refresh failed: {e}")
+            return FaceRecognitionError.PRELOAD_FAILED
+        if error is not None:
+            return error
+        reference_index = index
+    recognition_worker.reset_tracks()     # track labels may name removed references
+    print(f"Reference index updated: {len(index.labels)} identities, {len(index)} images")
+    return FaceRecognitionError.SUCCESS
+
+
+def refresh_references_async(callback=None):
+    """Run ``refresh_references`` on a daemon thread; *callback(result)* is called when done."""
+    def worker():
+        result = refresh_references()
+        if callback is not None:
+            callback(result)
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+
+def enroll(label, image, callback=None):
+    """Add a reference image for *label* and refresh the index in the background.
+
+    Parameters
+    ----------
+    label : str
+        User name; stored as the file name, so it is normalised the same
+        way as existing references (``reference_label``).
+    image : numpy.ndarray or str
+        BGR image, or the path of an image file to copy in.
+    callback : callable(FaceRecognitionError) or None
+        Called from the background thread when the new index is live.
+
+    Returns
+    -------
+    str
+        Path of the saved reference image.
+    """
+    if isinstance(image, str):
+        image = cv2.imread(image)
+    if image is None:
+        raise ValueError("Enrollment image could not be read")
+
+    base = reference_label(label).lower()
+    if not base:
+        raise ValueError("Enrollment label is empty")
+    existing = {os.path.splitext(f)[0].lower() for f in os.listdir(REFERENCE_DIR)}
+    name, n = base, 1
+    while name in existing:
+        n += 1
+        name = f"{base}{n}"
+
+    ok, encoded = cv2.imencode(".png", image)
+    if not ok:
+        raise ValueError("Enrollment image could not be encoded")
+    path = os.path.join(REFERENCE_DIR, name + ".png")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(encoded.tobytes())
+    os.replace(tmp, path)  # the watcher never sees a half-written image
+
+    refresh_references_async(callback)
+    return path
+
+
+class ReferenceWatcher:
+    """Poll ``assets/references`` and refresh the index when images change.
+
+    Polling (name, size, mtime) every ``WATCH_INTERVAL`` seconds keeps the
+    kiosk free of extra dependencies; a refresh only embeds what changed.
+    """
+
+    def __init__(self, interval=WATCH_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = None
+
+    @staticmethod
+    def _scan():
+        snapshot = {}
+        for filename in os.listdir(REFERENCE_DIR):
+            if filename.lower().endswith(REFERENCE_EXTENSIONS):
+                st = os.stat(os.path.join(REFERENCE_DIR, filename))
+                snapshot[filename] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        try:
+            self._snapshot = self._scan()
+        except OSError:
+            self._snapshot = {}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                snapshot = self._scan()
+            except OSError as e:
+                print(f"Reference watcher error: {e}")
+                continue
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                refresh_references()
+
+
+reference_watcher = ReferenceWatcher()
+
+
+# ---------------------------------------------------------------------------
+# Staged preloading: model, references and camera load concurrently.  Each
+# stage sets its event when it finishes (successfully or not) and records
+# its wall-clock time, so callers can enable features per dependency.
+# ---------------------------------------------------------------------------
+PRELOAD_STAGES = ("model", "references", "camera")
+stage_events = {name: threading.Event() for name in PRELOAD_STAGES}
+stage_ok = {name: False for name in PRELOAD_STAGES}
+stage_timings = {}      # stage -> seconds taken
+stage_errors = {}       # stage -> FaceRecognitionError
+
+
+def stage_status():
+    """Snapshot of every preload stage: ``{stage: {'done', 'ok', 'seconds', 'error'}}``."""
+    return {
+        name: {
+            'done': stage_events[name].is_set(),
+            'ok': stage_ok[name],
+            'seconds': stage_timings.get(name),
+            'error': stage_errors.get(name),
+        }
+        for name in PRELOAD_STAGES
+    }
+
+
+def _run_stage(name, func, on_stage=None):
+    """Run one preload stage, recording its outcome and timing, then notify *on_stage*."""
+    global preloading_complete
+    start = time.perf_counter()
+    error = None
     try:
+        error = func()
+    except FileNotFoundError as e:
+        print(f"Preloading {name} failed: {e}")
+        error = (FaceRecognitionError.REFERENCE_FOLDER_ERROR if "references" in str(e)
+                 else FaceRecognitionError.PRELOAD_FAILED)
+    except Exception as e:
+        print(f"Preloading {name} failed: {e}")
+        error = FaceRecognitionError.PRELOAD_FAILED
+
+    stage_timings[name] = time.perf_counter() - start
+    metrics.gauge(f"preload.{name}_s").set(stage_timings[name])
+    stage_ok[name] = error is None
+    if error is not None:
+        stage_errors[name] = error
+    else:
+        stage_errors.pop(name, None)
+    if stage_ok["model"] and stage_ok["references"]:
+        preloading_complete = True
+    stage_events[name].set()
+
+    if on_stage is not None:
+        try:
+            on_stage(name, error is None, stage_timings[name])
+        except Exception as e:
+            print(f"Preload stage callback error: {e}")
+
+
+def _load_model():
+    """Stage: load the InsightFace model with the tuned ONNX Runtime sessions."""
+    global app
+    with suppress_native_output():
+        model = ort_tuning.build_face_analysis(MODEL_NAME, ort_config)
+    app = model
+    return None
+
+
+def reference_label(filename):
+    """User label for a reference image: ``"alice2.jpg"`` -> ``"Alice"``."""
+    label = os.path.splitext(filename)[0]
+    label = re.sub(r'\d+$', '', label)
+    label = re.sub(r'[^A-Za-z0-9_\-]', '_', label)
+    return label.capitalize()  # Capitalize first character
 
-        
-        # Load InsightFace model
-        with suppress_native_output():
-            app = insightface.app.FaceAnalysis(name="buffalo_sc", providers=['CPUExecutionProvider'])
-            app.prepare(ctx_id=0, det_size=(320, 320))
-
-        
-        # Load reference embeddings
-        def normalize(emb):
-            return emb / np.linalg.norm(emb)
-        
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(script_dir)
-        ref_dir = os.path.join(project_root, "assets", "references")
-        
-        reference_embeddings = {}
-        
-        for filename in os.listdir(ref_dir):
-            if filename.lower().endswith((".jpg", ".jpeg", ".png")):
-                path = os.path.join(ref_dir, filename)
-                img = cv2.imread(path)
-                if img is None:
-                    continue
 
+REFERENCE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "references"
+)
+REFERENCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def reference_images():
+    """List ``(label, path)`` for every image in ``assets/references``."""
+    return [
+        (reference_label(filename), os.path.join(REFERENCE_DIR, filename))
+        for filename in os.listdir(REFERENCE_DIR)
+        if filename.lower().endswith(REFERENCE_EXTENSIONS)
+    ]
+
+
+def _load_references():
+    """Stage: build the reference index, embedding only images missing from the cache.
+
+    Cached embeddings need no model, so this only waits for the model
+    stage when it meets a new or changed image.
+    """
+    global reference_index
+    with _refresh_lock:
+        index, error = _build_reference_index()
+        if index is not None:
+            reference_index = index
+    return error
+
+
+def _build_reference_index():
+    """Embed new / changed reference images and build a fresh ``ReferenceIndex``.
+
+    Returns ``(index, None)`` or ``(None, error)``.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+
+    # Only new or changed images go through the detector + embedder; the
+    # cache is keyed by the model pack and det_size actually in use
+    cache = EmbeddingCache(
+        os.path.join(project_root, "assets", "cache", "reference_embeddings.npz"),
+        ort_config.model_name(MODEL_NAME), ort_config.det_size,
+    )
+    cache.load()
+
+    reference_groups = {}
+
+    for label, path in reference_images():
+        digest = file_digest(path)
+        found, embedding = cache.get(digest)
+        if not found:
+            img = cv2.imread(path)
+            if img is None:
+                # Unreadable files are cached like face-less ones, so they
+                # do not make every boot wait for the model
+                embedding = None
+            else:
+                stage_events["model"].wait()
+                if not stage_ok["model"]:
+                    return None, FaceRecognitionError.MODEL_LOAD_FAILED
                 faces = app.get(img)
-                if len(faces) == 0:
-                    continue
-
-                embedding = normalize(faces[0].embedding)
-                label = os.path.splitext(filename)[0]
-                label = re.sub(r'\d+$', '', label)
-                label = re.sub(r'[^A-Za-z0-9_\-]', '_', label)
-                label = label.capitalize()  # Capitalize first character
-
-                if label not in reference_embeddings:
-                    reference_embeddings[label] = []
-                reference_embeddings[label].append(embedding)
-
-        for label in reference_embeddings:
-            reference_embeddings[label] = np.array(reference_embeddings[label])
-
-        
-        # Pre-initialize camera 
-        global_camera = _initialize_camera_robust()
-        if global_camera is not None and global_camera.isOpened():
-            camera_ready = True
-        else:
-            camera_ready = False
-        
-        preloading_complete = True
+                embedding = faces[0].embedding if len(faces) else None
+            cache.put(digest, embedding)
+
+        if embedding is None:
+            continue
 
+        if label not in reference_groups:
+            reference_groups[label] = []
+        reference_groups[label].append(embedding)
+
+    index = ReferenceIndex.from_groups(reference_groups)
+
+    if cache.dirty:
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"Could not write embedding cache: {e}")
+    return index, None
+
+
+def _open_camera():
+    """Stage: open the camera and start the always-on capture service.
+
+    The service keeps retrying in the background when no camera is found.
+    """
+    ok = capture_service.open()
+    capture_service.start()
+    return None if ok else FaceRecognitionError.CAMERA_ERROR
+
+
+def load_recognition():
+    """Load the model and reference index only (no camera) — for offline tools.
+
+    Returns SUCCESS, or the failing stage's error.
+    """
+    global ort_config
+    ort_config = ort_tuning.load_config()
+    for name in ("model", "references"):
+        stage_events[name].clear()
+        stage_ok[name] = False
+    _run_stage("model", _load_model)
+    _run_stage("references", _load_references)
+    for name in ("model", "references"):
+        if not stage_ok[name]:
+            return stage_errors.get(name, FaceRecognitionError.PRELOAD_FAILED)
+    return FaceRecognitionError.SUCCESS
+
+
+def preload_everything(on_stage=None):
+    """Preload model, reference embeddings, and camera concurrently.
+
+    The camera probing overlaps the model load, and references found in
+    the embedding cache are indexed without waiting for the model.
+    ``preloading_complete`` is set as soon as the model and references
+    are ready (before their ``on_stage`` calls); this call still returns
+    only after every stage finished.
+
+    Parameters
+    ----------
+    on_stage : callable(stage: str, ok: bool, seconds: float) or None
+        Called from the stage's worker thread as each stage finishes.
+
+    Returns
+    -------
+    FaceRecognitionError
+        SUCCESS when recognition is usable (a missing camera is reported
+        through the camera stage, as before), otherwise the first model /
+        references error.
+    """
+    global ort_config
+    ort_config = ort_tuning.load_config()
+
+    for name in PRELOAD_STAGES:
+        stage_events[name].clear()
+        stage_ok[name] = False
+    stage_timings.clear()
+    stage_errors.clear()
+
+    workers = [
+        threading.Thread(target=_run_stage, args=(name, func, on_stage), daemon=True)
+        for name, func in (("model", _load_model), ("camera", _open_camera))
+    ]
+    for t in workers:
+        t.start()
+
+    _run_stage("references", _load_references, on_stage)
+    for t in workers:
+        t.join()
+
+    if stage_ok["model"] and stage_ok["references"]:
+        reference_watcher.start()
         return FaceRecognitionError.SUCCESS
-        
-    except FileNotFoundError as e:
-        print(f"Preloading failed: {e}")
-        if "references" in str(e):
-            print(FaceRecognitionError.REFERENCE_FOLDER_ERROR)
-            return FaceRecognitionError.REFERENCE_FOLDER_ERROR
-        print(FaceRecognitionError.PRELOAD_FAILED)
-        return FaceRecognitionError.PRELOAD_FAILED
-    except Exception as e:
-        print(f"Preloading failed: {e}")
-        print(FaceRecognitionError.PRELOAD_FAILED)
-        return FaceRecognitionError.PRELOAD_FAILED
+    if not stage_ok["model"]:
+        result = FaceRecognitionError.MODEL_LOAD_FAILED
+    else:
+        result = stage_errors.get("references", FaceRecognitionError.PRELOAD_FAILED)
+    print(result)
+    return result
 
 
 def reinitialize_camera():
-    """Reinitialize the camera when it becomes available again"""
-    global global_camera, camera_ready
+    """Ask the capture service to reconnect now; returns True once the camera is up."""
     try:
-        # Clean up old camera reference
-        if global_camera is not None:
-            global_camera.release()
-        
-        # Try to create new camera connection using robust method
-        global_camera = _initialize_camera_robust()
-        if global_camera is not None and global_camera.isOpened():
-            camera_ready = True
-            return True
-        else:
-            global_camera = None
-            camera_ready = False
-            return False
+        return capture_service.reconnect_now()
     except Exception as e:
         print(f"Camera reinitialization error: {e}")
-        global_camera = None
-        camera_ready = False
         return False
 
 def cleanup_camera():
-    """Cleanup the global camera"""
-    global global_camera, camera_ready
+    """Stop the capture service and release the camera"""
     try:
-        if global_camera is not None and global_camera.isOpened():
-            global_camera.release()
-            global_camera = None
-            camera_ready = False
-
+        capture_service.stop()
     except Exception as e:
         print(f"Error releasing camera: {e}")
 
@@ -238,31 +858,162 @@ def safe_exit(cap=None):
 
 
 def quick_detect():
-    """Ultra-fast detection using preloaded model and camera"""
-    global app, reference_embeddings, preloading_complete, camera_ready, global_camera  # pylint: disable=global-variable-not-assigned
+    """Ultra-fast detection using preloaded model and the always-on capture service"""
+    global app, reference_index, preloading_complete  # pylint: disable=global-variable-not-assigned
     
     if not preloading_complete:
         print("System not ready, please wait...")
         return []
     
-    if not camera_ready:
+    # Recognition can be ready before the camera stage finishes probing
+    stage_events["camera"].wait(timeout=CAMERA_STAGE_WAIT)
+    if not capture_service.connected:
         if reinitialize_camera():
             print("Camera reconnected")
         else:
             print(f"Camera reinitialization failed: {FaceRecognitionError.CAMERA_ERROR}")
             return FaceRecognitionError.CAMERA_ERROR
 
-    result = _run_detection_with_preloaded_camera()
-    
-    # If camera error occurred, try to reinitialize for next time
-    if isinstance(result, FaceRecognitionError) and result == FaceRecognitionError.CAMERA_ERROR:
-        reinitialize_camera()
-    
-    return result
+    # The capture service already holds a fresh frame — no warm-up read needed
+    with metrics.timer("recognition.scan_ms"):
+        return _detect_loop(capture_service)
+
+
+def _distance_to_confidence(dist, max_dist=2.0):
+    return max(0.0, min(1.0, 1.0 - dist / max_dist))
+
+
+latency_observers = []  # callables(stage: str, seconds: float) — e.g. the benchmark
+
+
+def _observe_latency(stage, seconds):
+    metrics.histogram(f"recognition.{stage}_ms").observe(1000 * seconds)
+    for observer in latency_observers:
+        observer(stage, seconds)
+
+
+# Two-stage path for high-resolution cameras: detect on a downscaled copy
+# (preallocated buffer), then embed from a zero-copy crop of the full frame.
+DETECT_MAX_SIDE = 640  # frames with a longer side are downscaled for detection
+CROP_MARGIN = 0.6      # crop margin around a box, as a fraction of its size
+
+
+class _DetectScaler:
+    """Reusable downscale buffer for the detector (recognition-worker thread only)."""
+
+    def __init__(self):
+        self._buf = None
+
+    def prepare(self, frame):
+        """Return ``(detector_input, scale)``; *frame* itself when it is small enough."""
+        h, w = frame.shape[:2]
+        long_side = max(h, w)
+        if long_side <= DETECT_MAX_SIDE:
+            return frame, 1.0
+        scale = DETECT_MAX_SIDE / long_side
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        shape = (size[1], size[0]) + frame.shape[2:]
+        if self._buf is None or self._buf.shape != shape or self._buf.dtype != frame.dtype:
+            self._buf = np.empty(shape, dtype=frame.dtype)
+        cv2.resize(frame, size, dst=self._buf, interpolation=cv2.INTER_AREA)
+        return self._buf, scale
+
+
+_detect_scaler = _DetectScaler()
+
+
+def _detect_faces(frame):
+    """Run only the detector on *frame* (downscaled first when it is large).
+
+    Boxes and keypoints are returned in full-frame coordinates.  Returns
+    ``(faces, embedded)``; *embedded* is True when the model has no
+    separate detection / recognition models and ``app.get`` already
+    embedded every face.
+    """
+    det_model = getattr(app, 'det_model', None)
+    rec_model = getattr(app, 'models', {}).get('recognition')
+    if det_model is None or rec_model is None:
+        return app.get(frame), True
+
+    small, scale = _detect_scaler.prepare(frame)
+    bboxes, kpss = det_model.detect(small, max_num=0, metric='default')
+    if scale != 1.0:
+        bboxes[:, 0:4] /= scale
+        if kpss is not None:
+            kpss = kpss / scale
+    faces = []
+    for i in range(bboxes.shape[0]):
+        kps = kpss[i] if kpss is not None else None
+        faces.append(Face(bbox=bboxes[i, 0:4], kps=kps, det_score=bboxes[i, 4]))
+    return faces, False
+
+
+def _embed_face(frame, face):
+    """Run the recognition model for one detected face (sets ``face.embedding``).
+
+    The aligner only needs the area around the face, so it is given a
+    numpy view of the full-resolution frame (no copy) with the keypoints
+    shifted into the crop's coordinates.
+    """
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = face.bbox[:4]
+    mx, my = (x2 - x1) * CROP_MARGIN, (y2 - y1) * CROP_MARGIN
+    left, top = max(0, int(x1 - mx)), max(0, int(y1 - my))
+    right, bottom = min(w, int(np.ceil(x2 + mx))), min(h, int(np.ceil(y2 + my)))
+    if face.kps is None or right <= left or bottom <= top:
+        app.models['recognition'].get(frame, face)
+        return face.embedding
+
+    crop = frame[top:bottom, left:right]
+    offset = np.array([left, top], dtype=np.float32)
+    cropped = Face(bbox=face.bbox - np.tile(offset, 2), kps=face.kps - offset,
+                   det_score=face.det_score)
+    app.models['recognition'].get(crop, cropped)
+    face.embedding = cropped.embedding
+    return face.embedding
+
+
+def _track_and_recognize(frame, tracker):
+    """Detect faces, embed only the tracks that need it, and match them in one matmul.
+
+    Returns a list of ``(box, name, confidence)`` tuples, one per face;
+    *name* stays "Unknown" until the face's track has confirmed an identity.
+    """
+    index = reference_index   # one index per frame, even if enrollment swaps it meanwhile
+    start = time.perf_counter()
+    faces, embedded = _detect_faces(frame)
+    _observe_latency("detect", time.perf_counter() - start)
+    if not faces:
+        tracker.associate([])
+        return []
+
+    tracks = tracker.associate([face.bbox for face in faces])
+    todo = [(face, track) for face, track in zip(faces, tracks) if track.needs_embedding]
+    for face, track in zip(faces, tracks):
+        tracker.note_embedding(reused=not track.needs_embedding)
+    metrics.counter("recognition.embeddings_computed").inc(len(todo))
+    metrics.counter("recognition.embeddings_reused").inc(len(faces) - len(todo))
+
+    if todo:
+        start = time.perf_counter()
+        embeddings = np.stack([
+            face.embedding if embedded else _embed_face(frame, face) for face, _ in todo
+        ])
+        mid = time.perf_counter()
+        matches = index.match(embeddings, threshold=MATCH_THRESHOLD)
+        _observe_latency("embed", mid - start)
+        _observe_latency("match", time.perf_counter() - mid)
+        for (face, track), embedding, (name, dist) in zip(todo, embeddings, matches):
+            track.record(embedding, name, dist)
+
+    return [
+        (face.bbox.astype(int), track.identity or "Unknown", _distance_to_confidence(track.distance))
+        for face, track in zip(faces, tracks)
+    ]
 
 
 def main():
-    global app, reference_embeddings, preloading_complete  # pylint: disable=global-variable-not-assigned
+    global app, reference_index, preloading_complete  # pylint: disable=global-variable-not-assigned
 
     # If not preloaded, do it now (slower)
     if not preloading_complete:
@@ -275,265 +1026,327 @@ def main():
     return _run_detection()
 
 
-def _run_detection_with_preloaded_camera():
-    """Ultra-fast detection using preloaded camera"""
-    global app, reference_embeddings, global_camera  # pylint: disable=global-variable-not-assigned
-    
-    def normalize(emb):
-        return emb / np.linalg.norm(emb)
-
-    def distance_to_confidence(dist, max_dist=2.0):
-        return max(0.0, min(1.0, 1.0 - dist / max_dist))
-    
-    THRESHOLD = 1
-
-    def recognize_face(face_embedding):
-        best_match = None
-        best_score = float("inf")
-        for label, embeddings in reference_embeddings.items():
-            distances = np.linalg.norm(embeddings - face_embedding, axis=1)
-            score = np.min(distances)
-            if score < best_score:
-                best_score = score
-                best_match = label
-        if best_score < THRESHOLD:
-            return best_match, best_score
+# ---------------------------------------------------------------------------
+# Recognition worker: one persistent thread fed through a latest-frame-wins
+# slot.  Capture never waits on inference and nothing sleep-polls — both
+# sides block on a Condition until there is something new.
+# ---------------------------------------------------------------------------
+MAX_DETECT_SECONDS = 15  # Timeout to prevent infinite hang
+
+
+class LatestSlot:
+    """Single-item handoff between threads where a newer item replaces an unread one.
+
+    Parameters
+    ----------
+    name : str or None
+        When given, items replaced before anyone read them are counted in
+        the ``<name>.dropped`` metric.
+    """
+
+    def __init__(self, name=None):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._read_seq = 0
+        self._closed = False
+        self._drops = metrics.counter(f"{name}.dropped") if name else None
+
+    @property
+    def seq(self):
+        """Sequence number of the most recent ``put`` (0 before the first)."""
+        with self._cond:
+            return self._seq
+
+    def put(self, item):
+        """Publish *item*, replacing any unread one; returns its sequence number."""
+        with self._cond:
+            if self._drops is not None and self._seq > self._read_seq:
+                self._drops.inc()
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def get(self, after=0, timeout=None):
+        """Block until an item newer than sequence *after* exists.
+
+        Returns ``(seq, item)``, or ``(after, None)`` on timeout or close.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after or self._closed, timeout)
+            if self._seq <= after:
+                return after, None
+            self._read_seq = self._seq
+            return self._seq, self._item
+
+    def close(self):
+        """Wake every waiter; subsequent ``get`` calls return immediately."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class RecognitionWorker:
+    """Persistent recognition thread shared by every detection call.
+
+    ``submit`` drops a frame into the frame slot; the worker always takes
+    the newest frame, runs detection + matching, and publishes
+    ``(frame_seq, results)`` to the result slot.
+    """
+
+    def __init__(self):
+        self.frames = LatestSlot("recognition.frames")
+        self.results = LatestSlot()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.inferences = 0
+        self.infer_seconds = 0.0    # total time spent in detector + embedder
+        self.tracker = FaceTracker()
+        self._reset_tracks = False
+
+    def ensure_started(self):
+        """Start the worker thread on first use (or after it was stopped)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self.frames.closed:
+                    self.frames = LatestSlot("recognition.frames")
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+
+    def reset_tracks(self):
+        """Forget every face track before the next frame (their matches must be redone)."""
+        self._reset_tracks = True
+
+    def submit(self, frame):
+        """Hand *frame* to the worker; returns the frame's sequence number."""
+        return self.frames.put(frame)
+
+    def stop(self):
+        """Stop the worker thread (it restarts on the next ``ensure_started``)."""
+        self.frames.close()
+
+    def _loop(self):
+        seen = 0
+        while True:
+            seq, frame = self.frames.get(after=seen)
+            if frame is None:
+                if self.frames.closed:
+                    return
+                continue
+            seen = seq
+            if self._reset_tracks:
+                self._reset_tracks = False
+                self.tracker.reset()
+            start = time.perf_counter()
+            try:
+                results = _track_and_recognize(frame, self.tracker)
+            except Exception as e:
+                print(f"Recognition worker error: {e}")
+                results = []
+            elapsed = time.perf_counter() - start
+            self.infer_seconds += elapsed
+            self.inferences += 1
+            metrics.histogram("recognition.inference_ms").observe(1000 * elapsed)
+            metrics.counter("recognition.frames_processed").inc()
+            self.results.put((seq, results))
+
+
+recognition_worker = RecognitionWorker()
+
+
+# ---------------------------------------------------------------------------
+# Presence gate: a downscaled grayscale difference against a slowly updated
+# background decides whether a frame is worth the detector + embedder.
+# ---------------------------------------------------------------------------
+GATE_SIZE = (64, 48)          # (w, h) the gate compares at
+GATE_PIXEL_DELTA = 18         # grey-level change that counts a pixel as changed
+GATE_MIN_CHANGED = 0.02       # fraction of changed pixels that means "someone is there"
+GATE_BACKGROUND_ALPHA = 0.05  # background learning rate per frame
+GATE_HOLD_SECONDS = 1.5       # keep passing frames this long after motion or a face
+
+
+class PresenceGate:
+    """Cheap motion / presence check run before the expensive recognition pass.
+
+    A frame passes when enough of its downscaled pixels differ from the
+    background model, when a face was seen within ``GATE_HOLD_SECONDS``
+    (so someone standing still keeps being recognised), or when the
+    caller forces it (the first frame of every scan).
+    """
+
+    def __init__(self):
+        self._small = None
+        self._gray = None
+        self._background = None     # float32 running average
+        self._hold_until = 0.0
+        self.frames = 0
+        self.passed = 0
+        self.gate_seconds = 0.0
+
+    def check(self, frame, force=False):
+        """Return True when *frame* should go through detection + embedding."""
+        start = time.perf_counter()
+        h, w = GATE_SIZE[1], GATE_SIZE[0]
+        if self._small is None or self._small.shape[2:] != frame.shape[2:]:
+            self._small = np.empty((h, w) + frame.shape[2:], dtype=frame.dtype)
+            self._gray = np.empty((h, w), dtype=np.uint8)
+        cv2.resize(frame, GATE_SIZE, dst=self._small, interpolation=cv2.INTER_AREA)
+        gray = self._small
+        if gray.ndim == 3:
+            gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        now = time.time()
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            changed = True
         else:
-            return "Unknown", best_score
-
-    # Use pre-initialized camera - but check if it's still connected
-    cap = global_camera
-    if not cap.isOpened():
-        print(f"Pre-initialized camera not available: {FaceRecognitionError.CAMERA_ERROR}")
-        return FaceRecognitionError.CAMERA_ERROR
-    
-    # Test if camera is actually working by trying to read a frame
-    test_ret, test_frame = cap.read()
-    if not test_ret:
-        print(f"Camera disconnected or not working: {FaceRecognitionError.CAMERA_DISCONNECTED}")
-        return FaceRecognitionError.CAMERA_DISCONNECTED
-
-    # Threading for processing
-    frame_queue = queue.Queue(maxsize=1)
-    result_queue = queue.Queue(maxsize=1)
-    stop_event = threading.Event()
+            diff = np.abs(gray - self._background)
+            changed = np.count_nonzero(diff > GATE_PIXEL_DELTA) >= GATE_MIN_CHANGED * diff.size
+            cv2.accumulateWeighted(gray, self._background, GATE_BACKGROUND_ALPHA)
+
+        if changed:
+            self._hold_until = now + GATE_HOLD_SECONDS
+        passed = bool(force or changed or now < self._hold_until)
+
+        self.frames += 1
+        self.passed += passed
+        self.gate_seconds += time.perf_counter() - start
+        return passed
+
+    def note_faces(self, found):
+        """Keep the gate open while faces are being detected."""
+        if found:
+            self._hold_until = time.time() + GATE_HOLD_SECONDS
+
+    def stats(self, worker=None):
+        """Hit rate and estimated CPU saved (seconds) versus recognising every frame.
+
+        Returns
+        -------
+        dict
+            ``frames``, ``passed``, ``hit_rate``, ``gate_ms``, ``infer_ms``
+            and ``cpu_saved_s`` (skipped frames x mean inference time, minus
+            the time the gate itself took).
+        """
+        worker = worker or recognition_worker
+        infer = worker.infer_seconds / worker.inferences if worker.inferences else 0.0
+        skipped = self.frames - self.passed
+        return {
+            'frames': self.frames,
+            'passed': self.passed,
+            'hit_rate': self.passed / self.frames if self.frames else 0.0,
+            'gate_ms': 1000 * self.gate_seconds / self.frames if self.frames else 0.0,
+            'infer_ms': 1000 * infer,
+            'cpu_saved_s': skipped * infer - self.gate_seconds,
+        }
+
+
+presence_gate = PresenceGate()
+
+
+def gate_stats():
+    """Presence-gate statistics accumulated since start-up (see ``PresenceGate.stats``)."""
+    return presence_gate.stats()
+
+
+def _detect_loop(capture):
+    """Feed frames from *capture* to the recognition worker until a known face is seen.
+
+    Returns the list of detected names, or CAMERA_DISCONNECTED if frames stop.
+    """
+    worker = recognition_worker
+    worker.ensure_started()
+    # Tracks carry over from a scan that ended less than TRACK_TTL ago, so a
+    # face still in front of the camera is not embedded and voted on again
+    embeds_before = worker.tracker.embeds
 
     detected_names = set()
-    known_face_detected = False
-
-    def recognition_worker():
-        while not stop_event.is_set():
-            if frame_queue.empty():
-                time.sleep(0.01)
-                continue
-            frame = frame_queue.get()
-            faces = app.get(frame)
-            results = []
-            for face in faces:
-                emb = normalize(face.embedding)
-                name, dist = recognize_face(emb)
-                confidence = distance_to_confidence(dist)
-                box = face.bbox.astype(int)
-                results.append((box, name, confidence))
-            if not result_queue.empty():
-                try:
-                    result_queue.get_nowait()
-                except Exception:
-                    pass
-            result_queue.put(results)
-            time.sleep(0.02)
-
-    thread = threading.Thread(target=recognition_worker, daemon=True)
-    thread.start()
-
-    MAX_DETECT_SECONDS = 15  # Timeout to prevent infinite hang
     start_time = time.time()
     frame_count = 0
-    last_results = []
+    first_seq = None                 # results for frames before this are from an earlier call
+    result_seq = worker.results.seq
+    frame_seq = 0
 
     try:
         while True:
             # Timeout guard
             if time.time() - start_time > MAX_DETECT_SECONDS:
                 print("Face detection timed out")
-                stop_event.set()
                 break
 
-            ret, frame = cap.read()
-            if not ret:
+            # Blocks until the capture thread publishes a newer frame, which paces this loop
+            frame_seq, _, frame = capture.read_latest(after=frame_seq, timeout=FRAME_TIMEOUT)
+            if frame is None:
                 print(f"Failed to grab frame from webcam: {FaceRecognitionError.FRAME_CAPTURE_FAILED}")
                 return FaceRecognitionError.CAMERA_DISCONNECTED
 
             frame_count += 1
-
-            if frame_queue.empty():
-                frame_queue.put(frame.copy())
-
-            if not result_queue.empty():
-                last_results = result_queue.get()
-
-            # Process detection results (headless - no visual display)
-            for box, name, confidence in last_results:
-                if name != "Unknown" and name not in detected_names:
-                    detected_names.add(name)
-                    print(f"Person detected: {name}")
-                    known_face_detected = True
+            # Only frames with something in front of the kiosk reach the recogniser;
+            # the first frame of every scan always does
+            if presence_gate.check(frame, force=first_seq is None):
+                seq = worker.submit(frame)
+                if first_seq is None:
+                    first_seq = seq
+            else:
+                metrics.counter("gate.frames_skipped").inc()
+
+            result_seq, latest = worker.results.get(after=result_seq, timeout=0)
+            if latest is not None and latest[0] >= first_seq:
+                presence_gate.note_faces(bool(latest[1]))
+                # Process detection results (headless - no visual display)
+                for box, name, confidence in latest[1]:
+                    if name != "Unknown" and name not in detected_names:
+                        detected_names.add(name)
+                        print(f"Person detected: {name}")
 
             # Clean up memory periodically
             if frame_count % 200 == 0:
-                gc.collect()
+                with metrics.timer("gc.collect_ms"):
+                    gc.collect()
 
             # Exit when face detected
-            if known_face_detected:
-                stop_event.set()
+            if detected_names:
                 break
 
-            # Small delay to prevent excessive CPU usage
-            time.sleep(0.01)
-
     except Exception as e:
         print(f"Error during webcam processing: {e}")
-    finally:
-        # Ensure thread is properly stopped
-        stop_event.set()
-        if thread.is_alive():
-            thread.join(timeout=1.0)
-        
-        # Don't release the camera - keep it for next use
-    
+
+    stats = presence_gate.stats(worker)
+    print(f"Presence gate: {stats['hit_rate']:.0%} of {stats['frames']} frames recognised, "
+          f"~{stats['cpu_saved_s']:.1f}s CPU saved; "
+          f"{worker.tracker.embeds - embeds_before} embeddings this scan")
     return list(detected_names)
 
 
-def _run_detection():
-    """Core detection logic using preloaded data"""
-    global app, reference_embeddings  # pylint: disable=global-variable-not-assigned
-    
-    # -----------------------------
-    # HELPER FUNCTIONS
-    # -----------------------------
-    def normalize(emb):
-        return emb / np.linalg.norm(emb)
-
-    def distance_to_confidence(dist, max_dist=2.0):
-        return max(0.0, min(1.0, 1.0 - dist / max_dist))
-
-    THRESHOLD = 1
-
-    def recognize_face(face_embedding):
-        best_match = None
-        best_score = float("inf")
-        for label, embeddings in reference_embeddings.items():
-            distances = np.linalg.norm(embeddings - face_embedding, axis=1)
-            score = np.min(distances)
-            if score < best_score:
-                best_score = score
-                best_match = label
-        if best_score < THRESHOLD:
-            return best_match, best_score
-        else:
-            return "Unknown", best_score
+def detect_from_capture(capture):
+    """Run the ``quick_detect`` pipeline (gate, worker, tracker) on any ``CaptureService``.
 
-    # -----------------------------
-    # THREADING SETUP
-    # -----------------------------
-    frame_queue = queue.Queue(maxsize=1)
-    result_queue = queue.Queue(maxsize=1)
-    stop_event = threading.Event()
+    Used by offline tools to replay recorded frame sources.
+    """
+    return _detect_loop(capture)
 
-    detected_names = set()
-    known_face_detected = False
 
-    def recognition_worker():
-        while not stop_event.is_set():
-            if frame_queue.empty():
-                time.sleep(0.01)
-                continue
-            frame = frame_queue.get()
-            faces = app.get(frame)
-            results = []
-            for face in faces:
-                emb = normalize(face.embedding)
-                name, dist = recognize_face(emb)
-                confidence = distance_to_confidence(dist)
-                box = face.bbox.astype(int)
-                results.append((box, name, confidence))
-            if not result_queue.empty():
-                try:
-                    result_queue.get_nowait()
-                except Exception:
-                    pass
-            result_queue.put(results)
-            time.sleep(0.02)
-
-    # -----------------------------
-    # START WEBCAM & THREAD
-    # -----------------------------
-    cap = _initialize_camera_robust()
-    if cap is None or not cap.isOpened():
-        if cap is not None:
-            safe_exit(cap)
+def _run_detection():
+    """Core detection logic using preloaded data"""
+    global app, reference_index  # pylint: disable=global-variable-not-assigned
+
+    # A private capture service for this one call; it is stopped (camera released) afterwards
+    capture = CaptureService()
+    if not capture.open():
         print(f"Webcam could not be opened: {FaceRecognitionError.CAMERA_ERROR}")
         return FaceRecognitionError.CAMERA_ERROR
 
-    thread = threading.Thread(target=recognition_worker, daemon=True)
-    thread.start()
-
-    MAX_DETECT_SECONDS = 15  # Timeout to prevent infinite hang
-    start_time = time.time()
-    frame_count = 0
-    last_results = []
-
+    capture.start()
     try:
-        while True:
-            # Timeout guard
-            if time.time() - start_time > MAX_DETECT_SECONDS:
-                print("Face detection timed out")
-                stop_event.set()
-                break
-
-            ret, frame = cap.read()
-            if not ret:
-                print(f"Failed to grab frame from webcam: {FaceRecognitionError.FRAME_CAPTURE_FAILED}")
-                safe_exit(cap)
-                return FaceRecognitionError.CAMERA_DISCONNECTED
-
-            frame_count += 1
-
-            if frame_queue.empty():
-                frame_queue.put(frame.copy())
-
-            if not result_queue.empty():
-                last_results = result_queue.get()
-
-            # Process detection results (headless - no visual display)
-            for box, name, confidence in last_results:
-                if name != "Unknown" and name not in detected_names:
-                    detected_names.add(name)
-                    print(f"Person detected: {name}")
-                    known_face_detected = True
-
-            # Clean up memory periodically
-            if frame_count % 200 == 0:
-                gc.collect()
-
-            # Exit when face detected
-            if known_face_detected:
-                stop_event.set()
-                break
-
-            # Small delay to prevent excessive CPU usage
-            time.sleep(0.01)
-
-    except Exception as e:
-        print(f"Error during webcam processing: {e}")
+        return _detect_loop(capture)
     finally:
-        # Ensure thread is properly stopped
-        stop_event.set()
-        if thread.is_alive():
-            thread.join(timeout=1.0)
-
-    safe_exit(cap)
-    return list(detected_names)
+        capture.stop()
+        print("Camera safely closed.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Medical Inventory System - Face Recognition Benchmark
+
+Replays recorded clips (video files or directories of stills) through the
+same capture -> presence gate -> recognition worker pipeline that
+``quick_detect`` uses, without a webcam or display, and reports
+time-to-first-identification, frame rates, per-stage latency percentiles
+and false accept / false reject / misidentification rates.
+
+Usage
+-----
+    python src/fr_benchmark.py clips/alice.mp4=Alice clips/visitor/=Unknown
+    python src/fr_benchmark.py --manifest clips.csv --json results.json
+
+A manifest is a CSV of ``path,label`` rows; ``Unknown`` (or an empty
+label) marks an impostor clip that should not be identified.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+
+import facial_recognition as fr
+from facial_recognition import FaceRecognitionError
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def _percentiles(samples_ms):
+    if not samples_ms:
+        return {f"p{p}": None for p in PERCENTILES}
+    values = np.percentile(samples_ms, PERCENTILES)
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, values)}
+
+
+def run_clip(path, expected, realtime=True):
+    """Replay one clip and return its result dict.
+
+    Parameters
+    ----------
+    path : str
+        Video file or image directory.
+    expected : str or None
+        Label that should be identified; None for an impostor clip.
+    realtime : bool
+        Pace frames at the clip's frame rate (like a camera) instead of
+        as fast as they decode.
+    """
+    worker = fr.recognition_worker
+    capture = fr.CaptureService(opener=fr.replay_opener(path, realtime=realtime))
+    result = {
+        'clip': path, 'expected': expected, 'identified': None, 'ttfi_s': None,
+        'elapsed_s': None, 'frames_captured': 0, 'frames_processed': 0, 'error': None,
+    }
+    if not capture.open():
+        result['error'] = f"cannot open {path}"
+        return result
+
+    # The clip's clock stops at end-of-stream (the capture disconnecting),
+    # not after the frame timeout that follows it
+    ended = []
+    capture.listeners.append(lambda connected: ended.append(time.perf_counter()) if not connected else None)
+
+    processed_before = worker.inferences
+    start = time.perf_counter()
+    capture.start()
+    try:
+        names = fr.detect_from_capture(capture)
+    finally:
+        elapsed = (min(ended[0], time.perf_counter()) if ended else time.perf_counter()) - start
+        capture.stop()
+
+    if isinstance(names, FaceRecognitionError):
+        names = []        # end of the recording before anyone was identified
+    result['elapsed_s'] = elapsed
+    result['frames_captured'] = capture.frames_captured
+    result['frames_processed'] = worker.inferences - processed_before
+    if names:
+        result['identified'] = str(names[0])
+        result['ttfi_s'] = elapsed
+    return result
+
+
+def summarize(results, latencies):
+    """Aggregate clip results and per-stage latency samples (ms).
+
+    FAR is impostor clips identified as anyone, over impostor clips; FRR is
+    genuine clips with no identification, over genuine clips; the
+    misidentification rate is genuine clips identified as someone else,
+    over genuine clips.
+    """
+    genuine = [r for r in results if r['expected'] and not r['error']]
+    impostor = [r for r in results if not r['expected'] and not r['error']]
+    false_accepts = sum(1 for r in impostor if r['identified'])
+    false_rejects = sum(1 for r in genuine if not r['identified'])
+    misidentified = sum(1 for r in genuine if r['identified'] and r['identified'] != r['expected'])
+
+    ttfi = [1000 * r['ttfi_s'] for r in genuine if r['identified'] == r['expected']]
+    elapsed = sum(r['elapsed_s'] or 0 for r in results)
+    captured = sum(r['frames_captured'] for r in results)
+    processed = sum(r['frames_processed'] for r in results)
+    return {
+        'clips': len(results),
+        'errors': sum(1 for r in results if r['error']),
+        'far': false_accepts / len(impostor) if impostor else None,
+        'frr': false_rejects / len(genuine) if genuine else None,
+        'misidentification_rate': misidentified / len(genuine) if genuine else None,
+        'ttfi_ms': _percentiles(ttfi),
+        'capture_fps': captured / elapsed if elapsed else None,
+        'processed_fps': processed / elapsed if elapsed else None,
+        'stage_ms': {stage: _percentiles(samples) for stage, samples in latencies.items()},
+        'gate': fr.gate_stats(),
+    }
+
+
+def _load_manifest(path):
+    with open(path, newline='') as f:
+        return [(row[0], row[1] if len(row) > 1 else "") for row in csv.reader(f) if row]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded clips through the face recognition pipeline.")
+    parser.add_argument("clips", nargs="*", help="PATH=LABEL pairs (LABEL 'Unknown' for impostors)")
+    parser.add_argument("--manifest", help="CSV of path,label rows")
+    parser.add_argument("--no-pace", action="store_true",
+                        help="feed frames as fast as they decode instead of at the clip frame rate")
+    parser.add_argument("--timeout", type=float, default=fr.MAX_DETECT_SECONDS,
+                        help="per-clip identification timeout in seconds")
+    parser.add_argument("--json", help="write the results and summary to this file")
+    args = parser.parse_args()
+
+    clips = []
+    for spec in args.clips:
+        path, _, label = spec.partition("=")
+        clips.append((path, label))
+    if args.manifest:
+        clips.extend(_load_manifest(args.manifest))
+    if not clips:
+        parser.error("no clips given")
+
+    fr.MAX_DETECT_SECONDS = args.timeout
+    load_start = time.perf_counter()
+    status = fr.load_recognition()
+    if status != FaceRecognitionError.SUCCESS:
+        print(status)
+        return 1
+    print(f"Model + references loaded in {time.perf_counter() - load_start:.2f}s "
+          f"({len(fr.reference_index.labels)} identities)")
+
+    latencies = {"detect": [], "embed": [], "match": []}
+    fr.latency_observers.append(
+        lambda stage, seconds: latencies.setdefault(stage, []).append(1000 * seconds)
+    )
+
+    results = []
+    for path, label in clips:
+        expected = None if label in ("", "Unknown") else label
+        r = run_clip(path, expected, realtime=not args.no_pace)
+        results.append(r)
+        if r['error']:
+            outcome = r['error']
+        elif r['identified']:
+            outcome = f"identified {r['identified']}"
+        else:
+            outcome = "no identification"
+        ttfi = f"{1000 * r['ttfi_s']:.0f} ms" if r['ttfi_s'] is not None else "-"
+        print(f"{path}: expected {expected or 'Unknown'}, {outcome}, TTFI {ttfi}, "
+              f"{r['frames_processed']}/{r['frames_captured']} frames processed")
+
+    summary = summarize(results, latencies)
+    print(json.dumps(summary, indent=2, default=float))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'summary': summary, 'clips': results}, f, indent=2, default=float)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
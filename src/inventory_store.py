@@ -0,0 +1,225 @@
+"""
+Medical Inventory System - Columnar Inventory Store
+
+NumPy-backed column arrays for the loaded inventory.  Expiry dates are
+parsed once into ordinals, amounts cast once to floats and types interned
+as integer codes, so the main-screen filters become boolean-mask
+operations and the type sort is a cached permutation.
+"""
+
+import datetime
+
+import numpy as np
+
+
+LOW_STOCK_THRESHOLD = 20
+"""int: Rows with an estimated amount at or below this count as low stock."""
+
+EXPIRING_SOON_DAYS = 30
+"""int: "Expiring Soon" covers expiry dates from today up to this many days ahead."""
+
+_NO_DATE = -1                     # exp_ord value for a missing / unparseable date
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%Y-%m-%d %H:%M:%S")
+
+
+def parse_date(d):
+    """Try common date formats and return a ``datetime.date`` or None."""
+    if not d:
+        return None
+    if isinstance(d, datetime.datetime):
+        return d.date()
+    if isinstance(d, datetime.date):
+        return d
+    s = str(d).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _to_float(value):
+    """Cast an amount to float, NaN when it is not numeric."""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+# ====================================================================== #
+# region           INVENTORY STORE                                        #
+# ====================================================================== #
+
+class InventoryStore:
+    """Column arrays for inventory rows, addressed by row key.
+
+    Each key owns a slot in the arrays.  Removing a row tombstones its
+    slot (``alive`` goes False) and the slot is reused by the next insert,
+    so deltas never shift or rebuild the other rows' columns.
+
+    Parameters
+    ----------
+    capacity : int
+        Initial number of slots; the arrays double when they fill up.
+    """
+
+    def __init__(self, capacity=64):
+        self._slot_of = {}          # key -> slot
+        self._keys = [None] * capacity
+        self._free = []             # tombstoned slots available for reuse
+        self._size = 0              # slots handed out so far (high-water mark)
+
+        self.exp_ord = np.full(capacity, _NO_DATE, dtype=np.int64)
+        self.amount = np.full(capacity, np.nan, dtype=np.float64)
+        self.type_code = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self._type_codes = {}       # lowered type -> code
+        self._type_rank = np.zeros(0, dtype=np.int32)   # code -> alphabetical rank
+        self._order = None          # cached type-sorted permutation of live slots
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key):
+        return key in self._slot_of
+
+    # -- building / maintenance --
+
+    def build(self, items):
+        """Replace the store contents with *items*: iterable of ``(key, amount, exp_date, type)``."""
+        items = list(items)
+        self.__init__(capacity=max(64, len(items)))
+        for key, amount, exp_date, type_ in items:
+            self._put(key, amount, exp_date, type_)
+
+    def upsert(self, key, amount, exp_date, type_):
+        """Insert or overwrite the columns for *key*."""
+        self._put(key, amount, exp_date, type_)
+
+    def remove(self, key):
+        """Tombstone *key*'s slot (no-op if it is not stored)."""
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self._keys[slot] = None
+        self._free.append(slot)
+        self._order = None
+
+    def _put(self, key, amount, exp_date, type_):
+        slot = self._slot_of.get(key)
+        if slot is None:
+            slot = self._free.pop() if self._free else self._next_slot()
+            self._slot_of[key] = slot
+            self._keys[slot] = key
+            self.alive[slot] = True
+            self._order = None
+
+        exp = parse_date(exp_date)
+        self.exp_ord[slot] = exp.toordinal() if exp else _NO_DATE
+        self.amount[slot] = _to_float(amount)
+        code = self._intern_type(type_)
+        if code != self.type_code[slot]:
+            self._order = None
+            self.type_code[slot] = code
+
+    def _next_slot(self):
+        if self._size == len(self._keys):
+            self._grow()
+        slot = self._size
+        self._size += 1
+        return slot
+
+    def _grow(self):
+        n = len(self._keys)
+        self._keys.extend([None] * n)
+        self.exp_ord = np.concatenate([self.exp_ord, np.full(n, _NO_DATE, dtype=np.int64)])
+        self.amount = np.concatenate([self.amount, np.full(n, np.nan)])
+        self.type_code = np.concatenate([self.type_code, np.zeros(n, dtype=np.int32)])
+        self.alive = np.concatenate([self.alive, np.zeros(n, dtype=bool)])
+
+    def _intern_type(self, type_):
+        name = str(type_).lower()
+        code = self._type_codes.get(name)
+        if code is None:
+            code = len(self._type_codes)
+            self._type_codes[name] = code
+            names = sorted(self._type_codes)
+            rank = np.empty(len(names), dtype=np.int32)
+            for r, n in enumerate(names):
+                rank[self._type_codes[n]] = r
+            self._type_rank = rank
+            self._order = None
+        return code
+
+    # -- lookups --
+
+    def mask(self, mode='All', low_only=False, type_filter=None, today=None):
+        """Boolean mask over slots for the expiry *mode*, low-stock and type filters.
+
+        Parameters
+        ----------
+        mode : str
+            ``'All'``, ``'Expired'`` or ``'Expiring Soon'``.
+        low_only : bool
+            Keep only rows at or below ``LOW_STOCK_THRESHOLD``.
+        type_filter : str or None
+            Keep only rows of this medication type (case-insensitive).
+        today : datetime.date or None
+            Reference date for the expiry filters (defaults to today).
+
+        Returns
+        -------
+        numpy.ndarray
+            ``bool`` array of length ``capacity``; dead slots are always False.
+        """
+        m = self.alive.copy()
+
+        if type_filter is not None:
+            code = self._type_codes.get(str(type_filter).lower())
+            if code is None:
+                m[:] = False
+                return m
+            m &= self.type_code == code
+
+        if low_only:
+            with np.errstate(invalid='ignore'):
+                m &= self.amount <= LOW_STOCK_THRESHOLD
+
+        if mode != 'All':
+            today = (today or datetime.date.today()).toordinal()
+            dated = self.exp_ord != _NO_DATE
+            if mode == "Expired":
+                m &= dated & (self.exp_ord < today)
+            elif mode == "Expiring Soon":
+                days = self.exp_ord - today
+                m &= dated & (days >= 0) & (days <= EXPIRING_SOON_DAYS)
+
+        return m
+
+    def slots_mask(self, keys):
+        """Boolean mask selecting the slots of *keys* (unknown keys are ignored)."""
+        m = np.zeros(len(self.alive), dtype=bool)
+        slot_of = self._slot_of
+        slots = [slot_of[k] for k in keys if k in slot_of]
+        if slots:
+            m[np.fromiter(slots, dtype=np.intp, count=len(slots))] = True
+        return m
+
+    def type_order(self):
+        """Live slots sorted by type (alphabetical, case-insensitive) — cached until the types change."""
+        if self._order is None:
+            live = np.flatnonzero(self.alive)
+            ranks = self._type_rank[self.type_code[live]]
+            self._order = live[np.argsort(ranks, kind='stable')]
+        return self._order
+
+    def ordered_keys(self, mask):
+        """Keys of the slots selected by *mask*, in type-sorted order."""
+        order = self.type_order()
+        keys = self._keys
+        return [keys[s] for s in order[mask[order]]]
+
+# endregion
@@ -9,7 +9,7 @@ Sections:
     2. Base Themed Widgets (Label, Button, Danger, Success)
     3. Numpad Widget
     4. Popups (Message, Confirm, Input, Virtual Keyboard, Choice)
-    5. Table Components (DataRow, HeaderRow)
+    5. Table Components (DataRow, InventoryRow, HeaderRow)
     6. Main Screen (Sidebar: Search/Filters/Actions | Content: Data Table)
     7. History Screen
     8. Personal Database Screen
@@ -297,6 +297,62 @@ KV = """
                 background_normal: ''
                 on_release: root.choose(None)
 
+# ------------------------------------------------------------
+# 4f. Diagnostics Popup — admin view of recognition metrics
+# ------------------------------------------------------------
+<DiagnosticsPopup>:
+    size_hint: 0.7, 0.8
+    auto_dismiss: False
+    BoxLayout:
+        orientation: 'vertical'
+        padding: dp(15)
+        spacing: dp(10)
+        canvas.before:
+            Color:
+                rgba: 0.16, 0.16, 0.18, 1
+            RoundedRectangle:
+                pos: self.pos
+                size: self.size
+                radius: [dp(12)]
+
+        # -- Report (monospace, scrollable) --
+        ScrollView:
+            Label:
+                text: root.report_text
+                font_name: 'RobotoMono-Regular'
+                font_size: dp(13)
+                size_hint_y: None
+                height: self.texture_size[1]
+                text_size: self.width, None
+                halign: 'left'
+                valign: 'top'
+
+        Label:
+            text: root.status
+            font_size: dp(13)
+            size_hint_y: None
+            height: dp(24)
+
+        # -- Refresh / Save / Close --
+        BoxLayout:
+            size_hint_y: None
+            height: dp(50)
+            spacing: dp(12)
+            ThemedButton:
+                text: 'Refresh'
+                on_release: root.refresh()
+            SuccessButton:
+                text: 'Save to File'
+                on_release: root.on_save()
+            Button:
+                text: 'Close'
+                font_size: dp(16)
+                size_hint_y: None
+                height: dp(50)
+                background_color: 0.35, 0.35, 0.35, 1
+                background_normal: ''
+                on_release: root.dismiss()
+
 # ============================================================
 # 5. TABLE COMPONENTS
 # ============================================================
@@ -313,6 +369,18 @@ KV = """
             pos: self.pos
             size: self.size
 
+# -- Inventory Row — recycled row for the virtualized inventory table --
+<InventoryRow>:
+    size_hint_y: None
+    height: dp(44)
+    spacing: dp(2)
+    canvas.before:
+        Color:
+            rgba: (0.24, 0.44, 0.65, 0.6) if self.selected else (0.17, 0.17, 0.17, 1)
+        Rectangle:
+            pos: self.pos
+            size: self.size
+
 # -- Header Row — column titles for data tables --
 <HeaderRow>:
     size_hint_y: None
@@ -458,7 +526,7 @@ KV = """
                 BoxLayout:
                     orientation: 'vertical'
                     size_hint_y: None
-                    height: dp(330)
+                    height: dp(390)
                     spacing: dp(8)
                     padding: [0, dp(6)]
 
@@ -476,6 +544,9 @@ KV = """
                     ThemedButton:
                         text: 'View History'
                         on_release: root.show_history()
+                    ThemedButton:
+                        text: 'Diagnostics'
+                        on_release: root.show_diagnostics()
                     DangerButton:
                         text: 'Quit'
                         on_release: app.stop()
@@ -507,12 +578,14 @@ KV = """
                 HeaderRow:
                     id: header_row
 
-                # -- Scrollable table body --
-                ScrollView:
-                    id: table_scroll
-                    GridLayout:
-                        id: table_body
-                        cols: 1
+                # -- Virtualized table body (widgets only for on-screen rows) --
+                RecycleView:
+                    id: table_body
+                    viewclass: 'InventoryRow'
+                    RecycleBoxLayout:
+                        orientation: 'vertical'
+                        default_size: None, dp(44)
+                        default_size_hint: 1, None
                         size_hint_y: None
                         height: self.minimum_height
                         spacing: dp(1)
@@ -20,7 +20,7 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import facial_recognition as fr
-from database import DatabaseManager
+from database import DatabaseManager, format_anomalies
 from facial_recognition import FaceRecognitionError
 
 # ============================================================================
@@ -1046,7 +1046,7 @@ class BarcodeViewer(ctk.CTk):
     #=========================================================================
     #region pattern recognition
     def pattern_rec(self):
-        self.show_error(message=self.db.pattern_recognition(), title="Pattern Recognition Result")
+        self.show_error(message=format_anomalies(self.db.pattern_recognition()), title="Pattern Recognition Result")
         pattern = ctk.CTkToplevel(self)
         pattern.title("Pattern Recognition Graph")
         pattern.update_idletasks()
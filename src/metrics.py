@@ -0,0 +1,214 @@
+"""
+Medical Inventory System - Metrics Registry
+
+In-process counters, gauges and latency histograms.  Modules record into
+the shared ``registry``; ``MainScreen`` shows ``format_report()`` in the
+admin diagnostics popup and ``dump()`` writes a JSON snapshot that can be
+compared across kiosks.
+"""
+
+import json
+import os
+import platform
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DUMP_DIR = os.path.join(_PROJECT_ROOT, "assets", "cache", "metrics")
+"""str: Default directory for ``dump`` snapshots (git-ignored, per device)."""
+
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+"""tuple: Upper bounds (ms) of the histogram buckets; an overflow bucket follows."""
+
+RECENT_SAMPLES = 1024
+"""int: Samples each histogram keeps for percentile estimates."""
+
+
+# ====================================================================== #
+# region           METRIC TYPES                                           #
+# ====================================================================== #
+
+class Counter:
+    """Monotonic count (frames captured, drops, errors...)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Last-written value (load times, queue depth...)."""
+
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """Latency distribution in milliseconds: fixed buckets plus recent samples.
+
+    The buckets cover the whole run; percentiles come from the most recent
+    ``RECENT_SAMPLES`` observations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self._recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, ms):
+        with self._lock:
+            self.count += 1
+            self.total += ms
+            self.min = ms if self.min is None else min(self.min, ms)
+            self.max = ms if self.max is None else max(self.max, ms)
+            i = 0
+            while i < len(HISTOGRAM_BUCKETS_MS) and ms > HISTOGRAM_BUCKETS_MS[i]:
+                i += 1
+            self.buckets[i] += 1
+            self._recent.append(ms)
+
+    def percentile(self, p):
+        """Approximate *p*-th percentile (0-100) of the recent samples, or None."""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        k = min(len(samples) - 1, max(0, int(round(p / 100 * (len(samples) - 1)))))
+        return samples[k]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': dict(zip([f"<={b}" for b in HISTOGRAM_BUCKETS_MS] + ["inf"], self.buckets)),
+        }
+
+# endregion
+
+
+# ====================================================================== #
+# region           REGISTRY                                               #
+# ====================================================================== #
+
+class MetricsRegistry:
+    """Named metrics, created on first use and shared by every caller."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.started = time.time()
+
+    def _get(self, name, kind):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, kind())
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metric {name!r} is a {type(metric).__name__}, not {kind.__name__}")
+        return metric
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def gauge(self, name):
+        return self._get(name, Gauge)
+
+    def histogram(self, name):
+        return self._get(name, Histogram)
+
+    @contextmanager
+    def timer(self, name):
+        """Observe the duration of the ``with`` block in histogram *name* (ms)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe(1000 * (time.perf_counter() - start))
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """``{name: value}`` for every metric, plus host / uptime metadata under ``_meta``."""
+        with self._lock:
+            items = sorted(self._metrics.items())
+        data = {name: metric.snapshot() for name, metric in items}
+        data['_meta'] = {
+            'host': socket.gethostname(),
+            'platform': platform.platform(),
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'uptime_s': time.time() - self.started,
+        }
+        return data
+
+    def dump(self, path=None):
+        """Atomically write ``snapshot()`` as JSON; returns the path written.
+
+        *path* defaults to ``DUMP_DIR/metrics_<host>_<timestamp>.json`` so
+        files from several kiosks can be collected side by side.
+        """
+        if path is None:
+            path = os.path.join(DUMP_DIR, f"metrics_{socket.gethostname()}_"
+                                          f"{time.strftime('%Y%m%d_%H%M%S')}.json")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2, default=str)
+        os.replace(tmp, path)
+        return path
+
+    def format_report(self):
+        """Human-readable, one-line-per-metric summary for the diagnostics popup."""
+        lines = []
+        for name, value in self.snapshot().items():
+            if name == '_meta':
+                continue
+            if isinstance(value, dict):
+                if not value['count']:
+                    continue
+                lines.append(f"{name}: n={value['count']} p50={value['p50']:.1f} "
+                             f"p95={value['p95']:.1f} max={value['max']:.1f} ms")
+            elif isinstance(value, float):
+                lines.append(f"{name}: {value:.3f}")
+            else:
+                lines.append(f"{name}: {value}")
+        return "\n".join(lines) if lines else "No metrics recorded yet."
+
+
+registry = MetricsRegistry()
+counter = registry.counter
+gauge = registry.gauge
+histogram = registry.histogram
+timer = registry.timer
+
+# endregion
@@ -0,0 +1,349 @@
+"""
+Medical Inventory System - ONNX Runtime Tuning
+
+Tuning surface for the InsightFace ONNX sessions: thread counts, graph
+optimisation level, execution mode, an optional INT8-quantised model
+pack, and the detector input size.  The active configuration is a small
+JSON file; ``calibrate`` times candidate configurations on the local
+reference images and saves the fastest one whose embeddings still agree
+with the default configuration's.
+
+Usage
+-----
+    python src/ort_tuning.py --calibrate            # pick + save the fastest config
+    python src/ort_tuning.py --quantize             # build the INT8 model pack only
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(_PROJECT_ROOT, "assets", "cache", "ort_tuning.json")
+"""str: Where the active tuning configuration is stored (git-ignored, per device)."""
+
+MODEL_ROOT = os.path.expanduser("~/.insightface")
+"""str: InsightFace model root (packs live in ``MODEL_ROOT/models/<name>``)."""
+
+INT8_SUFFIX = "_int8"
+"""str: Suffix of the quantised copy of a model pack."""
+
+EMBEDDING_TOLERANCE = 0.95
+"""float: Minimum cosine similarity to the default configuration's embedding for a candidate to agree."""
+
+_GRAPH_LEVELS = ("disabled", "basic", "extended", "all")
+_EXECUTION_MODES = ("sequential", "parallel")
+
+
+# ====================================================================== #
+# region           CONFIGURATION                                          #
+# ====================================================================== #
+
+class OrtConfig:
+    """One ONNX Runtime / model configuration for the face model.
+
+    Parameters
+    ----------
+    intra_op_threads : int
+        Threads used inside an operator (0 = ONNX Runtime default).
+    inter_op_threads : int
+        Threads used across operators in parallel mode (0 = default).
+    graph_optimization : str
+        ``'disabled'``, ``'basic'``, ``'extended'`` or ``'all'``.
+    execution_mode : str
+        ``'sequential'`` or ``'parallel'``.
+    quantized : bool
+        Load the INT8 copy of the model pack (see ``quantize_model_pack``).
+    det_size : tuple of int
+        Detector input size passed to ``FaceAnalysis.prepare``.
+    """
+
+    def __init__(self, intra_op_threads=0, inter_op_threads=0, graph_optimization="all",
+                 execution_mode="sequential", quantized=False, det_size=(320, 320)):
+        if graph_optimization not in _GRAPH_LEVELS:
+            raise ValueError(f"graph_optimization must be one of {_GRAPH_LEVELS}")
+        if execution_mode not in _EXECUTION_MODES:
+            raise ValueError(f"execution_mode must be one of {_EXECUTION_MODES}")
+        self.intra_op_threads = int(intra_op_threads)
+        self.inter_op_threads = int(inter_op_threads)
+        self.graph_optimization = graph_optimization
+        self.execution_mode = execution_mode
+        self.quantized = bool(quantized)
+        self.det_size = tuple(int(v) for v in det_size)
+
+    def __repr__(self):
+        return f"OrtConfig({self.to_dict()})"
+
+    def __eq__(self, other):
+        return isinstance(other, OrtConfig) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        return {
+            'intra_op_threads': self.intra_op_threads,
+            'inter_op_threads': self.inter_op_threads,
+            'graph_optimization': self.graph_optimization,
+            'execution_mode': self.execution_mode,
+            'quantized': self.quantized,
+            'det_size': list(self.det_size),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**{k: v for k, v in d.items() if k in cls().to_dict()})
+
+    def model_name(self, base_name):
+        """Model pack to load for *base_name* under this configuration."""
+        return base_name + INT8_SUFFIX if self.quantized else base_name
+
+    def session_options(self):
+        """Build the ``onnxruntime.SessionOptions`` for this configuration."""
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if self.intra_op_threads:
+            opts.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads:
+            opts.inter_op_num_threads = self.inter_op_threads
+        opts.graph_optimization_level = {
+            "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }[self.graph_optimization]
+        opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if self.execution_mode == "parallel"
+                               else ort.ExecutionMode.ORT_SEQUENTIAL)
+        return opts
+
+
+def load_config(path=CONFIG_PATH):
+    """Return the saved ``OrtConfig``, or the defaults when none is saved / it is unreadable."""
+    try:
+        with open(path) as f:
+            return OrtConfig.from_dict(json.load(f).get('config', {}))
+    except FileNotFoundError:
+        return OrtConfig()
+    except Exception as e:
+        print(f"Ignoring unreadable ORT tuning file {path}: {e}")
+        return OrtConfig()
+
+
+def save_config(config, path=CONFIG_PATH, report=None):
+    """Atomically write *config* (plus an optional calibration *report*) as JSON."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.json.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'config': config.to_dict(), 'report': report or []}, f, indent=2)
+    os.replace(tmp, path)
+
+# endregion
+
+
+# ====================================================================== #
+# region           MODEL LOADING                                          #
+# ====================================================================== #
+
+def build_face_analysis(base_name, config, providers=('CPUExecutionProvider',)):
+    """Create and prepare a ``FaceAnalysis`` whose ONNX sessions use *config*.
+
+    ``FaceAnalysis`` passes extra keyword arguments through
+    ``model_zoo.get_model`` to each model's ``InferenceSession``, so the
+    tuned ``SessionOptions`` are applied when the sessions are first built
+    and every graph is loaded and optimised once.
+    """
+    import insightface
+
+    app = insightface.app.FaceAnalysis(name=config.model_name(base_name), root=MODEL_ROOT,
+                                       providers=list(providers),
+                                       sess_options=config.session_options())
+    app.prepare(ctx_id=0, det_size=config.det_size)
+    return app
+
+
+def quantize_model_pack(base_name, root=MODEL_ROOT):
+    """Write a dynamically quantised INT8 copy of a model pack next to it.
+
+    Returns the quantised pack's name; already-quantised files are kept.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src_dir = os.path.join(root, "models", base_name)
+    dst_dir = os.path.join(root, "models", base_name + INT8_SUFFIX)
+    if not os.path.isdir(src_dir):
+        raise FileNotFoundError(f"Model pack not found: {src_dir}")
+    os.makedirs(dst_dir, exist_ok=True)
+
+    for filename in sorted(os.listdir(src_dir)):
+        src = os.path.join(src_dir, filename)
+        dst = os.path.join(dst_dir, filename)
+        if os.path.exists(dst):
+            continue
+        if filename.endswith(".onnx"):
+            quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+        else:
+            shutil.copy2(src, dst)
+    return base_name + INT8_SUFFIX
+
+# endregion
+
+
+# ====================================================================== #
+# region           CALIBRATION                                            #
+# ====================================================================== #
+
+def candidate_configs(cpu_count=None, include_quantized=True):
+    """A small grid of configurations worth timing on this machine."""
+    cpus = cpu_count or os.cpu_count() or 1
+    threads = sorted({1, max(1, cpus // 2), cpus})
+    configs = []
+    for det in ((320, 320), (256, 256), (160, 160)):
+        for intra in threads:
+            for quantized in ((False, True) if include_quantized else (False,)):
+                configs.append(OrtConfig(intra_op_threads=intra, det_size=det, quantized=quantized))
+    configs.append(OrtConfig(intra_op_threads=cpus, execution_mode="parallel",
+                             inter_op_threads=max(1, cpus // 2)))
+    return configs
+
+
+def calibrate(base_name, references, configs=None, accuracy_floor=1.0, repeats=3,
+              tolerance=EMBEDDING_TOLERANCE):
+    """Time *configs* on the reference images and return the fastest faithful one.
+
+    A configuration is judged against the default configuration rather
+    than by matching the references to themselves: its agreement is the
+    fraction of images the default configuration finds a face in for which
+    the candidate also finds one whose embedding has cosine similarity of
+    at least *tolerance* with the default's.  Images the default
+    configuration finds no face in are left out of the score.
+
+    Parameters
+    ----------
+    base_name : str
+        InsightFace model pack (e.g. ``"buffalo_sc"``).
+    references : list of tuple
+        ``(label, image)`` pairs; images are BGR arrays.
+    configs : list of OrtConfig or None
+        Candidates (defaults to ``candidate_configs()``).
+    accuracy_floor : float
+        Minimum agreement a configuration needs to be eligible.
+    repeats : int
+        Timed passes over the references per configuration.
+    tolerance : float
+        Minimum cosine similarity to the default configuration's embedding.
+
+    Returns
+    -------
+    tuple
+        ``(best_config, report)`` — *report* lists one dict per candidate
+        (``config``, ``median_ms``, ``agreement``, ``min_cosine``, ``error``).
+        *best_config* is the default configuration when no candidate
+        qualifies.
+    """
+    import numpy as np
+
+    def unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    configs = configs or candidate_configs()
+    baseline = build_face_analysis(base_name, OrtConfig())
+    expected = []       # (image index, unit embedding from the default configuration)
+    for i, (_, img) in enumerate(references):
+        faces = baseline.get(img)
+        if faces:
+            expected.append((i, unit(faces[0].embedding)))
+    del baseline
+    if not expected:
+        print("No face found in any reference image with the default configuration; keeping the default")
+        return OrtConfig(), []
+
+    int8_dir = os.path.join(MODEL_ROOT, "models", base_name + INT8_SUFFIX)
+    if any(c.quantized for c in configs) and not os.path.isdir(int8_dir):
+        try:
+            quantize_model_pack(base_name)
+        except Exception as e:
+            print(f"INT8 quantisation unavailable, skipping quantised candidates: {e}")
+            configs = [c for c in configs if not c.quantized]
+
+    report = []
+    best, best_ms = None, float("inf")
+    for config in configs:
+        entry = {'config': config.to_dict(), 'median_ms': None, 'agreement': None,
+                 'min_cosine': None, 'error': None}
+        report.append(entry)
+        try:
+            app = build_face_analysis(base_name, config)
+            app.get(references[0][1])   # warm-up
+            times, embeddings = [], {}
+            for r in range(repeats):
+                for i, (_, img) in enumerate(references):
+                    start = time.perf_counter()
+                    faces = app.get(img)
+                    times.append(1000 * (time.perf_counter() - start))
+                    if r == 0 and faces:
+                        embeddings[i] = unit(faces[0].embedding)
+            cosines = [float(embeddings[i] @ e) if i in embeddings else 0.0 for i, e in expected]
+            entry['median_ms'] = statistics.median(times)
+            entry['agreement'] = sum(c >= tolerance for c in cosines) / len(expected)
+            entry['min_cosine'] = min(cosines)
+        except Exception as e:
+            entry['error'] = str(e)
+            continue
+
+        print(f"{config}: {entry['median_ms']:.1f} ms/image, agreement {entry['agreement']:.0%} "
+              f"(min cosine {entry['min_cosine']:.3f})")
+        if entry['agreement'] >= accuracy_floor and entry['median_ms'] < best_ms:
+            best, best_ms = config, entry['median_ms']
+
+    if best is None:
+        print(f"No configuration reached {accuracy_floor:.0%} agreement with the default "
+              f"(cosine >= {tolerance}); keeping the default")
+    return best or OrtConfig(), report
+
+# endregion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune ONNX Runtime for the face model.")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="time candidate configs on assets/references and save the fastest")
+    parser.add_argument("--quantize", action="store_true",
+                        help="build the INT8 copy of the model pack")
+    parser.add_argument("--accuracy-floor", type=float, default=1.0,
+                        help="minimum fraction of references whose embedding must agree with "
+                             "the default configuration's (default 1.0)")
+    parser.add_argument("--tolerance", type=float, default=EMBEDDING_TOLERANCE,
+                        help=f"minimum cosine similarity that counts as agreeing (default {EMBEDDING_TOLERANCE})")
+    parser.add_argument("--no-int8", action="store_true", help="skip quantised candidates")
+    args = parser.parse_args()
+
+    import cv2
+    import facial_recognition as fr
+
+    if args.quantize:
+        print(f"Wrote model pack {quantize_model_pack(fr.MODEL_NAME)}")
+    if args.calibrate:
+        references = []
+        for label, path in fr.reference_images():
+            img = cv2.imread(path)
+            if img is not None:
+                references.append((label, img))
+        if not references:
+            parser.error("no reference images found")
+        best, report = calibrate(
+            fr.MODEL_NAME, references,
+            configs=candidate_configs(include_quantized=not args.no_int8),
+            accuracy_floor=args.accuracy_floor, tolerance=args.tolerance,
+        )
+        save_config(best, report=report)
+        print(f"Saved {best} to {CONFIG_PATH}")
+    if not (args.quantize or args.calibrate):
+        print(load_config())
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ from kivy.uix.label import Label
 from kivy.uix.screenmanager import Screen
 from kivy.metrics import dp
 
-from database import DatabaseManager
+from database import DatabaseManager, format_anomalies
 from widgets import MessagePopup, DataRow
 
 
@@ -72,7 +72,7 @@ class HistoryScreen(Screen):
         """Run the anomaly-detection algorithm and show results in a popup."""
         try:
             result = self.db.pattern_recognition()
-            MessagePopup(title='Pattern Recognition', message=str(result)).open()
+            MessagePopup(title='Pattern Recognition', message=format_anomalies(result)).open()
         except Exception as e:
             MessagePopup(title='Error', message=str(e)).open()
 
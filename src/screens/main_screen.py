@@ -21,12 +21,15 @@ from kivy.uix.button import Button
 from kivy.uix.dropdown import DropDown
 
 import facial_recognition as fr
+import metrics
 from database import DatabaseManager
 from facial_recognition import FaceRecognitionError
 from constants import COLUMNS, REFRESH_INTERVAL, ADMIN_CODE
+from inventory_store import InventoryStore
+from search_index import InventorySearchIndex
 from widgets import (
     MessagePopup, ConfirmPopup, InputPopup,
-    ChoicePopup, VirtualKeyboardPopup, DataRow,
+    ChoicePopup, VirtualKeyboardPopup, DiagnosticsPopup,
 )
 
 
@@ -41,13 +44,16 @@ class MainScreen(Screen):
         """Set up DB handle, empty row cache, FR flags, and schedule UI init."""
         super().__init__(**kwargs)
         self.db = DatabaseManager()
-        self._all_rows = []
+        self._rows = {}                   # (barcode, drug) -> raw DB row
+        self._inventory_cursor = None     # history.id the cached rows are current to
         self.fr_ready = False
         self.camera_ready = False
         self.visible_columns = {col_id: True for col_id, _, _ in COLUMNS}
         self._filter_trigger = None
-        self._last_row_hash = None
-        self._row_cache = {}
+        self._row_cache = {}              # (barcode, drug) -> RecycleView data dict
+        self._selected_keys = set()
+        self._search = InventorySearchIndex()   # rebuilt per load, patched per delta
+        self._store = InventoryStore()          # filter columns, same lifecycle as _search
         self._current_keys = []
         self._type_filter = None          # None = show all, str = filter by type
         Clock.schedule_once(self._init_ui, 0)
@@ -61,7 +67,6 @@ class MainScreen(Screen):
         self._build_header()
         self.table_view_filters()
         self._start_preloading()
-        self._start_camera_monitor()
         self.load_data()
         Clock.schedule_interval(self._bg_load_data, REFRESH_INTERVAL)
 
@@ -95,7 +100,7 @@ class MainScreen(Screen):
             column_filters.add_widget(MainScreen._column_separator())
 
     def _toggle_column(self, col_id, visible):
-        """Show or hide a column — just toggles size/opacity, no widget tree changes."""
+        """Show or hide a column — recycled rows just collapse the hidden cells."""
         self.visible_columns[col_id] = visible
         self._build_header()
         self._update_row_displays()
@@ -197,114 +202,179 @@ class MainScreen(Screen):
     # ================================================================== #
 
     def load_data(self):
-        """Synchronous initial load (called once at startup and after mutations)."""
+        """Synchronous full load (called once at startup, or when the change cursor is lost)."""
         try:
-            self._all_rows = list(self.db.pull_data("drugs_in_inventory"))
+            cursor, rows = self.db.pull_inventory_snapshot()
         except Exception as e:
             print(f"Error loading data: {e}")
-            self._all_rows = []
-        self._last_row_hash = hash(tuple(tuple(r) for r in self._all_rows))
+            cursor, rows = None, []
+        self._inventory_cursor = cursor
+        self._rows = {self._row_key(r): r for r in rows if len(r) >= 7}
         self._row_cache.clear()
+        self._selected_keys &= set(self._rows)
         self._current_keys = []
+        self._search.build(
+            (key, self._search_fields(row), row[1]) for key, row in self._rows.items()
+        )
+        self._store.build(
+            (key, row[2], row[3], row[4]) for key, row in self._rows.items()
+        )
         self._sync_cache()
         self._apply_filters_now()
 
+    def refresh_changes(self):
+        """Synchronously pull and patch rows changed since the last load (after mutations)."""
+        base = self._inventory_cursor
+        try:
+            delta = self._pull_changes(base)
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return
+        if delta is None:
+            self.load_data()
+        else:
+            self._apply_delta(base, *delta)
+
+    def _pull_changes(self, base):
+        """Return ``(cursor, upserts, deleted)`` since cursor *base*, or None if a full load is needed."""
+        if base is None:
+            return None
+        return self.db.pull_inventory_changes(base)
+
     def _bg_load_data(self, dt):
-        """Pull data from DB in a background thread to avoid blocking the UI."""
+        """Pull only changed rows in a background thread to avoid blocking the UI.
+
+        The worker never touches the cache or the cursor itself: results are
+        handed back to the main thread, tagged with the cursor they were
+        pulled from, so a synchronous refresh in between makes them stale.
+        """
+        base = self._inventory_cursor
+
         def worker():
             try:
-                rows = list(self.db.pull_data("drugs_in_inventory"))
+                delta = self._pull_changes(base)
             except Exception as e:
                 print(f"Error loading data: {e}")
-                rows = []
-
-            row_hash = hash(tuple(tuple(r) for r in rows))
-            if row_hash == self._last_row_hash:
                 return
-            self._last_row_hash = row_hash
-
-            def update(dt):
-                self._all_rows = rows
-                self._row_cache.clear()
-                self._current_keys = []
-                self._sync_cache()
-                self._apply_filters_now()
 
-            Clock.schedule_once(update, 0)
+            if delta is None:
+                Clock.schedule_once(lambda dt: self._reload_if_current(base), 0)
+            else:
+                Clock.schedule_once(lambda dt: self._apply_delta(base, *delta), 0)
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def _sync_cache(self):
-        """Create DataRow widgets with ALL column labels pre-attached."""
-        for row in self._all_rows:
-            try:
-                drug, barcode, est_amount = row[0], row[1], row[2]
-                exp_date_raw, type_, dose_size, item_loc = row[3], row[4], row[5], row[6]
-            except (IndexError, ValueError):
-                continue
+    def _reload_if_current(self, base):
+        """Full load requested by a background pull, unless the cache moved on meanwhile."""
+        if base == self._inventory_cursor:
+            self.load_data()
+
+    def _apply_delta(self, base, cursor, upserts, deleted):
+        """Patch changed rows into the cache — untouched rows are left alone.
+
+        A delta pulled from a cursor other than the current one is dropped:
+        the cache has already been refreshed past it.  Rows the pull re-reads
+        from its overlap window usually match the cache and are skipped.
+        """
+        if base != self._inventory_cursor:
+            return
+        self._inventory_cursor = cursor
+        deleted = [key for key in deleted if key in self._rows]
+        upserts = [row for row in upserts
+                   if len(row) >= 7 and self._rows.get(self._row_key(row)) != tuple(row)]
+        if not upserts and not deleted:
+            return
+
+        for key in deleted:
+            self._rows.pop(key, None)
+            self._row_cache.pop(key, None)
+            self._selected_keys.discard(key)
+            self._search.remove(key)
+            self._store.remove(key)
+
+        for row in upserts:
+            key = self._row_key(row)
+            self._rows[key] = row
+            self._search.add(key, self._search_fields(row), row[1])
+            self._store.upsert(key, row[2], row[3], row[4])
+            full = self._full_row(row)
+            item = self._row_cache.get(key)
+            if item is None:
+                self._row_cache[key] = self._make_row(key, full)
+            else:
+                item['row_data'] = list(full)
+
+        self._apply_filters_now(force=True)
+
+    def _patch_amount(self, barcode, drug, amount):
+        """Set one row's amount from a write's result — no query needed.
+
+        The change cursor is left alone; the next background poll re-reads
+        this barcode along with anything other kiosks changed.
+        """
+        key = (barcode, drug)
+        row = self._rows.get(key)
+        if row is None:
+            self.refresh_changes()
+            return
+        row = (row[0], row[1], amount) + tuple(row[3:])
+        self._rows[key] = row
+        self._store.upsert(key, row[2], row[3], row[4])
+        item = self._row_cache.get(key)
+        if item is not None:
+            item['row_data'] = list(self._full_row(row))
+        self._apply_filters_now(force=True)
+
+    @staticmethod
+    def _row_key(row):
+        """Cache key for a ``drugs_in_inventory`` row: ``(barcode, drug)``."""
+        return (row[1], row[0])
+
+    @staticmethod
+    def _search_fields(row):
+        """Fields the search box matches against: type, drug, barcode, dose, location."""
+        return (row[4], row[0], row[1], row[5], row[6])
 
-            full = (type_, drug, barcode, est_amount, exp_date_raw, dose_size, item_loc)
-            key = (barcode, drug)
+    @staticmethod
+    def _full_row(row):
+        """Reorder a DB row into COLUMNS order: (type, drug, barcode, amt, exp, dose, location)."""
+        drug, barcode, est_amount = row[0], row[1], row[2]
+        exp_date_raw, type_, dose_size, item_loc = row[3], row[4], row[5], row[6]
+        return (type_, drug, barcode, est_amount, exp_date_raw, dose_size, item_loc)
 
+    def _sync_cache(self):
+        """Create a RecycleView data dict for every row that lacks one."""
+        for key, row in self._rows.items():
             if key not in self._row_cache:
-                dr = DataRow(())
-                dr.row_data = list(full)
-                dr._full = full
-                dr._col_labels = {}
-                dr._col_seps = {}
-
-                for i, (cid, _, _) in enumerate(COLUMNS):
-                    lbl = Label(
-                        text=str(full[i]),
-                        font_size=dp(14),
-                        halign='left',
-                        valign='middle',
-                        padding=(dp(4), 0),
-                    )
-                    lbl.bind(size=lbl.setter('text_size'))
-                    dr._col_labels[cid] = lbl
-                    dr._col_seps[cid] = self._column_separator()
-
-                    dr.add_widget(dr._col_seps[cid])
-                    dr.add_widget(lbl)
-
-                # Remove the first separator (no separator before first column)
-                first_cid = COLUMNS[0][0]
-                dr.remove_widget(dr._col_seps[first_cid])
-
-                self._row_cache[key] = dr
+                self._row_cache[key] = self._make_row(key, self._full_row(row))
+
+    def _make_row(self, key, full):
+        """Build the data dict an ``InventoryRow`` is bound to while on screen."""
+        return {
+            'key': key,
+            'row_data': list(full),
+            'selected': key in self._selected_keys,
+            'visible': self._visible_flags(),
+            'on_select': self._on_row_select,
+        }
+
+    def _on_row_select(self, key, selected):
+        """InventoryRow tap callback — selection lives here, not on the recycled widget."""
+        if selected:
+            self._selected_keys.add(key)
+        else:
+            self._selected_keys.discard(key)
 
-        self._update_row_displays()
+    def _visible_flags(self):
+        """Tuple of per-column visibility flags in COLUMNS order."""
+        return tuple(self.visible_columns.get(cid, True) for cid, _, _ in COLUMNS)
 
     def _update_row_displays(self):
-        """Show/hide individual labels and separators using size + opacity.
-        No add_widget / remove_widget / clear_widgets calls."""
-        for dr in self._row_cache.values():
-            first_visible = True
-            for cid, _, _ in COLUMNS:
-                lbl = dr._col_labels[cid]
-                sep = dr._col_seps[cid]
-                visible = self.visible_columns.get(cid, True)
-
-                if visible:
-                    lbl.size_hint_x = 1
-                    lbl.opacity = 1
-                    if first_visible:
-                        sep.size_hint_x = None
-                        sep.width = 0
-                        sep.opacity = 0
-                        first_visible = False
-                    else:
-                        sep.size_hint_x = None
-                        sep.width = dp(1)
-                        sep.opacity = 1
-                else:
-                    lbl.size_hint_x = None
-                    lbl.width = 0
-                    lbl.opacity = 0
-                    sep.size_hint_x = None
-                    sep.width = 0
-                    sep.opacity = 0
+        """Push the current column visibility into every row and redraw on-screen rows."""
+        visible = self._visible_flags()
+        for item in self._row_cache.values():
+            item['visible'] = visible
+        self.ids.table_body.refresh_from_data()
 
     def _schedule_filter(self, *args):
         """Debounce filter requests — wait 0.1s of inactivity before rebuilding."""
@@ -318,91 +388,39 @@ class MainScreen(Screen):
         """Public entry point for KV bindings — debounced."""
         self._schedule_filter()
 
-    def _apply_filters_now(self):
-        """Rebuild the visible row list. Only touches the widget tree when
-        the set or order of visible rows has actually changed."""
+    def _apply_filters_now(self, force=False):
+        """Rebuild the visible row list. Only hands new data to the RecycleView
+        when the set or order of visible rows has changed (or *force* is set)."""
         body = self.ids.table_body
 
         query = self.ids.search_input.text.strip().lower()
         mode = self.ids.filter_spinner.text
         low_only = self.ids.low_stock_cb.active
-        now = datetime.date.today()
 
-        to_show_keys = []
+        # --- type / low-stock / expiry filters are column masks ---
+        mask = self._store.mask(mode, low_only, self._type_filter)
 
-        for row in self._all_rows:
-            try:
-                drug, barcode, est_amount = row[0], row[1], row[2]
-                exp_date_raw, type_, dose_size, item_loc = row[3], row[4], row[5], row[6]
-            except (IndexError, ValueError):
-                continue
+        # --- search filter: the prebuilt index narrows the rows further ---
+        if query:
+            keys = self._search.search(query)
+            # Digit-only input may be a (partial) barcode scan: add the barcode
+            # prefix hits from the sorted barcodes; doses, locations and
+            # digits mid-barcode still match through the substring search
+            if query.isdigit():
+                keys = keys.union(self._search.barcode_prefix(query))
+            mask &= self._store.slots_mask(keys)
 
-            key = (barcode, drug)
-            if key not in self._row_cache:
-                continue
-
-            # --- medication type filter ---
-            if self._type_filter is not None:
-                if str(type_).lower() != self._type_filter.lower():
-                    continue
-
-            # --- search filter ---
-            if query:
-                fields = [str(v).lower() for v in (type_, drug, barcode, dose_size, item_loc)]
-                if not any(query in f for f in fields):
-                    continue
-
-            # --- low-stock filter ---
-            if low_only:
-                try:
-                    if float(est_amount) > 20:
-                        continue
-                except (ValueError, TypeError):
-                    continue
-
-            # --- expiration filter ---
-            if mode != 'All':
-                exp_date = self._parse_date(exp_date_raw)
-                if mode == "Expired":
-                    if not exp_date or exp_date >= now:
-                        continue
-                elif mode == "Expiring Soon":
-                    if not exp_date:
-                        continue
-                    delta = (exp_date - now).days
-                    if delta < 0 or delta > 30:
-                        continue
-
-            to_show_keys.append(key)
-
-        # Sort by type (first column) alphabetically
-        to_show_keys.sort(key=lambda k: str(self._row_cache[k]._full[0]).lower())
+        # Sort by type (first column) alphabetically — a cached permutation
+        to_show_keys = self._store.ordered_keys(mask)
 
         # --- Skip rebuild if nothing changed ---
-        if to_show_keys == self._current_keys:
+        if to_show_keys == self._current_keys and not force:
             return
 
-        # --- Swap entire body at once ---
-        body.clear_widgets()
-        for key in to_show_keys:
-            body.add_widget(self._row_cache[key])
+        # --- RecycleView only instantiates widgets for the rows on screen ---
+        body.data = [self._row_cache[key] for key in to_show_keys]
         self._current_keys = to_show_keys
 
-    @staticmethod
-    def _parse_date(d):
-        """Try common date formats and return a ``datetime.date`` or None."""
-        if not d:
-            return None
-        if isinstance(d, datetime.date):
-            return d
-        s = str(d).strip()
-        for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%Y-%m-%d %H:%M:%S"):
-            try:
-                return datetime.datetime.strptime(s, fmt).date()
-            except ValueError:
-                continue
-        return None
-
     # endregion
 
     # ================================================================== #
@@ -410,16 +428,19 @@ class MainScreen(Screen):
     # ================================================================== #
 
     def _start_preloading(self):
-        """Spin up a daemon thread that loads the FR model + reference embeddings."""
+        """Spin up a daemon thread that preloads the FR stages (model, references, camera).
+
+        Each stage reports back as it finishes, so face scans are enabled as
+        soon as the model and references are in — not after the camera probe.
+        """
+        # The capture service reconnects a lost camera itself and reports here
+        fr.capture_service.listeners.append(self._on_camera_state)
+
         def worker():
             try:
-                result = fr.preload_everything()
-                if result == FaceRecognitionError.SUCCESS:
-                    self.fr_ready = fr.preloading_complete
-                    self.camera_ready = fr.camera_ready
-                else:
+                result = fr.preload_everything(on_stage=self._on_fr_stage)
+                if result != FaceRecognitionError.SUCCESS:
                     self.fr_ready = False
-                    self.camera_ready = False
                     Clock.schedule_once(lambda dt: MessagePopup(
                         title='FR Init Error', message=str(result)
                     ).open(), 0.5)
@@ -427,25 +448,17 @@ class MainScreen(Screen):
                 print(f"Preloading error: {e}")
         threading.Thread(target=worker, daemon=True).start()
 
-    def _start_camera_monitor(self):
-        """Daemon thread that retries camera init with exponential back-off."""
-        def monitor():
-            interval = 5
-            while True:
-                try:
-                    if not self.camera_ready and self.fr_ready:
-                        if fr.reinitialize_camera():
-                            self.camera_ready = True
-                            fr.camera_ready = True
-                            interval = 5
-                        else:
-                            interval = min(interval * 1.5, 120)
-                    else:
-                        interval = 5
-                    time.sleep(interval)
-                except Exception:
-                    time.sleep(10)
-        threading.Thread(target=monitor, daemon=True).start()
+    def _on_fr_stage(self, stage, ok, seconds):
+        """Preload stage callback (worker thread) — flip the flag that stage gates."""
+        print(f"FR stage '{stage}' {'ready' if ok else 'failed'} in {seconds:.2f}s")
+        if stage == 'camera':
+            self.camera_ready = ok
+        else:
+            self.fr_ready = fr.preloading_complete
+
+    def _on_camera_state(self, connected):
+        """Capture-service callback (capture thread) — track camera (re)connects."""
+        self.camera_ready = connected
 
     def scan_face(self, purpose, callback):
         """Run face recognition in a background thread.
@@ -460,23 +473,29 @@ class MainScreen(Screen):
         if not self.fr_ready:
             MessagePopup(title='Please Wait', message='System is still loading.').open()
             return
-        if not self.camera_ready:
+        if not self.camera_ready and fr.stage_events['camera'].is_set():
             if not fr.reinitialize_camera():
                 MessagePopup(title='Camera Error', message='Camera not found.').open()
                 return
             self.camera_ready = True
             fr.camera_ready = True
 
+        pressed = time.perf_counter()
+
         def worker():
             try:
                 result = fr.quick_detect() if self.fr_ready else fr.main()
-                Clock.schedule_once(lambda dt: self._handle_fr_result(result, callback), 0)
+                Clock.schedule_once(lambda dt: self._handle_fr_result(result, callback, pressed), 0)
             except Exception:
                 Clock.schedule_once(lambda dt: callback(None), 0)
         threading.Thread(target=worker, daemon=True).start()
 
-    def _handle_fr_result(self, result, callback):
-        """Interpret the FR return value and invoke *callback* with the name or None."""
+    def _handle_fr_result(self, result, callback, pressed=None):
+        """Interpret the FR return value and invoke *callback* with the name or None.
+
+        *pressed* is the ``perf_counter`` time of the button press; the
+        press-to-identity latency is recorded for successful scans.
+        """
         if isinstance(result, FaceRecognitionError):
             MessagePopup(title='FR Error', message=result.message).open()
             if result in (FaceRecognitionError.CAMERA_ERROR,
@@ -485,6 +504,8 @@ class MainScreen(Screen):
             callback(None)
         elif isinstance(result, (list, tuple)) and result:
             name = str(result[0])
+            if pressed is not None:
+                metrics.histogram("ui.press_to_identity_ms").observe(1000 * (time.perf_counter() - pressed))
             MessagePopup(title='Detected', message=f'Detected: {name}').open()
             callback(name)
         else:
@@ -567,7 +588,7 @@ class MainScreen(Screen):
         else:
             now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             MessagePopup(title='Logged', message=f'Restocked {barcode} at {now} by {user}').open()
-            self.load_data()
+            self.refresh_changes()
 
     # endregion
 
@@ -594,20 +615,21 @@ class MainScreen(Screen):
         InputPopup(
             title='Amount', prompt='Enter amount used:',
             validate_number=True,
-            callback=lambda amt: self._do_use(drug_name, amt, user),
+            callback=lambda amt: self._do_use(barcode, drug_name, amt, user),
         ).open()
 
-    def _do_use(self, drug_name, amount_str, user):
-        """Step 3 — log the negative amount change and refresh the table."""
+    def _do_use(self, barcode, drug_name, amount_str, user):
+        """Step 3 — log the negative amount change and patch the row in place."""
         if not amount_str:
             return
         amount = int(float(amount_str)) * -1
         try:
-            self.db.log_access_to_inventory(barcode=drug_name, change=amount, user=user)
+            remaining, _ = self.db.log_access_to_inventory(barcode=drug_name, change=amount, user=user)
             now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             MessagePopup(title='Used',
-                         message=f'Logged {amount_str} of {drug_name}\nat {now} by {user}').open()
-            self.load_data()
+                         message=f'Logged {amount_str} of {drug_name}\nat {now} by {user}\n'
+                                 f'{remaining} remaining').open()
+            self._patch_amount(barcode, drug_name, remaining)
         except Exception as e:
             MessagePopup(title='Error', message=str(e)).open()
 
@@ -640,9 +662,9 @@ class MainScreen(Screen):
         self._admin_auth(self._do_delete)
 
     def _do_delete(self):
-        """Collect selected rows and prompt for a deletion reason."""
-        body = self.ids.table_body
-        selected = [w for w in body.children if isinstance(w, DataRow) and w.selected]
+        """Collect selected (visible) rows and prompt for a deletion reason."""
+        selected = [self._row_cache[k]['row_data'] for k in self._current_keys
+                    if k in self._selected_keys]
         if not selected:
             MessagePopup(title='Delete', message='No row selected.').open()
             return
@@ -665,11 +687,11 @@ class MainScreen(Screen):
     def _execute_delete(self, selected, reason):
         """Delete every selected row from the DB and refresh the table."""
         try:
-            for row in selected:
+            for row_data in selected:
                 # row_data is (type_, drug, barcode, est_amt, exp_date, dose_size, location)
-                barcode = row.row_data[2] if len(row.row_data) > 2 else row.row_data[0]
+                barcode = row_data[2] if len(row_data) > 2 else row_data[0]
                 self.db.delete_entry(barcode=barcode, reason=reason)
-            self.load_data()
+            self.refresh_changes()
             MessagePopup(title='Deleted', message=f'Deleted {len(selected)} row(s).').open()
         except Exception as e:
             MessagePopup(title='Error', message=str(e)).open()
@@ -692,6 +714,39 @@ class MainScreen(Screen):
 
     # endregion
 
+    # ================================================================== #
+    # region           DIAGNOSTICS                                        #
+    # ================================================================== #
+
+    def show_diagnostics(self):
+        """Gate behind admin auth, then show the recognition metrics."""
+        self._admin_auth(self._open_diagnostics)
+
+    def _open_diagnostics(self):
+        """Open the metrics report; Save dumps a snapshot for fleet comparison."""
+        DiagnosticsPopup(
+            report=self._diagnostics_report,
+            save=lambda: f'Saved {metrics.registry.dump()}',
+        ).open()
+
+    def _diagnostics_report(self):
+        """Preload stages, presence-gate and identity-cache totals, then the metrics registry report."""
+        lines = []
+        for name, status in fr.stage_status().items():
+            state = 'ok' if status['ok'] else 'failed' if status['done'] else 'pending'
+            if status['seconds'] is not None:
+                state += f" in {status['seconds']:.2f}s"
+            lines.append(f"stage {name}: {state}")
+        gate = fr.gate_stats()
+        lines.append(f"presence gate: {gate['passed']}/{gate['frames']} frames passed, "
+                     f"~{gate['cpu_saved_s']:.1f}s CPU saved")
+        ids = self.db.identities.stats()
+        lines.append(f"identity cache: {ids['hits']} hits / {ids['misses']} misses, "
+                     f"{ids['people']} people, {ids['medications']} medications")
+        return "\n".join(lines) + "\n\n" + metrics.registry.format_report()
+
+    # endregion
+
     # ================================================================== #
     # region           ADMIN AUTHENTICATION                               #
     # ================================================================== #
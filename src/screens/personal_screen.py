@@ -104,11 +104,16 @@ class PersonalScreen(Screen):
             for h in raw:
                 if len(h) < 5:
                     continue
-                matched = chr(0x2713) if h[4] else chr(0x2014)
-                body.add_widget(DataRow([h[1], str(h[2] or '-'), str(h[3]), matched]))
+                body.add_widget(self._history_row(h))
         except Exception as e:
             print(f"History load error: {e}")
 
+    @staticmethod
+    def _history_row(h):
+        """``DataRow`` for one ``get_personal_data`` history tuple."""
+        matched = chr(0x2713) if h[4] else chr(0x2014)
+        return DataRow([h[1], str(h[2] or '-'), str(h[3]), matched])
+
     def _load_as_needed(self):
         """Populate the as-needed medication list."""
         body = self.ids.as_needed_body
@@ -175,16 +180,24 @@ class PersonalScreen(Screen):
         ).open()
 
     def _do_personal_use(self, drug_name, amount_str):
-        """Step 3 — log the negative amount change and refresh."""
+        """Step 3 — log the negative amount change and append it to today's history."""
         if not amount_str:
             return
         amount = int(float(amount_str)) * -1
         try:
-            self.db.log_access_to_inventory(barcode=drug_name, change=amount, user=self.user)
-            MessagePopup(title='Used', message=f'Logged usage of {drug_name}').open()
-            self.load_data()
+            remaining, history_id = self.db.log_access_to_inventory(barcode=drug_name, change=amount, user=self.user)
         except Exception as e:
             MessagePopup(title='Error', message=str(e)).open()
+            return
+        MessagePopup(title='Used', message=f'Logged usage of {drug_name}\n{remaining} remaining').open()
+        if self.current_date == datetime.date.today() and self.personal_db:
+            try:
+                entry = self.personal_db.history_entry(history_id)
+            except Exception as e:
+                print(f"History load error: {e}")
+                entry = None
+            if entry:
+                self.ids.hist_body.add_widget(self._history_row(entry))
 
     # endregion
 
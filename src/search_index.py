@@ -0,0 +1,180 @@
+"""
+Medical Inventory System - Inventory Search Index
+
+In-memory index behind the main-screen search box.  Built once per data
+load and patched row-by-row as refreshes arrive, so a keystroke never
+re-lowercases or linearly scans every inventory row.
+"""
+
+import bisect
+
+
+# ====================================================================== #
+# region           SEARCH INDEX                                           #
+# ====================================================================== #
+
+class InventorySearchIndex:
+    """Case-insensitive substring search over a handful of fields per row.
+
+    * Every row's fields are normalised once into a single haystack string.
+    * A trigram -> keys postings map answers queries of 3+ characters by
+      intersecting the postings of the query's trigrams (smallest first)
+      and verifying only those candidates.
+    * Queries of 1-2 characters fall back to scanning the pre-normalised
+      haystacks (still no per-keystroke ``str()`` / ``lower()``).
+    * The last query's result is kept, so refining a query while typing
+      ("ibu" -> "ibup") can re-check just the previous hits when that is
+      the smaller candidate set.
+    * Barcodes are also kept in a sorted list for O(log n) prefix lookups.
+
+    Parameters
+    ----------
+    gram : int
+        N-gram length used for the postings map (default 3).
+    """
+
+    _SEP = '\x00'  # field separator – cannot appear in a typed query
+
+    def __init__(self, gram=3):
+        self.gram = gram
+        self._haystacks = {}      # key -> "field1\x00field2\x00..."
+        self._postings = {}       # n-gram -> set(keys)
+        self._barcodes = []       # sorted list of (barcode, key)
+        self._barcode_of = {}     # key -> normalised barcode
+        self._last = None         # (query, result) of the previous search
+
+    def __len__(self):
+        return len(self._haystacks)
+
+    # -- building / maintenance --
+
+    @staticmethod
+    def normalize(value):
+        """Normalise a field or query the same way for indexing and lookup."""
+        return str(value).lower()
+
+    def _grams(self, text):
+        """Yield the distinct n-grams of *text* (never spanning a field boundary)."""
+        n = self.gram
+        seen = set()
+        for field in text.split(self._SEP):
+            for i in range(len(field) - n + 1):
+                seen.add(field[i:i + n])
+        return seen
+
+    def build(self, items):
+        """Replace the index contents with *items*: iterable of ``(key, fields, barcode)``."""
+        self._last = None
+        self._haystacks.clear()
+        self._postings.clear()
+        self._barcode_of.clear()
+        self._barcodes = []
+        for key, fields, barcode in items:
+            self._add(key, fields, barcode)
+        self._barcodes.sort()
+
+    def add(self, key, fields, barcode):
+        """Index one row, replacing any previous entry for *key*."""
+        if key in self._haystacks:
+            self.remove(key)
+        self._add(key, fields, barcode, keep_sorted=True)
+
+    def _add(self, key, fields, barcode, keep_sorted=False):
+        self._last = None
+        text = self._SEP.join(self.normalize(f) for f in fields)
+        self._haystacks[key] = text
+        for g in self._grams(text):
+            self._postings.setdefault(g, set()).add(key)
+
+        code = self.normalize(barcode)
+        self._barcode_of[key] = code
+        if keep_sorted:
+            bisect.insort(self._barcodes, (code, key))
+        else:
+            self._barcodes.append((code, key))
+
+    def remove(self, key):
+        """Drop *key* from the index (no-op if it is not indexed)."""
+        text = self._haystacks.pop(key, None)
+        if text is None:
+            return
+        self._last = None
+        for g in self._grams(text):
+            keys = self._postings.get(g)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[g]
+
+        code = self._barcode_of.pop(key)
+        i = bisect.bisect_left(self._barcodes, (code,))
+        while i < len(self._barcodes) and self._barcodes[i][0] == code:
+            if self._barcodes[i][1] == key:
+                del self._barcodes[i]
+                break
+            i += 1
+
+    # -- lookups --
+
+    def search(self, query):
+        """Return the set of keys with *query* as a substring of any indexed field.
+
+        The returned set is shared with the index's query cache – do not mutate it.
+        """
+        q = self.normalize(query)
+        if not q:
+            return set(self._haystacks)
+
+        if self._last is not None and self._last[0] == q:
+            return self._last[1]
+        result = self._search(q)
+        self._last = (q, result)
+        return result
+
+    def _search(self, q):
+        haystacks = self._haystacks
+
+        # Every hit for q also contains the previous query, so its hits are candidates too
+        prev = None
+        if self._last is not None and self._last[0] in q:
+            prev = self._last[1]
+
+        if len(q) < self.gram:
+            source = prev if prev is not None else haystacks
+            return {k for k in source if q in haystacks[k]}
+
+        if len(q) == self.gram:
+            return set(self._postings.get(q, ()))
+
+        postings = []
+        for g in self._grams(q):
+            keys = self._postings.get(g)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+
+        if prev is not None and len(prev) <= len(postings[0]):
+            candidates = prev
+        else:
+            candidates = set(postings[0])
+            for keys in postings[1:]:
+                candidates &= keys
+                if not candidates:
+                    return candidates
+
+        # Trigrams can co-occur without the full query being contiguous – verify
+        return {k for k in candidates if q in haystacks[k]}
+
+    def barcode_prefix(self, prefix):
+        """Return keys whose barcode starts with *prefix* (binary search, O(log n + hits))."""
+        p = self.normalize(prefix)
+        barcodes = self._barcodes
+        i = bisect.bisect_left(barcodes, (p,))
+        hits = []
+        while i < len(barcodes) and barcodes[i][0].startswith(p):
+            hits.append(barcodes[i][1])
+            i += 1
+        return hits
+
+# endregion
@@ -1,7 +1,7 @@
 """
 Medical Inventory System - Reusable Kivy Widgets
 
-Popups, numpad, data-row, header-row, virtual keyboard.
+Popups, numpad, data-row, inventory-row, header-row, virtual keyboard.
 Every screen imports from here — single source of truth (DRY).
 """
 
@@ -16,8 +16,11 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.metrics import dp
 from kivy.uix.widget import Widget
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.graphics import Color, Rectangle
 
+from constants import COLUMNS
+
 # ====================================================================== #
 # region           NUMPAD WIDGET                                          #
 # ====================================================================== #
@@ -210,6 +213,45 @@ class ChoicePopup(Popup):
 # endregion
 
 
+# ====================================================================== #
+# region           DIAGNOSTICS POPUP                                      #
+# ====================================================================== #
+
+class DiagnosticsPopup(Popup):
+    """Scrollable metrics report with Refresh / Save / Close buttons.
+
+    Parameters
+    ----------
+    report : callable() -> str
+        Produces the report text (called on open and on Refresh).
+    save : callable() -> str or None
+        Writes the metrics to disk and returns a status line to show.
+    """
+    report_text = StringProperty('')
+    status = StringProperty('')
+
+    def __init__(self, report, save=None, **kwargs):
+        super().__init__(title='Diagnostics', **kwargs)
+        self._report = report
+        self._save = save
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the report."""
+        self.report_text = self._report()
+
+    def on_save(self):
+        """Dump the metrics and show where they went."""
+        if self._save is None:
+            return
+        try:
+            self.status = self._save() or ''
+        except Exception as e:
+            self.status = f'Save failed: {e}'
+
+# endregion
+
+
 # ====================================================================== #
 # region           VIRTUAL KEYBOARD POPUP                                 #
 # ====================================================================== #
@@ -367,6 +409,87 @@ class DataRow(BoxLayout):
                  size=lambda w, s: setattr(w._rect, 'size', s))
         return sep
 
+class InventoryRow(RecycleDataViewBehavior, BoxLayout):
+    """Recyclable inventory-table row used as the RecycleView ``viewclass``.
+
+    A handful of instances are reused for every on-screen row while
+    scrolling, so all state comes from the data dict on each refresh:
+
+    * ``key`` – the row's cache key, handed back to ``on_select``.
+    * ``row_data`` – cell values in ``COLUMNS`` order.
+    * ``selected`` – highlight state.
+    * ``visible`` – tuple of booleans, one per column.
+    * ``on_select`` – callable(key, selected) invoked when the row is tapped.
+    """
+    selected = BooleanProperty(False)
+    row_data = ListProperty([])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'horizontal'
+        self.key = None
+        self.on_select = None
+        self._data = None
+        self._visible = None
+        self._labels = []
+        self._seps = []
+
+        for i in range(len(COLUMNS)):
+            sep = DataRow._column_separator()
+            lbl = Label(font_size=dp(14), halign='left', valign='middle', padding=(dp(4), 0))
+            lbl.bind(size=lbl.setter('text_size'))
+            self._seps.append(sep)
+            self._labels.append(lbl)
+            if i > 0:
+                self.add_widget(sep)
+            self.add_widget(lbl)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Rebind this widget to *data* (called by RecycleView when recycling)."""
+        self._data = data
+        self.key = data['key']
+        self.on_select = data.get('on_select')
+        self.selected = data.get('selected', False)
+        self.row_data = data['row_data']
+        for lbl, val in zip(self._labels, data['row_data']):
+            lbl.text = str(val)
+
+        visible = data.get('visible')
+        if visible != self._visible:
+            self._apply_visibility(visible)
+
+    def _apply_visibility(self, visible):
+        """Collapse hidden columns (and the separator of the first visible one)."""
+        self._visible = visible
+        first_visible = True
+        for i, (lbl, sep) in enumerate(zip(self._labels, self._seps)):
+            shown = visible is None or visible[i]
+            if shown:
+                lbl.size_hint_x = 1
+                lbl.opacity = 1
+                sep.size_hint_x = None
+                sep.width = 0 if first_visible else dp(1)
+                sep.opacity = 0 if first_visible else 1
+                first_visible = False
+            else:
+                lbl.size_hint_x = None
+                lbl.width = 0
+                lbl.opacity = 0
+                sep.size_hint_x = None
+                sep.width = 0
+                sep.opacity = 0
+
+    def on_touch_down(self, touch):
+        """Toggle selection and store it back in the data dict so it survives recycling."""
+        if self.collide_point(*touch.pos):
+            self.selected = not self.selected
+            if self._data is not None:
+                self._data['selected'] = self.selected
+            if self.on_select:
+                self.on_select(self.key, self.selected)
+            return True
+        return super().on_touch_down(touch)
+
 class HeaderRow(BoxLayout):
     """Column header row — styled via KV, populated programmatically."""
     pass
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup: make the flat ``src/`` and ``database_setup/`` modules importable.
+"""
+
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.join(_ROOT, 'src'), os.path.join(_ROOT, 'database_setup')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
@@ -0,0 +1,101 @@
+"""Tests for the reference-embedding index, checked against a brute-force distance loop."""
+
+import numpy as np
+import pytest
+
+from face_index import APPROX_MIN_ROWS, MATCH_THRESHOLD, ReferenceIndex, cosine_to_distance, normalize_rows
+
+
+DIM = 32
+
+
+def _groups(rng, n_labels, per_label):
+    """Clustered references: each label's embeddings sit near its own random direction."""
+    groups = {}
+    for i in range(n_labels):
+        centre = rng.normal(size=DIM)
+        groups[f"person_{i}"] = [centre + 0.1 * rng.normal(size=DIM) for _ in range(per_label)]
+    return groups
+
+
+def _brute_match(groups, embedding, threshold=MATCH_THRESHOLD):
+    """The per-reference loop ReferenceIndex replaced."""
+    query = embedding / np.linalg.norm(embedding)
+    best_label, best_dist = "Unknown", float("inf")
+    for label, refs in groups.items():
+        for ref in refs:
+            dist = float(np.linalg.norm(query - ref / np.linalg.norm(ref)))
+            if dist < best_dist:
+                best_label, best_dist = label, dist
+    return (best_label if best_dist < threshold else "Unknown"), best_dist
+
+
+def test_helpers():
+    x = normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+    assert np.allclose(x[0], [0.6, 0.8])
+    assert np.all(np.isfinite(x))
+    assert cosine_to_distance(1.0) == pytest.approx(0.0, abs=1e-6)
+    assert cosine_to_distance(-1.0) == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize("threshold", [MATCH_THRESHOLD, 0.3])
+def test_exact_match_agrees_with_brute_force(threshold):
+    rng = np.random.default_rng(0)
+    groups = _groups(rng, n_labels=12, per_label=3)
+    index = ReferenceIndex.from_groups(groups, approximate=False)
+    queries = np.vstack([rng.normal(size=(10, DIM)),
+                         [refs[0] + 0.05 * rng.normal(size=DIM) for refs in groups.values()]])
+
+    results = index.match(queries, threshold=threshold)
+    assert len(results) == len(queries)
+    for query, (label, dist) in zip(queries, results):
+        expected_label, expected_dist = _brute_match(groups, query, threshold)
+        assert label == expected_label
+        assert dist == pytest.approx(expected_dist, abs=1e-4)
+
+
+def test_ivf_agrees_with_brute_force_near_references():
+    rng = np.random.default_rng(1)
+    groups = _groups(rng, n_labels=60, per_label=10)
+    index = ReferenceIndex.from_groups(groups)
+    assert len(index) >= APPROX_MIN_ROWS
+    assert index._centroids is not None
+
+    queries = [refs[k % len(refs)] + 0.05 * rng.normal(size=DIM)
+               for k, refs in enumerate(groups.values())]
+    for query, (label, dist) in zip(queries, index.match(queries)):
+        expected_label, expected_dist = _brute_match(groups, query)
+        assert label == expected_label
+        assert dist == pytest.approx(expected_dist, abs=1e-4)
+
+
+def test_forced_ivf_on_small_index():
+    rng = np.random.default_rng(2)
+    groups = _groups(rng, n_labels=8, per_label=4)
+    index = ReferenceIndex.from_groups(groups, approximate=True, n_probe=2)
+    assert index._centroids is not None
+    for label, refs in groups.items():
+        assert index.match(refs[0])[0][0] == label
+
+
+def test_empty_index_and_empty_groups():
+    index = ReferenceIndex.from_groups({"nobody": []})
+    assert len(index) == 0 and index.labels == []
+    assert index.match(np.ones((2, DIM))) == [("Unknown", float("inf"))] * 2
+    assert index.top_k(np.ones(DIM)) == []
+
+
+def test_top_k_returns_distinct_labels_by_distance():
+    rng = np.random.default_rng(3)
+    groups = _groups(rng, n_labels=6, per_label=3)
+    index = ReferenceIndex.from_groups(groups)
+    query = groups["person_4"][1]
+
+    top = index.top_k(query, k=3)
+    assert len(top) == 3
+    assert top[0][0] == "person_4"
+    assert len({label for label, _ in top}) == 3
+    assert [d for _, d in top] == sorted(d for _, d in top)
+    expected = sorted(_brute_match({label: refs}, query, threshold=np.inf)[1]
+                      for label, refs in groups.items())[:3]
+    assert [d for _, d in top] == pytest.approx(expected, abs=1e-3)    # float32 sqrt near 0
@@ -0,0 +1,192 @@
+"""Tests for IoU face tracking and the track identity vote."""
+
+import numpy as np
+import pytest
+
+from face_tracker import (REEMBED_EVERY, STRONG_MATCH_DISTANCE, TRACK_TTL, WEAK_MATCH_DISTANCE,
+                          FaceTracker, Track, iou_matrix)
+
+
+BOX_A = [0, 0, 100, 100]
+BOX_B = [300, 300, 400, 400]
+
+
+def _shift(box, dx):
+    return [box[0] + dx, box[1], box[2] + dx, box[3]]
+
+
+def test_iou_matrix():
+    ious = iou_matrix([BOX_A, [50, 0, 150, 100]], [BOX_A, BOX_B])
+    assert ious.shape == (2, 2)
+    assert ious[0, 0] == pytest.approx(1.0)
+    assert ious[0, 1] == 0
+    assert ious[1, 0] == pytest.approx(50 * 100 / (2 * 100 * 100 - 50 * 100))
+    assert iou_matrix([[5, 5, 5, 5]], [[5, 5, 5, 5]])[0, 0] == 0    # degenerate boxes
+
+
+def test_associate_keeps_ids_for_moving_faces():
+    tracker = FaceTracker()
+    first = tracker.associate([BOX_A, BOX_B], now=0.0)
+    assert [t.id for t in first] == [1, 2]
+
+    # Same faces, slightly moved and listed in the opposite order
+    second = tracker.associate([_shift(BOX_B, 10), _shift(BOX_A, 10)], now=0.1)
+    assert [t.id for t in second] == [2, 1]
+    assert all(t.frames_since_embed == 1 for t in second)
+    assert list(second[1].bbox) == _shift(BOX_A, 10)
+
+
+def test_associate_starts_new_track_below_min_iou():
+    tracker = FaceTracker()
+    tracker.associate([BOX_A], now=0.0)
+    moved = tracker.associate([_shift(BOX_A, 80)], now=0.1)      # IoU ~0.11
+    assert moved[0].id == 2
+    assert len(tracker.tracks) == 2
+
+
+def test_each_track_claimed_once():
+    tracker = FaceTracker()
+    tracker.associate([BOX_A], now=0.0)
+    tracks = tracker.associate([BOX_A, _shift(BOX_A, 5)], now=0.1)
+    assert tracks[0].id == 1
+    assert tracks[1].id == 2
+
+
+def test_tracks_expire_after_ttl():
+    tracker = FaceTracker()
+    tracker.associate([BOX_A], now=0.0)
+    assert tracker.associate([BOX_A], now=TRACK_TTL)[0].id == 1
+    assert tracker.associate([BOX_A], now=2 * TRACK_TTL + 0.01)[0].id == 2
+    tracker.reset()
+    assert tracker.tracks == []
+
+
+def test_identity_strong_match_confirms_immediately():
+    track = Track(1, BOX_A, 0.0)
+    assert track.identity is None and track.needs_embedding
+    track.record(np.ones(4), "alice", STRONG_MATCH_DISTANCE - 0.1)
+    assert track.identity == "alice"
+    assert not track.needs_embedding
+
+
+def test_identity_needs_votes_for_weaker_matches():
+    track = Track(1, BOX_A, 0.0)
+    track.record(np.ones(4), "alice", STRONG_MATCH_DISTANCE + 0.05)
+    assert track.identity is None
+    assert not track.needs_embedding       # below WEAK_MATCH_DISTANCE: later frames reuse it
+
+    track.record(np.ones(4), "bob", STRONG_MATCH_DISTANCE + 0.05)
+    assert track.identity is None
+    track.record(np.ones(4), "alice", STRONG_MATCH_DISTANCE + 0.05)
+    assert track.identity == "alice"
+    assert not track.needs_embedding
+
+
+def test_reused_frames_vote_for_the_last_match():
+    tracker = FaceTracker()
+    track = tracker.associate([BOX_A], now=0.0)[0]
+    track.record(np.ones(4), "alice", STRONG_MATCH_DISTANCE + 0.05)
+    assert track.identity is None
+
+    track = tracker.associate([_shift(BOX_A, 5)], now=0.1)[0]
+    assert not track.needs_embedding
+    assert track.identity == "alice"
+
+
+def test_weak_matches_do_not_vote_without_an_embedding():
+    tracker = FaceTracker()
+    track = tracker.associate([BOX_A], now=0.0)[0]
+    track.record(np.ones(4), "alice", WEAK_MATCH_DISTANCE + 0.05)
+    track = tracker.associate([BOX_A], now=0.1)[0]
+    assert track.needs_embedding
+    assert list(track.votes) == ["alice"]
+
+
+def test_unknown_votes_never_confirm():
+    track = Track(1, BOX_A, 0.0)
+    for _ in range(3):
+        track.record(np.ones(4), "Unknown", 1.2)
+    assert track.identity is None
+
+
+def test_old_votes_leave_the_window():
+    track = Track(1, BOX_A, 0.0)
+    track.record(np.ones(4), "alice", 0.7)
+    track.record(np.ones(4), "alice", 0.7)
+    assert track.identity == "alice"
+    for _ in range(4):
+        track.record(np.ones(4), "Unknown", 1.2)
+    assert track.identity is None
+
+
+def test_weak_or_stale_tracks_need_embedding():
+    tracker = FaceTracker()
+    track = tracker.associate([BOX_A], now=0.0)[0]
+    track.record(np.ones(4), "alice", 0.3)
+    for k in range(1, REEMBED_EVERY + 1):
+        track = tracker.associate([BOX_A], now=0.01 * k)[0]
+        assert track.needs_embedding == (k >= REEMBED_EVERY)
+
+    track.record(np.ones(4), "alice", WEAK_MATCH_DISTANCE)
+    track.votes.extend(["alice"] * 3)
+    assert track.identity == "alice"
+    assert track.needs_embedding           # weak match keeps re-embedding
+
+
+def test_note_embedding_counts():
+    tracker = FaceTracker()
+    tracker.note_embedding(False)
+    tracker.note_embedding(True)
+    tracker.note_embedding(True)
+    assert (tracker.embeds, tracker.reused) == (1, 2)
+
+
+def test_fewer_embeddings_per_identification_than_baseline(monkeypatch):
+    fr = pytest.importorskip("facial_recognition")      # needs insightface and OpenCV
+    from face_index import ReferenceIndex
+
+    rng = np.random.default_rng(0)
+    reference = rng.normal(size=512).astype(np.float32)
+    reference /= np.linalg.norm(reference)
+    other = rng.normal(size=512).astype(np.float32)
+    other -= other.dot(reference) * reference
+    other /= np.linalg.norm(other)
+    # A match between STRONG_MATCH_DISTANCE and WEAK_MATCH_DISTANCE (cosine 0.755 -> distance 0.7)
+    probe = 0.755 * reference + np.sqrt(1 - 0.755 ** 2) * other
+
+    calls = []
+
+    def embed(frame, face):
+        calls.append(face)
+        face.embedding = probe.copy()
+        return face.embedding
+
+    monkeypatch.setattr(fr, "reference_index", ReferenceIndex.from_groups({"alice": [reference]}))
+    monkeypatch.setattr(fr, "_detect_faces", lambda frame: (
+        [fr.Face(bbox=np.array(BOX_A, dtype=np.float32), kps=None, det_score=0.9)], False))
+    monkeypatch.setattr(fr, "_embed_face", embed)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def identify(recognize):
+        """Frames until a name is reported, as _detect_loop does; returns the embeddings used."""
+        before = len(calls)
+        for _ in range(10):
+            if any(name != "Unknown" for _, name, _ in recognize()):
+                return len(calls) - before
+        raise AssertionError("never identified")
+
+    def baseline():
+        """The pre-tracker pass: embed every face on every frame, accept the first match."""
+        faces, _ = fr._detect_faces(frame)
+        embeddings = np.stack([fr._embed_face(frame, face) for face in faces])
+        return [(face.bbox, name, dist)
+                for face, (name, dist) in zip(faces, fr.reference_index.match(embeddings))]
+
+    tracker = FaceTracker()
+    scans = 3            # back-to-back scans with the same person in front of the kiosk
+    tracked = [identify(lambda: fr._track_and_recognize(frame, tracker)) for _ in range(scans)]
+    untracked = [identify(baseline) for _ in range(scans)]
+
+    assert untracked == [1] * scans
+    assert tracked == [1] + [0] * (scans - 1)
+    assert sum(tracked) < sum(untracked)
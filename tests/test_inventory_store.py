@@ -0,0 +1,93 @@
+"""Tests for the columnar inventory store (filter masks and type ordering)."""
+
+import datetime
+import math
+
+import numpy as np
+
+from inventory_store import EXPIRING_SOON_DAYS, LOW_STOCK_THRESHOLD, InventoryStore, parse_date
+
+
+TODAY = datetime.date(2026, 1, 15)
+
+
+def _day(offset):
+    return (TODAY + datetime.timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+def _store():
+    store = InventoryStore(capacity=2)      # small on purpose: exercises growth
+    store.build([
+        ('a', 5, _day(-1), 'Tablet'),                       # expired, low
+        ('b', 100, _day(0), 'capsule'),                     # expiring today
+        ('c', LOW_STOCK_THRESHOLD, _day(EXPIRING_SOON_DAYS), 'tablet'),
+        ('d', 50, _day(EXPIRING_SOON_DAYS + 1), 'Liquid'),
+        ('e', 'n/a', None, 'Capsule'),                      # no amount, no date
+    ])
+    return store
+
+
+def _keys(store, mask):
+    return set(store.ordered_keys(mask))
+
+
+def test_parse_date_formats():
+    assert parse_date("2026-01-15") == TODAY
+    assert parse_date("2026/01/15") == TODAY
+    assert parse_date("01/15/2026") == TODAY
+    assert parse_date(datetime.datetime(2026, 1, 15, 8, 30)) == TODAY
+    assert parse_date("") is None
+    assert parse_date("soon") is None
+
+
+def test_build_casts_amounts():
+    store = _store()
+    assert len(store) == 5
+    assert 'e' in store and 'z' not in store
+    assert math.isnan(store.amount[store._slot_of['e']])
+
+
+def test_expiry_masks():
+    store = _store()
+    assert _keys(store, store.mask(today=TODAY)) == {'a', 'b', 'c', 'd', 'e'}
+    assert _keys(store, store.mask('Expired', today=TODAY)) == {'a'}
+    assert _keys(store, store.mask('Expiring Soon', today=TODAY)) == {'b', 'c'}
+
+
+def test_low_stock_and_type_filters():
+    store = _store()
+    assert _keys(store, store.mask(low_only=True, today=TODAY)) == {'a', 'c'}
+    assert _keys(store, store.mask(type_filter='TABLET', today=TODAY)) == {'a', 'c'}
+    assert _keys(store, store.mask('Expiring Soon', type_filter='tablet', today=TODAY)) == {'c'}
+    assert not store.mask(type_filter='Inhaler', today=TODAY).any()
+
+
+def test_ordered_keys_sorts_by_type_stably():
+    store = _store()
+    assert store.ordered_keys(store.mask()) == ['b', 'e', 'd', 'a', 'c']
+
+
+def test_upsert_and_remove_update_masks_and_order():
+    store = _store()
+    store.upsert('d', 1, _day(-5), 'tablet')
+    assert _keys(store, store.mask('Expired', today=TODAY)) == {'a', 'd'}
+    assert store.ordered_keys(store.mask()) == ['b', 'e', 'a', 'c', 'd']
+
+    slot = store._slot_of['b']
+    store.remove('b')
+    store.remove('missing')
+    assert 'b' not in store
+    assert not store.mask()[slot]
+    assert store.ordered_keys(store.mask()) == ['e', 'a', 'c', 'd']
+
+    store.upsert('f', 3, _day(2), 'Cream')
+    assert store._slot_of['f'] == slot      # tombstoned slot is reused
+    assert store.ordered_keys(store.mask()) == ['e', 'f', 'a', 'c', 'd']
+
+
+def test_slots_mask_ignores_unknown_keys():
+    store = _store()
+    m = store.slots_mask(['a', 'd', 'nope'])
+    assert m.dtype == np.bool_
+    assert _keys(store, m) == {'a', 'd'}
+    assert _keys(store, m & store.mask(low_only=True, today=TODAY)) == {'a'}
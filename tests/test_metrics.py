@@ -0,0 +1,101 @@
+"""Tests for the in-process metrics registry."""
+
+import json
+
+import pytest
+
+from metrics import HISTOGRAM_BUCKETS_MS, Histogram, MetricsRegistry
+
+
+@pytest.fixture
+def reg():
+    return MetricsRegistry()
+
+
+def test_counter_and_gauge(reg):
+    reg.counter('frames').inc()
+    reg.counter('frames').inc(4)
+    reg.gauge('load_s').set(1.5)
+    assert reg.counter('frames') is reg.counter('frames')
+    assert reg.snapshot()['frames'] == 5
+    assert reg.snapshot()['load_s'] == 1.5
+    assert reg.gauge('unset').snapshot() is None
+
+
+def test_kind_mismatch_raises(reg):
+    reg.counter('x')
+    with pytest.raises(TypeError):
+        reg.histogram('x')
+
+
+def test_histogram_buckets():
+    h = Histogram()
+    for ms in (0.5, 1, 1.5, 7, 30000, 45000):
+        h.observe(ms)
+    snap = h.snapshot()
+    assert snap['count'] == 6
+    assert snap['min'] == 0.5 and snap['max'] == 45000
+    assert snap['mean'] == pytest.approx(sum((0.5, 1, 1.5, 7, 30000, 45000)) / 6)
+    buckets = snap['buckets']
+    assert list(buckets) == [f"<={b}" for b in HISTOGRAM_BUCKETS_MS] + ["inf"]
+    assert buckets['<=1'] == 2          # bucket bounds are inclusive
+    assert buckets['<=2'] == 1
+    assert buckets['<=10'] == 1
+    assert buckets['<=30000'] == 1
+    assert buckets['inf'] == 1
+    assert sum(buckets.values()) == 6
+
+
+def test_histogram_percentiles():
+    h = Histogram()
+    assert h.percentile(50) is None
+    assert h.snapshot()['mean'] is None
+    for ms in range(100, 0, -1):
+        h.observe(ms)
+    assert h.percentile(0) == 1
+    assert h.percentile(50) == 51       # index round(0.5 * 99) = 50 of 1..100
+    assert h.percentile(95) == 95
+    assert h.percentile(100) == 100
+
+
+def test_timer_observes_block(reg):
+    with reg.timer('work'):
+        pass
+    with pytest.raises(ValueError):
+        with reg.timer('work'):
+            raise ValueError
+    snap = reg.snapshot()['work']
+    assert snap['count'] == 2
+    assert snap['min'] >= 0
+
+
+def test_reset_and_meta(reg):
+    reg.counter('a').inc()
+    reg.reset()
+    snap = reg.snapshot()
+    assert set(snap) == {'_meta'}
+    assert {'host', 'platform', 'time', 'uptime_s'} <= set(snap['_meta'])
+
+
+def test_dump_writes_json(reg, tmp_path):
+    reg.counter('drops').inc(3)
+    reg.histogram('frame_ms').observe(12)
+    path = reg.dump(str(tmp_path / 'out' / 'metrics.json'))
+    with open(path) as f:
+        data = json.load(f)
+    assert data['drops'] == 3
+    assert data['frame_ms']['count'] == 1
+    assert [p.name for p in (tmp_path / 'out').iterdir()] == ['metrics.json']
+
+
+def test_format_report(reg):
+    assert reg.format_report() == "No metrics recorded yet."
+    reg.counter('drops').inc(2)
+    reg.gauge('load_s').set(0.25)
+    reg.histogram('empty_ms')
+    reg.histogram('frame_ms').observe(10)
+    lines = reg.format_report().splitlines()
+    assert "drops: 2" in lines
+    assert "load_s: 0.250" in lines
+    assert any(line.startswith("frame_ms: n=1 p50=10.0") for line in lines)
+    assert not any(line.startswith("empty_ms") for line in lines)
@@ -0,0 +1,70 @@
+"""Tests for splitting migration scripts into statements."""
+
+import os
+
+from migrate import MIGRATIONS_DIR, discover, split_statements
+
+
+def test_plain_statements_and_comments():
+    sql = """
+    -- leading comment; with a semicolon
+    CREATE TABLE t (id INT);   # trailing comment; too
+    /* block; comment */ INSERT INTO t VALUES (1);
+
+    INSERT INTO t VALUES (2)
+    """
+    assert split_statements(sql) == [
+        "CREATE TABLE t (id INT)",
+        "INSERT INTO t VALUES (1)",
+        "INSERT INTO t VALUES (2)",
+    ]
+
+
+def test_delimiters_inside_quotes_are_kept():
+    sql = r"""INSERT INTO notes VALUES ('a; b', "c; d", 'it\'s; fine');
+SELECT `odd;name` FROM notes;"""
+    assert split_statements(sql) == [
+        r"""INSERT INTO notes VALUES ('a; b', "c; d", 'it\'s; fine')""",
+        "SELECT `odd;name` FROM notes",
+    ]
+
+
+def test_comment_markers_inside_quotes_are_kept():
+    assert split_statements("SELECT '-- not a comment', '# nor this';") == [
+        "SELECT '-- not a comment', '# nor this'",
+    ]
+
+
+def test_double_dash_needs_whitespace():
+    assert split_statements("SELECT 5--1;") == ["SELECT 5--1"]
+
+
+def test_delimiter_blocks_keep_procedure_bodies_whole():
+    sql = """DROP PROCEDURE IF EXISTS p;
+DELIMITER //
+CREATE PROCEDURE p(IN x INT)
+BEGIN
+    -- body comment
+    SELECT x;
+    UPDATE t SET id = x;
+END //
+DELIMITER ;
+CALL p(1);
+"""
+    statements = split_statements(sql)
+    assert len(statements) == 3
+    assert statements[0] == "DROP PROCEDURE IF EXISTS p"
+    assert statements[1].startswith("CREATE PROCEDURE p(IN x INT)")
+    assert "SELECT x;" in statements[1] and "UPDATE t SET id = x;" in statements[1]
+    assert statements[1].endswith("END")
+    assert "body comment" not in statements[1]
+    assert statements[2] == "CALL p(1)"
+
+
+def test_shipped_migrations_split():
+    for version, name, path in discover(MIGRATIONS_DIR):
+        with open(path) as f:
+            statements = split_statements(f.read())
+        assert statements, name
+        assert not any(s.upper().startswith('DELIMITER') for s in statements)
+        assert os.path.basename(path).startswith(f"{version:04d}_")
@@ -0,0 +1,77 @@
+"""Tests for the vectorised usage-anomaly scoring in database.py."""
+
+import numpy as np
+import pytest
+
+from database import _rolling_anomalies, format_anomalies
+
+
+def _loop_anomalies(values, labels, baseline_window, z_thresh, ratio_thresh):
+    """The per-series loop _rolling_anomalies replaced."""
+    anomalies = []
+    for label, series in zip(labels, values):
+        for i in range(baseline_window, len(series)):
+            baseline = series[i - baseline_window:i]
+            mean = baseline.mean()
+            std = baseline.std(ddof=1) or 1
+            z = (series[i] - mean) / std
+            ratio = series[i] / mean if mean > 0 else 0
+            if abs(z) > z_thresh or ratio > ratio_thresh:
+                anomalies.append({
+                    "label": label,
+                    "index": i,
+                    "value": float(series[i]),
+                    "baseline_mean": round(float(mean), 2),
+                    "z_score": round(float(z), 2),
+                    "ratio": round(float(ratio), 2),
+                    "type": "spike" if series[i] > mean else "drop",
+                })
+    return anomalies
+
+
+def _assert_same(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert a.keys() == e.keys()
+        for key in ("label", "index", "type"):
+            assert a[key] == e[key]
+        for key in ("value", "baseline_mean", "z_score", "ratio"):
+            assert a[key] == pytest.approx(e[key], abs=0.011)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("baseline_window", [2, 3, 7])
+def test_matches_per_series_loop_on_random_usage(seed, baseline_window):
+    rng = np.random.default_rng(seed)
+    values = rng.poisson(4, size=(6, 30)).astype(float)
+    values[rng.random(values.shape) < 0.05] *= 6          # occasional spikes
+    labels = [f"series_{i}" for i in range(len(values))]
+    expected = _loop_anomalies(values, labels, baseline_window, 2.0, 2.5)
+    assert expected                                       # the data does contain anomalies
+    _assert_same(_rolling_anomalies(values, labels, baseline_window, 2.0, 2.5), expected)
+
+
+def test_flat_and_zero_baselines():
+    values = np.array([
+        [3, 3, 3, 3, 3, 9, 3, 3],        # zero std: std falls back to 1
+        [0, 0, 0, 0, 5, 0, 0, 0],        # zero mean: ratio is 0
+        [2, 2, 2, 2, 2, 2, 2, 2],        # nothing to flag
+    ], dtype=float)
+    labels = ["flat", "zero", "steady"]
+    actual = _rolling_anomalies(values, labels, 3, 2.0, 2.5)
+    _assert_same(actual, _loop_anomalies(values, labels, 3, 2.0, 2.5))
+    assert {a["label"] for a in actual} == {"flat", "zero"}
+    assert all(a["ratio"] == 0 for a in actual if a["label"] == "zero" and a["index"] == 4)
+
+
+def test_too_short_or_invalid_window():
+    values = np.ones((2, 5))
+    assert _rolling_anomalies(values, ["a", "b"], 5, 2.0, 2.5) == []
+    assert _rolling_anomalies(values, ["a", "b"], 0, 2.0, 2.5) == []
+
+
+def test_format_anomalies():
+    assert format_anomalies([]) == "No anomalies detected."
+    values = np.array([[1, 1, 1, 10]], dtype=float)
+    line = format_anomalies(_rolling_anomalies(values, ["ibuprofen"], 3, 2.0, 2.5))
+    assert line.startswith("ibuprofen [3] spike")
@@ -0,0 +1,81 @@
+"""Tests for the n-gram inventory search index, checked against a plain substring scan."""
+
+import random
+
+from search_index import InventorySearchIndex
+
+
+ROWS = [
+    (1, ('Ibuprofen', 'Tablet', '200 mg'), '0300450123'),
+    (2, ('Acetaminophen', 'Tablet', '500 mg'), '0300451234'),
+    (3, ('Amoxicillin', 'Capsule', '250 mg'), '1234500001'),
+    (4, ('Hydrocortisone', 'Cream', '1%'), '1234599999'),
+    (5, ('Ibuprofen', 'Liquid', '100 mg/5 mL'), '5550001111'),
+]
+
+
+def _brute(rows, query):
+    q = query.lower()
+    return {key for key, fields, _ in rows if any(q in str(f).lower() for f in fields)}
+
+
+def _index(rows=ROWS):
+    index = InventorySearchIndex()
+    index.build(rows)
+    return index
+
+
+def test_search_matches_substring_scan():
+    index = _index()
+    for query in ('', 'i', 'ib', 'ibu', 'IBUPROFEN', 'tab', 'mg', '0 mg', 'cream', 'xyz', 'ne', 'profen liq'):
+        assert index.search(query) == _brute(ROWS, query), query
+
+
+def test_search_does_not_span_fields():
+    index = _index()
+    assert index.search('fentab') == set()
+    assert index.search('tablet') == {1, 2}
+
+
+def test_incremental_queries_use_previous_result_correctly():
+    index = _index()
+    for query in ('a', 'am', 'amo', 'amox', 'am', 'ace'):
+        assert index.search(query) == _brute(ROWS, query), query
+
+
+def test_add_and_remove():
+    index = _index()
+    index.search('ibu')                         # populate the query cache
+    index.add(6, ('Ibuprofen', 'Gel', '5%'), '0300450999')
+    assert index.search('ibu') == {1, 5, 6}
+    index.add(1, ('Naproxen', 'Tablet', '220 mg'), '0300450123')
+    assert index.search('ibu') == {5, 6}
+    index.remove(5)
+    index.remove(42)
+    assert index.search('ibu') == {6}
+    assert len(index) == 5
+
+
+def test_barcode_prefix():
+    index = _index()
+    assert sorted(index.barcode_prefix('03004')) == [1, 2]
+    assert index.barcode_prefix('0300450') == [1]
+    assert sorted(index.barcode_prefix('12345')) == [3, 4]
+    assert index.barcode_prefix('9') == []
+    assert len(index.barcode_prefix('')) == len(ROWS)
+
+    index.add(6, ('Saline',), '0300450000')
+    index.remove(1)
+    assert index.barcode_prefix('0300450') == [6]
+
+
+def test_random_rows_match_substring_scan():
+    rng = random.Random(7)
+    alphabet = 'abcde '
+    rows = [(i, (''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))),
+                 ''.join(rng.choice(alphabet) for _ in range(5))), str(i))
+            for i in range(200)]
+    index = _index(rows)
+    for _ in range(300):
+        query = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 5)))
+        assert index.search(query) == _brute(rows, query), query